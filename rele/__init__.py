@@ -10,6 +10,6 @@ else:
 
 from .client import Publisher, Subscriber  # noqa
 from .config import setup  # noqa
-from .publishing import publish  # noqa
+from .publishing import flush, publish, publish_fanout, warmup  # noqa
 from .subscription import Callback, Subscription, sub  # noqa
 from .worker import Worker  # noqa
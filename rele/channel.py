@@ -0,0 +1,187 @@
+import os
+import threading
+from typing import Any
+
+import grpc
+from google.cloud import pubsub_v1
+from google.pubsub_v1.services.publisher.transports import PublisherGrpcTransport
+from google.pubsub_v1.services.subscriber.transports import SubscriberGrpcTransport
+
+DEFAULT_API_ENDPOINT = "pubsub.googleapis.com"
+
+# The options google-cloud-pubsub sets on the channels it creates itself.
+DEFAULT_CHANNEL_OPTIONS: dict[str, Any] = {
+    "grpc.max_send_message_length": -1,
+    "grpc.max_receive_message_length": -1,
+    "grpc.max_metadata_size": 4 * 1024 * 1024,
+    "grpc.keepalive_time_ms": 30000,
+}
+
+GRPC_COMPRESSION = {
+    None: None,
+    "gzip": grpc.Compression.Gzip,
+    "deflate": grpc.Compression.Deflate,
+}
+
+_ChannelKey = tuple[str, int, tuple[tuple[str, Any], ...], str | None]
+
+
+class _SharedChannel:
+    def __init__(self, target: str, channel: grpc.Channel, credentials: Any) -> None:
+        self.target = target
+        self.channel = channel
+        # Held so the id of the credentials in the key is never reused.
+        self.credentials = credentials
+        self.users = 0
+
+
+_channels: dict[_ChannelKey, _SharedChannel] = {}
+_channels_lock = threading.Lock()
+
+
+def publisher_client(
+    credentials: Any,
+    client_options: dict[str, Any] | None = None,
+    channel_options: dict[str, Any] | None = None,
+    compression: str | None = None,
+    **kwargs: Any,
+) -> Any:
+    """Build a ``PublisherClient`` on the shared channel.
+
+    See :func:`subscriber_client` for the parameters.
+    """
+    if not _can_share(client_options, channel_options, compression):
+        return pubsub_v1.PublisherClient(
+            credentials=credentials, client_options=client_options, **kwargs
+        )
+    shared = _acquire(credentials, client_options, channel_options, compression)
+    transport = PublisherGrpcTransport(host=shared.target, channel=shared.channel)
+    return pubsub_v1.PublisherClient(transport=transport, **kwargs)
+
+
+def subscriber_client(
+    credentials: Any,
+    client_options: dict[str, Any] | None = None,
+    channel_options: dict[str, Any] | None = None,
+    compression: str | None = None,
+    **kwargs: Any,
+) -> Any:
+    """Build a ``SubscriberClient`` on the shared channel.
+
+    Every client built with the same endpoint, credentials and options shares
+    a single gRPC channel, so a process keeps one connection to PubSub.
+    Channels are reference counted: call :func:`release_client` instead of
+    closing the client once it is no longer needed.
+
+    Client options other than ``api_endpoint``, such as ``client_cert_source``,
+    are applied by the client itself, which then creates its own channel with
+    the default options.
+
+    :param credentials: obj :meth:`~rele.config.Config.credentials`.
+    :param client_options: dict :ref:`settings_client_options`.
+    :param channel_options: dict :ref:`settings_grpc_channel_options`, merged
+        over the default options of google-cloud-pubsub.
+    :param compression: string :ref:`settings_grpc_compression`.
+    :param kwargs: passed to the client, e.g. ``subscriber_options``.
+    """
+    if not _can_share(client_options, channel_options, compression):
+        return pubsub_v1.SubscriberClient(
+            credentials=credentials, client_options=client_options, **kwargs
+        )
+    shared = _acquire(credentials, client_options, channel_options, compression)
+    transport = SubscriberGrpcTransport(host=shared.target, channel=shared.channel)
+    return pubsub_v1.SubscriberClient(transport=transport, **kwargs)
+
+
+def release_client(client: Any) -> None:
+    """Stop using a client built by this module, closing its channel when no
+    other client uses it.
+    """
+    channel = client._transport.grpc_channel
+    with _channels_lock:
+        for key, shared in _channels.items():
+            if shared.channel is channel:
+                shared.users -= 1
+                if shared.users > 0:
+                    return
+                del _channels[key]
+                break
+    if isinstance(client, pubsub_v1.SubscriberClient):
+        client.close()
+    else:
+        channel.close()
+
+
+def _can_share(
+    client_options: dict[str, Any] | None,
+    channel_options: dict[str, Any] | None,
+    compression: str | None,
+) -> bool:
+    if not set(client_options or {}) - {"api_endpoint"}:
+        return True
+    if channel_options or compression:
+        raise ValueError(
+            "GRPC_CHANNEL_OPTIONS and GRPC_COMPRESSION only support the "
+            "api_endpoint client option"
+        )
+    return False
+
+
+def _acquire(
+    credentials: Any,
+    client_options: dict[str, Any] | None,
+    channel_options: dict[str, Any] | None,
+    compression: str | None,
+) -> _SharedChannel:
+    if compression not in GRPC_COMPRESSION:
+        raise ValueError(f"Unsupported gRPC compression: {compression}")
+
+    target = _target(client_options)
+    options = {**DEFAULT_CHANNEL_OPTIONS, **(channel_options or {})}
+    key = (target, id(credentials), tuple(sorted(options.items())), compression)
+    with _channels_lock:
+        shared = _channels.get(key)
+        if shared is None:
+            channel = _create_channel(
+                target, credentials, list(options.items()), compression
+            )
+            shared = _channels[key] = _SharedChannel(target, channel, credentials)
+        shared.users += 1
+        return shared
+
+
+def _target(client_options: dict[str, Any] | None) -> str:
+    target = os.environ.get("PUBSUB_EMULATOR_HOST") or (
+        (client_options or {}).get("api_endpoint") or DEFAULT_API_ENDPOINT
+    )
+    return target if ":" in target else f"{target}:443"
+
+
+def _create_channel(
+    target: str,
+    credentials: Any,
+    options: list[tuple[str, Any]],
+    compression: str | None,
+) -> grpc.Channel:
+    if os.environ.get("PUBSUB_EMULATOR_HOST"):
+        return grpc.insecure_channel(
+            target, options=options, compression=GRPC_COMPRESSION[compression]
+        )
+    return PublisherGrpcTransport.create_channel(
+        target,
+        credentials=credentials,
+        options=options,
+        compression=GRPC_COMPRESSION[compression],
+    )
+
+
+def _forget_channels() -> None:
+    # gRPC channels cannot be used across a fork, so the child process starts
+    # with no shared channel and creates its own on demand.
+    global _channels_lock
+    _channels.clear()
+    _channels_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_channels)
@@ -0,0 +1,137 @@
+import os
+import tempfile
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any
+
+CLAIM_CHECK_ATTRIBUTE = "rele_claim_check"
+DEFAULT_CLAIM_CHECK_THRESHOLD = 1024 * 1024
+DEFAULT_CLAIM_CHECK_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+
+class BlobStore(ABC):
+    """Base class for claim-check blob stores.
+
+    Subclasses must implement ``put`` and ``get``. Keys are made of the topic
+    name and a random identifier, separated by a slash.
+    """
+
+    @abstractmethod
+    def put(self, key: str, payload: bytes) -> None: ...
+
+    @abstractmethod
+    def get(self, key: str) -> bytes: ...
+
+
+class LocalFileSystemBlobStore(BlobStore):
+    """Stores payloads as files under ``path``.
+
+    Publishers and workers must see the same directory, e.g. a shared volume.
+    Keys resolving outside of it, coming from a forged message attribute, are
+    rejected with a ValueError.
+
+    :param path: string Directory where the payloads are stored.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+    def put(self, key: str, payload: bytes) -> None:
+        file_path = self._file_path(key)
+        directory = os.path.dirname(file_path)
+        os.makedirs(directory, exist_ok=True)
+        # Write to a temporary file first so readers never see partial blobs.
+        fd, tmp_path = tempfile.mkstemp(dir=directory)
+        with os.fdopen(fd, "wb") as blob:
+            blob.write(payload)
+        os.replace(tmp_path, file_path)
+
+    def get(self, key: str) -> bytes:
+        with open(self._file_path(key), "rb") as blob:
+            return blob.read()
+
+    def _file_path(self, key: str) -> str:
+        root = os.path.realpath(self.path)
+        file_path = os.path.realpath(os.path.join(root, key))
+        if os.path.commonpath([root, file_path]) != root or file_path == root:
+            raise ValueError(f"Invalid claim-check key: {key}")
+        return file_path
+
+
+class ClaimCheck:
+    """Offloads large payloads to a blob store.
+
+    Payloads above ``threshold`` bytes are written to ``store`` and the message
+    is published with an empty body and a ``rele_claim_check`` attribute
+    holding the blob key. Workers fetch the payload back transparently, keeping
+    recently fetched blobs in memory so subscriptions of the same topic in a
+    process only read each blob once.
+
+    Blobs are never deleted by Relé, since any number of subscriptions may
+    need them. Expire them with the store's own lifecycle rules.
+
+    Usage::
+
+        RELE = {
+            'CLAIM_CHECK': ClaimCheck(
+                LocalFileSystemBlobStore('/mnt/rele-blobs'), threshold=512 * 1024
+            ),
+        }
+
+    :param store: obj :class:`~rele.claim_check.BlobStore`
+    :param threshold: int Payload size in bytes above which it is offloaded.
+    :param cache_max_bytes: int Maximum size of the cache of fetched payloads.
+    """
+
+    def __init__(
+        self,
+        store: BlobStore,
+        threshold: int = DEFAULT_CLAIM_CHECK_THRESHOLD,
+        cache_max_bytes: int = DEFAULT_CLAIM_CHECK_CACHE_MAX_BYTES,
+    ) -> None:
+        self.store = store
+        self.threshold = threshold
+        self.cache_max_bytes = cache_max_bytes
+        self._cache: OrderedDict[str, bytes] = OrderedDict()
+        self._cache_bytes = 0
+        self._lock = threading.Lock()
+
+    def offload(self, topic: str, payload: bytes, attrs: dict[str, Any]) -> bytes:
+        """Store the payload if it is too large, returning the message body."""
+        if len(payload) <= self.threshold:
+            return payload
+
+        key = f"{topic}/{uuid.uuid4().hex}"
+        self.store.put(key, payload)
+        attrs[CLAIM_CHECK_ATTRIBUTE] = key
+        return b""
+
+    def fetch(self, body: bytes, attrs: dict[str, Any]) -> bytes:
+        """Return the payload of a message, fetching it if it was offloaded."""
+        key = attrs.get(CLAIM_CHECK_ATTRIBUTE)
+        if not key:
+            return body
+
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+
+        payload = self.store.get(key)
+        self._cache_payload(key, payload)
+        return payload
+
+    def _cache_payload(self, key: str, payload: bytes) -> None:
+        if len(payload) > self.cache_max_bytes:
+            return
+
+        with self._lock:
+            if key in self._cache:
+                return
+            self._cache[key] = payload
+            self._cache_bytes += len(payload)
+            while self._cache_bytes > self.cache_max_bytes:
+                _, evicted = self._cache.popitem(last=False)
+                self._cache_bytes -= len(evicted)
@@ -1,22 +1,34 @@
+import functools
 import json
 import logging
 import os
+import threading
 import time
 import warnings
 from collections.abc import Callable
-from concurrent.futures import TimeoutError
-from typing import Any
+from concurrent.futures import TimeoutError, wait
+from datetime import datetime
+from typing import Any, NamedTuple
 
 import google.auth
+import google.auth.transport.requests
+import grpc
 from google.api_core import exceptions
 from google.cloud import pubsub_v1
+from google.cloud.pubsub_v1.publisher import futures
 from google.cloud.pubsub_v1.types import FieldMask
 from google.protobuf import duration_pb2
-from google.pubsub_v1 import MessageStoragePolicy
+from google.pubsub_v1 import DeadLetterPolicy, MessageStoragePolicy
 from google.pubsub_v1 import RetryPolicy as GCloudRetryPolicy
 
-from rele.middleware import run_middleware_hook
-from rele.retry_policy import RetryPolicy
+from rele.channel import publisher_client, release_client, subscriber_client
+from rele.claim_check import ClaimCheck
+from rele.compression import Compressor
+from rele.delayed import DEFAULT_DELAYED_STORE_THRESHOLD, DelayQueue, due_time
+from rele.middleware import PublishContext, run_middleware_hook
+from rele.outbox import Outbox
+from rele.rate_limit import DEFER, PublishRateLimit, RateLimitError
+from rele.retry_policy import PublishRetryPolicy, RetryPolicy
 from rele.subscription import Subscription
 
 logger = logging.getLogger(__name__)
@@ -25,6 +37,53 @@ USE_EMULATOR = True if os.environ.get("PUBSUB_EMULATOR_HOST") else False
 DEFAULT_ENCODER_PATH = "json.JSONEncoder"
 DEFAULT_ACK_DEADLINE = 60
 DEFAULT_BLOCKING = False
+DEFAULT_MAX_DELIVERY_ATTEMPTS = 5
+
+
+class WarmupResult(NamedTuple):
+    """Seconds spent by each step of :meth:`~rele.publishing.warmup`.
+
+    :param setup_seconds: float Discovering the settings and setting up Relé.
+    :param credentials_seconds: float Fetching an access token.
+    :param channel_seconds: float Connecting the gRPC channel.
+    """
+
+    setup_seconds: float
+    credentials_seconds: float
+    channel_seconds: float
+
+    @property
+    def total_seconds(self) -> float:
+        return self.setup_seconds + self.credentials_seconds + self.channel_seconds
+
+
+class FanoutPublishError(Exception):
+    """Raised by :meth:`~rele.client.Publisher.publish_fanout` when the message
+    could not be published to some of the topics.
+
+    :param errors: dict with the exception raised for every failed topic.
+    :param futures: dict with the future of every topic, including the ones
+        that succeeded.
+    """
+
+    def __init__(self, errors: dict[str, BaseException], futures: dict[str, Any]):
+        super().__init__(f"Could not publish to {', '.join(errors)}")
+        self.errors = errors
+        self.futures = futures
+
+
+class FlushResult(NamedTuple):
+    """Summary of the non-blocking publishes awaited by a flush.
+
+    :param published: int Messages confirmed by PubSub since the last flush.
+    :param failed: int Messages that could not be published since the last
+        flush.
+    :param pending: int Messages still in flight when the flush timed out.
+    """
+
+    published: int
+    failed: int
+    pending: int
 
 
 def get_google_defaults() -> tuple[Any, Any]:
@@ -46,6 +105,12 @@ class Subscriber:
     :param message_storage_policy: str Region to store the messages
     :param default_ack_deadline: int Ack Deadline defined in settings
     :param default_retry_policy: RetryPolicy Rele's RetryPolicy defined in settings
+    :param channel_options: dict :ref:`settings_grpc_channel_options`
+    :param grpc_compression: str :ref:`settings_grpc_compression`
+    :param default_dead_letter_topic: str
+        :ref:`settings_default_dead_letter_topic`
+    :param default_max_delivery_attempts: int
+        :ref:`settings_default_max_delivery_attempts`
     """
 
     def __init__(
@@ -56,6 +121,10 @@ class Subscriber:
         client_options: dict[str, Any] | None,
         default_ack_deadline: int | None = None,
         default_retry_policy: RetryPolicy | None = None,
+        channel_options: dict[str, Any] | None = None,
+        grpc_compression: str | None = None,
+        default_dead_letter_topic: str | None = None,
+        default_max_delivery_attempts: int | None = None,
     ) -> None:
         self._gc_project_id = gc_project_id
         self._ack_deadline = default_ack_deadline or DEFAULT_ACK_DEADLINE
@@ -63,10 +132,17 @@ class Subscriber:
         self._message_storage_policy = self._normalize_storage_policy(
             message_storage_policy
         )
-        self._client = pubsub_v1.SubscriberClient(
-            credentials=credentials, client_options=client_options
-        )
+        self._channel_settings: dict[str, Any] = {
+            "client_options": client_options,
+            "channel_options": channel_options,
+            "compression": grpc_compression,
+        }
+        self._client = subscriber_client(self.credentials, **self._channel_settings)
+        self._publisher_client: Any = None
         self._retry_policy = default_retry_policy
+        self._dead_letter_topic = default_dead_letter_topic
+        self._max_delivery_attempts = default_max_delivery_attempts
+        self._dead_letter_topics_created: set[str] = set()
 
     def update_or_create_subscription(self, subscription: Subscription) -> None:
         """Handles creating the subscription when it does not exists or updates it
@@ -74,7 +150,9 @@ class Subscriber:
 
         This makes it easier to deploy a worker and forget about the
         subscription side of things. If the topic of the subscription
-        do not exist, it will be created automatically.
+        do not exist, it will be created automatically, as well as its
+        retry topics and subscriptions when it has ``retry_topics``, and its
+        dead letter topic and subscription when it has a ``dead_letter_topic``.
 
         :param subscription: obj :class:`~rele.subscription.Subscription`.
         """
@@ -96,9 +174,17 @@ class Subscriber:
         except exceptions.AlreadyExists:
             self._update_subscription(subscription_path, topic_path, subscription)
 
+        for retry_subscription in subscription.retry_subscriptions:
+            self.update_or_create_subscription(retry_subscription)
+
     def _create_topic(self, topic_path: str) -> Any:
-        publisher_client = pubsub_v1.PublisherClient(credentials=self.credentials)
-        return publisher_client.create_topic(
+        if self._publisher_client is None:
+            # Built on the channel of the SubscriberClient and kept for the
+            # next missing topic.
+            self._publisher_client = publisher_client(
+                self.credentials, **self._channel_settings
+            )
+        return self._publisher_client.create_topic(
             request={
                 "name": topic_path,
                 "message_storage_policy": MessageStoragePolicy(
@@ -152,30 +238,92 @@ class Subscriber:
         if retry_policy:
             request["retry_policy"] = self._build_gcloud_retry_policy(retry_policy)
 
+        dead_letter_policy = self._build_dead_letter_policy(subscription)
+
+        if dead_letter_policy:
+            request["dead_letter_policy"] = dead_letter_policy
+
+        if subscription.exactly_once:
+            request["enable_exactly_once_delivery"] = True
+
         self._client.create_subscription(request=request)
 
     def _update_subscription(
         self, subscription_path: str, topic_path: str, subscription: Subscription
     ) -> None:
         retry_policy = subscription.retry_policy or self._retry_policy
+        dead_letter_policy = self._build_dead_letter_policy(subscription)
+        fields: dict[str, Any] = {}
 
-        if not retry_policy:
-            return
+        if retry_policy:
+            fields["retry_policy"] = self._build_gcloud_retry_policy(retry_policy)
+
+        if dead_letter_policy:
+            fields["dead_letter_policy"] = dead_letter_policy
+
+        if subscription.exactly_once:
+            fields["enable_exactly_once_delivery"] = True
 
-        update_mask = FieldMask(paths=["retry_policy"])
+        if not fields:
+            return
 
-        client_retry_policy = self._build_gcloud_retry_policy(retry_policy)
+        update_mask = FieldMask(paths=list(fields))
 
         gcloud_subscription = pubsub_v1.types.Subscription(
             name=subscription_path,
             topic=topic_path,
-            retry_policy=client_retry_policy,
+            **fields,
         )
 
         self._client.update_subscription(
             request={"subscription": gcloud_subscription, "update_mask": update_mask}
         )
 
+    def _build_dead_letter_policy(
+        self, subscription: Subscription
+    ) -> DeadLetterPolicy | None:
+        dead_letter_topic = subscription.dead_letter_topic or self._dead_letter_topic
+        max_delivery_attempts = subscription.dead_letter_attempts(
+            self._max_delivery_attempts or DEFAULT_MAX_DELIVERY_ATTEMPTS
+        )
+
+        if not dead_letter_topic or max_delivery_attempts is None:
+            return None
+
+        topic_path = self._client.topic_path(self._gc_project_id, dead_letter_topic)
+        self._create_dead_letter_topic(dead_letter_topic, topic_path)
+
+        return DeadLetterPolicy(
+            dead_letter_topic=topic_path,
+            max_delivery_attempts=max_delivery_attempts,
+        )
+
+    def _create_dead_letter_topic(self, topic: str, topic_path: str) -> None:
+        """Create the dead letter topic with a subscription of the same name, so
+        dead lettered messages are kept until someone looks at them.
+        """
+        if topic in self._dead_letter_topics_created:
+            return
+
+        try:
+            self._create_topic(topic_path)
+            logger.info(f"Dead letter topic {topic_path} created.")
+        except exceptions.AlreadyExists:
+            pass
+
+        try:
+            self._client.create_subscription(
+                request={
+                    "name": self._client.subscription_path(self._gc_project_id, topic),
+                    "topic": topic_path,
+                    "ack_deadline_seconds": self._ack_deadline,
+                }
+            )
+        except exceptions.AlreadyExists:
+            pass
+
+        self._dead_letter_topics_created.add(topic)
+
     def _build_gcloud_retry_policy(
         self, rele_retry_policy: RetryPolicy
     ) -> GCloudRetryPolicy:
@@ -213,8 +361,14 @@ class Subscriber:
         )
 
     def close(self) -> None:
-        """Close the SubscriberClient."""
-        self._client.close()
+        """Close the SubscriberClient.
+
+        The gRPC channel is only closed when no other Relé client shares it.
+        """
+        release_client(self._client)
+        if self._publisher_client is not None:
+            release_client(self._publisher_client)
+            self._publisher_client = None
 
 
 class Publisher:
@@ -236,6 +390,23 @@ class Publisher:
     :param timeout: float, default :ref:`settings_publisher_timeout`
     :param blocking: boolean, default None falls back to
         :ref:`settings_publisher_blocking`
+    :param outbox: obj :class:`~rele.outbox.Outbox`, default None. When given,
+        messages are stored in it and published by a background thread.
+    :param retry_policy: obj :class:`~rele.retry_policy.PublishRetryPolicy`,
+        default None. When given, transient publish errors are retried.
+    :param claim_check: obj :class:`~rele.claim_check.ClaimCheck`, default
+        None. When given, large payloads are offloaded to its blob store.
+    :param compressor: obj :class:`~rele.compression.Compressor`, default
+        None. When given, large payloads are compressed before publishing.
+    :param channel_options: dict :ref:`settings_grpc_channel_options`
+    :param grpc_compression: str :ref:`settings_grpc_compression`
+    :param rate_limit: obj :class:`~rele.rate_limit.PublishRateLimit`, default
+        None. When given, publishes are throttled per topic and in total.
+    :param delayed_store: obj :class:`~rele.outbox.Outbox`, default None. When
+        given, messages delayed longer than ``delayed_store_threshold`` are
+        stored in it until they are due, instead of in memory.
+    :param delayed_store_threshold: float, default
+        :ref:`settings_delayed_store_threshold`
     """
 
     def __init__(
@@ -246,17 +417,43 @@ class Publisher:
         timeout: float,
         client_options: dict[str, Any] | None,
         blocking: bool | None = None,
+        outbox: Outbox | None = None,
+        retry_policy: PublishRetryPolicy | None = None,
+        claim_check: ClaimCheck | None = None,
+        compressor: Compressor | None = None,
+        channel_options: dict[str, Any] | None = None,
+        grpc_compression: str | None = None,
+        rate_limit: PublishRateLimit | None = None,
+        delayed_store: Outbox | None = None,
+        delayed_store_threshold: float = DEFAULT_DELAYED_STORE_THRESHOLD,
     ) -> None:
         self._gc_project_id = gc_project_id
+        self._retry_policy = retry_policy
+        self._rate_limit = rate_limit
+        self._claim_check = claim_check
+        self._compressor = compressor
         self._timeout = timeout
         self._blocking = blocking
         self._encoder = encoder
-        if USE_EMULATOR:
-            self._client = pubsub_v1.PublisherClient()
-        else:
-            self._client = pubsub_v1.PublisherClient(
-                credentials=credentials, client_options=client_options
-            )
+        self._in_flight: set[Any] = set()
+        self._published = 0
+        self._failed = 0
+        self._in_flight_lock = threading.Lock()
+        self._credentials = credentials if not USE_EMULATOR else None
+        self._client = publisher_client(
+            self._credentials,
+            client_options=client_options,
+            channel_options=channel_options,
+            compression=grpc_compression,
+        )
+        self._delay_queue = DelayQueue()
+        self._outbox = outbox
+        if outbox:
+            outbox.start(self)
+        self._delayed_store = delayed_store
+        self._delayed_store_threshold = delayed_store_threshold
+        if delayed_store:
+            delayed_store.start(self)
 
     def publish(
         self,
@@ -265,6 +462,9 @@ class Publisher:
         blocking: bool | None = None,
         timeout: float | None = None,
         raise_exception: bool = True,
+        project: str | None = None,
+        delay: float | None = None,
+        deliver_at: datetime | float | None = None,
         **attrs: Any,
     ) -> Any:
         """Publishes message to Google PubSub topic.
@@ -290,9 +490,36 @@ class Publisher:
         However, it should be noted that using `blocking=True` may incur a
         significant performance hit.
 
+        If the Publisher has a :class:`~rele.retry_policy.PublishRetryPolicy`,
+        transient errors are retried: before returning when blocking, or in the
+        background otherwise, in which case the returned future only resolves
+        once the last attempt is done.
+
+        When the Publisher has an :class:`~rele.outbox.Outbox`, the message is
+        stored in it and this method returns None without waiting on PubSub,
+        regardless of `blocking`.
+
+        When the Publisher has a :class:`~rele.rate_limit.PublishRateLimit`,
+        messages over the limit wait, are sent later in the background, or
+        raise :class:`~rele.rate_limit.RateLimitError`, depending on its
+        mode.
+
+        Messages given a `delay` or a `deliver_at` time are held until they
+        are due, regardless of `blocking`. They are kept in memory and the
+        returned future resolves once they are sent, unless the Publisher has
+        an :class:`~rele.outbox.Outbox`, or a `delayed_store` and the delay is
+        longer than its threshold, in which case they are stored durably and
+        None is returned.
+
+        The topic belongs to the Publisher's project unless `project` is given.
+        Topics of any project are published through the same client, so the
+        credentials of the Publisher must be allowed to publish to them.
+
         In addition, the method adds a timestamp `published_at` to the
         message attrs using `epoch floating point number
-        <https://docs.python.org/3/library/time.html#time.time>`_.
+        <https://docs.python.org/3/library/time.html#time.time>`_. Delayed
+        messages are stamped with the time they are due, so their age and lag
+        are measured from the moment they were meant to be sent.
 
         :param topic: string topic to publish the data.
         :param data: dict with the content of the message.
@@ -302,6 +529,11 @@ class Publisher:
             :ref:`settings_publisher_timeout`
         :param raise_exception: boolean. If True, exceptions coming from
             PubSub will be raised
+        :param project: string Google Cloud Project ID of the topic, default
+            None falls back to the Publisher's project.
+        :param delay: float Seconds to wait before sending the message.
+        :param deliver_at: datetime or epoch float. Time at which the message
+            is sent. Naive datetimes are local time.
         :param attrs: additional string parameters to be published.
         :return: `Future`_
 
@@ -311,24 +543,523 @@ class Publisher:
         if blocking is None:
             blocking = self._blocking
 
-        attrs["published_at"] = str(time.time())
+        due = due_time(delay, deliver_at)
+        attrs["published_at"] = _published_at(due)
         run_middleware_hook("pre_publish", topic, data, attrs)
+        context = self._encode(topic, data, attrs)
+        if due is not None:
+            return self._publish_delayed(topic, context, attrs, project, due)
+
+        throttled = self._throttle(topic, len(context.body), defer=not blocking)
+        if self._outbox:
+            self._outbox.append(topic, context.body, attrs, project=project)
+            return None
+
+        def send() -> Any:
+            return self._publish_payload(topic, context.body, attrs, project=project)
+
+        if not blocking:
+            return self._track(self._publish_with_retry(topic, send, throttled))
+
+        return self._publish_blocking(
+            topic,
+            data,
+            attrs,
+            send,
+            context,
+            timeout or self._timeout,
+            raise_exception,
+        )
+
+    def publish_fanout(
+        self,
+        topics: list[str],
+        data: Any,
+        blocking: bool | None = None,
+        timeout: float | None = None,
+        raise_exception: bool = True,
+        project: str | None = None,
+        delay: float | None = None,
+        deliver_at: datetime | float | None = None,
+        **attrs: Any,
+    ) -> dict[str, Any]:
+        """Publishes the same message to several topics, encoding it once.
+
+        Usage::
+
+            publisher = Publisher()
+            futures = publisher.publish_fanout(
+                ['order-created', 'order-created-analytics'], {'foo': 'bar'}
+            )
+
+        Every topic gets the same `published_at` and runs its own publish
+        hooks, but the data is encoded once, after the `pre_publish` hook of
+        every topic ran. All the messages are sent before waiting for any of
+        them when blocking.
+
+        :param topics: list of topics to publish the data to.
+        :param data: dict with the content of the message.
+        :param blocking: boolean, default None falls back to
+            :ref:`settings_publisher_blocking`
+        :param timeout: float, default None falls back to
+            :ref:`settings_publisher_timeout`
+        :param raise_exception: boolean. If True and blocking, a
+            :class:`~rele.client.FanoutPublishError` is raised once every topic
+            is done if any of them failed.
+        :param project: string Google Cloud Project ID of the topics.
+        :param delay: float Seconds to wait before sending the messages, see
+            :meth:`~rele.client.Publisher.publish`.
+        :param deliver_at: datetime or epoch float. Time at which the messages
+            are sent.
+        :param attrs: additional string parameters to be published.
+        :return: dict with the `Future`_ of every topic, or None for every topic
+            when the Publisher has an :class:`~rele.outbox.Outbox`.
+        """
+        if blocking is None:
+            blocking = self._blocking
+
+        due = due_time(delay, deliver_at)
+        attrs["published_at"] = _published_at(due)
+        attrs_by_topic = {topic: dict(attrs) for topic in topics}
+        for topic, topic_attrs in attrs_by_topic.items():
+            run_middleware_hook("pre_publish", topic, data, topic_attrs)
         payload = json.dumps(data, cls=self._encoder).encode("utf-8")
-        topic_path = self._client.topic_path(self._gc_project_id, topic)
-        future = self._client.publish(topic_path, payload, **attrs)
+        contexts = {
+            topic: self._prepare(topic, payload, topic_attrs)
+            for topic, topic_attrs in attrs_by_topic.items()
+        }
+        if due is not None:
+            return {
+                topic: self._publish_delayed(
+                    topic, context, attrs_by_topic[topic], project, due
+                )
+                for topic, context in contexts.items()
+            }
+
+        delays = {
+            topic: self._throttle(topic, len(context.body), defer=not blocking)
+            for topic, context in contexts.items()
+        }
+        if self._outbox:
+            for topic, context in contexts.items():
+                self._outbox.append(
+                    topic, context.body, attrs_by_topic[topic], project=project
+                )
+            return dict.fromkeys(topics)
+
+        futures_by_topic = {
+            topic: self._track(
+                self._publish_with_retry(
+                    topic,
+                    functools.partial(
+                        self._publish_payload,
+                        topic,
+                        context.body,
+                        attrs_by_topic[topic],
+                        project=project,
+                    ),
+                    delays[topic],
+                )
+            )
+            for topic, context in contexts.items()
+        }
         if not blocking:
+            return futures_by_topic
+
+        errors = self._wait_fanout(
+            futures_by_topic, data, attrs_by_topic, contexts, timeout or self._timeout
+        )
+        if errors and raise_exception:
+            raise FanoutPublishError(errors, futures_by_topic)
+        return futures_by_topic
+
+    def _wait_fanout(
+        self,
+        futures_by_topic: dict[str, Any],
+        data: Any,
+        attrs_by_topic: dict[str, dict[str, Any]],
+        contexts: dict[str, PublishContext],
+        timeout: float,
+    ) -> dict[str, BaseException]:
+        errors: dict[str, BaseException] = {}
+        for topic, future in futures_by_topic.items():
+            try:
+                future.result(timeout=timeout)
+            except Exception as e:
+                errors[topic] = e
+                if self._is_publish_failure(e):
+                    run_middleware_hook(
+                        "post_publish_failure", topic, e, data, context=contexts[topic]
+                    )
+            else:
+                run_middleware_hook(
+                    "post_publish_success",
+                    topic,
+                    data,
+                    attrs_by_topic[topic],
+                    context=contexts[topic],
+                )
+
+                # DEPRECATED
+                run_middleware_hook("post_publish", topic)
+        return errors
+
+    def _encode(self, topic: str, data: Any, attrs: dict[str, Any]) -> PublishContext:
+        payload = json.dumps(data, cls=self._encoder).encode("utf-8")
+        return self._prepare(topic, payload, attrs)
+
+    def _prepare(
+        self, topic: str, payload: bytes, attrs: dict[str, Any]
+    ) -> PublishContext:
+        body = payload
+        if self._compressor:
+            body = self._compressor.compress(topic, body, attrs)
+        if self._claim_check:
+            body = self._claim_check.offload(topic, body, attrs)
+        return PublishContext(payload=payload, body=body)
+
+    def _publish_blocking(
+        self,
+        topic: str,
+        data: Any,
+        attrs: dict[str, Any],
+        send: Callable[[], Any],
+        context: PublishContext,
+        timeout: float,
+        raise_exception: bool,
+    ) -> Any:
+        future = send()
+        attempt = 1
+        while True:
+            try:
+                future.result(timeout=timeout)
+            except Exception as e:
+                if self._retry_policy and self._retry_policy.should_retry(e, attempt):
+                    run_middleware_hook("post_publish_retry", topic, e, attempt)
+                    time.sleep(self._retry_policy.backoff(attempt))
+                    attempt += 1
+                    future = send()
+                    continue
+                if not self._is_publish_failure(e):
+                    raise
+                run_middleware_hook(
+                    "post_publish_failure", topic, e, data, context=context
+                )
+                if raise_exception:
+                    raise e
+            else:
+                run_middleware_hook(
+                    "post_publish_success", topic, data, attrs, context=context
+                )
+
+                # DEPRECATED
+                run_middleware_hook("post_publish", topic)
+
             return future
 
+    def _is_publish_failure(self, exception: BaseException) -> bool:
+        return isinstance(exception, TimeoutError) or bool(
+            self._retry_policy and self._retry_policy.is_retryable(exception)
+        )
+
+    def _throttle(self, topic: str, size: int, defer: bool) -> float:
+        """Apply the rate limit to a message, returning the seconds its send
+        must be deferred.
+        """
+        if not self._rate_limit:
+            return 0.0
+
         try:
-            future.result(timeout=timeout or self._timeout)
-        except TimeoutError as e:
-            run_middleware_hook("post_publish_failure", topic, e, data)
-            if raise_exception:
-                raise e
-        else:
-            run_middleware_hook("post_publish_success", topic, data, attrs)
+            wait = self._rate_limit.acquire(topic, size)
+        except RateLimitError as e:
+            run_middleware_hook("post_publish_throttle", topic, e.retry_after, True)
+            raise
+        if wait <= 0:
+            return 0.0
+
+        run_middleware_hook("post_publish_throttle", topic, wait, False)
+        if defer and self._rate_limit.mode == DEFER and not self._outbox:
+            return wait
+        time.sleep(wait)
+        return 0.0
+
+    def _publish_with_retry(
+        self, topic: str, send: Callable[[], Any], delay: float = 0.0
+    ) -> Any:
+        if delay > 0:
+            return self._publish_later(topic, send, time.time() + delay)
+
+        future = send()
+        if not self._retry_policy:
+            return future
+
+        result = futures.Future()
+        self._retry_when_failed(future, result, topic, send, attempt=1)
+        return result
 
-            # DEPRECATED
-            run_middleware_hook("post_publish", topic)
+    def _publish_delayed(
+        self,
+        topic: str,
+        context: PublishContext,
+        attrs: dict[str, Any],
+        project: str | None,
+        due: float,
+    ) -> Any:
+        store = self._outbox
+        if not store and due - time.time() > self._delayed_store_threshold:
+            store = self._delayed_store
+        if store:
+            store.append(topic, context.body, attrs, project=project, deliver_at=due)
+            return None
+
+        def send() -> Any:
+            return self._publish_payload(topic, context.body, attrs, project=project)
+
+        return self._publish_later(topic, send, due, size=len(context.body))
+
+    def _publish_later(
+        self,
+        topic: str,
+        send: Callable[[], Any],
+        due: float,
+        size: int | None = None,
+    ) -> futures.Future:
+        """Send a message from the delay queue once ``due`` is reached,
+        applying the rate limit then when its ``size`` is given.
+        """
+        result = futures.Future()
+
+        def publish() -> None:
+            try:
+                if size is not None:
+                    self._throttle(topic, size, defer=False)
+                future = self._publish_with_retry(topic, send)
+            except Exception as e:
+                result.set_exception(e)
+                return
+            future.add_done_callback(lambda done: _copy_outcome(done, result))
+
+        def drop() -> None:
+            result.set_exception(
+                RuntimeError(f"Publisher stopped before publishing to {topic}")
+            )
 
+        self._delay_queue.schedule(due, publish, on_drop=drop)
+        return result
+
+    def _retry_when_failed(
+        self,
+        future: Any,
+        result: futures.Future,
+        topic: str,
+        send: Callable[[], Any],
+        attempt: int,
+    ) -> None:
+        assert self._retry_policy is not None
+        retry_policy = self._retry_policy
+
+        def on_done(attempt_future: Any) -> None:
+            exception = attempt_future.exception()
+            if exception is None:
+                result.set_result(attempt_future.result())
+            elif not retry_policy.should_retry(exception, attempt):
+                result.set_exception(exception)
+            else:
+                run_middleware_hook("post_publish_retry", topic, exception, attempt)
+                # The callback runs in the client's batch thread, so the
+                # backoff is waited on a timer instead of sleeping here.
+                timer = threading.Timer(
+                    retry_policy.backoff(attempt),
+                    lambda: self._retry_when_failed(
+                        send(), result, topic, send, attempt + 1
+                    ),
+                )
+                timer.daemon = True
+                timer.start()
+
+        future.add_done_callback(on_done)
+
+    def warmup(self, timeout: float | None = None) -> WarmupResult:
+        """Fetch an access token and connect the gRPC channel, which otherwise
+        happens on the first publish.
+
+        :param timeout: float Maximum seconds to wait for the channel, default
+            None falls back to :ref:`settings_publisher_timeout`
+        :return: :class:`~rele.client.WarmupResult`
+        """
+        start = time.monotonic()
+        credentials = self._credentials
+        if credentials is not None and not credentials.valid:
+            credentials.refresh(google.auth.transport.requests.Request())
+        credentials_done = time.monotonic()
+
+        grpc.channel_ready_future(self._client.transport.grpc_channel).result(
+            timeout=timeout or self._timeout
+        )
+        return WarmupResult(
+            setup_seconds=0.0,
+            credentials_seconds=credentials_done - start,
+            channel_seconds=time.monotonic() - credentials_done,
+        )
+
+    def flush(self, timeout: float | None = None) -> FlushResult:
+        """Wait for the non-blocking publishes that are still in flight.
+
+        Usage::
+
+            publisher.publish('topic_name', {'foo': 'bar'})
+            result = publisher.flush(timeout=10.0)
+            if result.failed or result.pending:
+                ...
+
+        :param timeout: float Maximum seconds to wait, default None waits until
+            every publish is done.
+        :return: :class:`~rele.client.FlushResult` with the outcome of the
+            publishes done since the previous flush.
+        """
+        with self._in_flight_lock:
+            in_flight = list(self._in_flight)
+        wait(in_flight, timeout=timeout)
+
+        with self._in_flight_lock:
+            result = FlushResult(self._published, self._failed, len(self._in_flight))
+            self._published = 0
+            self._failed = 0
+        return result
+
+    def _track(self, future: Any) -> Any:
+        with self._in_flight_lock:
+            self._in_flight.add(future)
+        future.add_done_callback(self._untrack)
         return future
+
+    def _untrack(self, future: Any) -> None:
+        failed = future.cancelled() or future.exception() is not None
+        with self._in_flight_lock:
+            self._in_flight.discard(future)
+            if failed:
+                self._failed += 1
+            else:
+                self._published += 1
+
+    def stop(self) -> None:
+        """Send the pending batches and stop publishing.
+
+        Batches are sent in the background; the Publisher cannot be used
+        afterwards. Messages in the outbox stay there until the next Publisher
+        using it is started, while the delayed messages held in memory are
+        dropped, failing their futures with a RuntimeError.
+        """
+        if self._outbox:
+            self._outbox.stop(timeout=self._timeout)
+        if self._delayed_store:
+            self._delayed_store.stop(timeout=self._timeout)
+        dropped = self._delay_queue.stop()
+        if dropped:
+            logger.warning(f"Dropped {dropped} delayed messages held in memory")
+        self._client.stop()
+
+    def republish(
+        self,
+        topic: str,
+        payload: bytes,
+        attrs: dict[str, Any],
+        timeout: float | None = None,
+    ) -> Any:
+        """Publish a received message as is, without encoding it again nor
+        running the middleware, blocking until PubSub confirms it.
+
+        :param topic: string Topic to move the message to.
+        :param payload: bytes Data of the received message.
+        :param attrs: dict Attributes of the message.
+        :param timeout: float Default None, falls back to
+            :ref:`settings_publisher_timeout`
+        :return: string Message id.
+        """
+
+        def send() -> Any:
+            return self._publish_payload(topic, payload, attrs)
+
+        future = self._publish_with_retry(topic, send)
+        return future.result(timeout=timeout or self._timeout)
+
+    @property
+    def delayed(self) -> int:
+        """Number of delayed messages held in memory until they are due."""
+        return len(self._delay_queue)
+
+    @property
+    def timeout(self) -> float:
+        """Seconds to wait for PubSub to confirm a blocking publish."""
+        return self._timeout
+
+    def prepare(self, topic: str, data: Any, attrs: dict[str, Any]) -> PublishContext:
+        """Encode a message as :meth:`publish` would, compressing or offloading
+        it to the claim-check when configured, so it can be stored and sent
+        later with :meth:`send`.
+
+        :param attrs: dict Attributes of the message. The ones needed to read
+            the body back are added to it.
+        :return: :class:`~rele.middleware.PublishContext`, whose ``body`` is
+            what must be sent.
+        """
+        return self._encode(topic, data, attrs)
+
+    def send(
+        self,
+        topic: str,
+        body: bytes,
+        attrs: dict[str, Any],
+        project: str | None = None,
+        throttle: bool = True,
+    ) -> Any:
+        """Publish a body returned by :meth:`prepare`, waiting for the rate
+        limit and retrying transient errors like :meth:`publish` does. Publish
+        hooks are not run.
+
+        :param throttle: bool Default True, False skips the rate limit for
+            messages it was already applied to.
+        :return: `Future`_ resolved once the last attempt is done.
+        """
+        if throttle:
+            self._throttle(topic, len(body), defer=False)
+
+        def send() -> Any:
+            return self._publish_payload(topic, body, attrs, project=project)
+
+        return self._publish_with_retry(topic, send)
+
+    @property
+    def outbox(self) -> Outbox | None:
+        """The :class:`~rele.outbox.Outbox` messages are stored in before
+        being published, to monitor its backlog.
+        """
+        return self._outbox
+
+    @property
+    def delayed_store(self) -> Outbox | None:
+        """The :class:`~rele.outbox.Outbox` long delayed messages wait in."""
+        return self._delayed_store
+
+    def _publish_payload(
+        self,
+        topic: str,
+        payload: bytes,
+        attrs: dict[str, Any],
+        project: str | None = None,
+    ) -> Any:
+        topic_path = self._client.topic_path(project or self._gc_project_id, topic)
+        return self._client.publish(topic_path, payload, **attrs)
+
+
+def _copy_outcome(source: Any, target: futures.Future) -> None:
+    exception = source.exception()
+    if exception is None:
+        target.set_result(source.result())
+    else:
+        target.set_exception(exception)
+
+
+def _published_at(due: float | None) -> str:
+    now = time.time()
+    return str(now if due is None else max(due, now))
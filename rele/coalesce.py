@@ -0,0 +1,101 @@
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Executor
+from datetime import datetime
+from typing import Any, NamedTuple
+
+from .delayed import DelayQueue
+from .metrics import _timestamp
+
+DEFAULT_COALESCE_WINDOW = 0.5
+
+
+class CoalesceStats(NamedTuple):
+    """Counters of a :class:`Coalescer` since it was created."""
+
+    #: Messages received with a coalescing key.
+    received: int
+    #: Messages acked without processing because a newer one replaced them.
+    coalesced: int
+
+    @property
+    def ratio(self) -> float:
+        """Share of the received messages that were not processed."""
+        return self.coalesced / self.received if self.received else 0.0
+
+
+class Coalescer:
+    """Holds the newest message of each key for ``window`` seconds, so only
+    the latest state of an entity is processed.
+
+    The first message of a key opens its window. Messages of the same key
+    received meanwhile replace it when they were published later, according
+    to their ``published_at`` attribute or else their PubSub publish time, or
+    are dropped otherwise. Once the
+    window closes, the kept message is processed and the dropped ones are
+    skipped.
+
+    :param window: float Seconds messages of a key are held.
+    :param process: Callable receiving the message kept for a key.
+    :param skip: Callable receiving each message that was replaced.
+    :param executor: Executor where kept messages are processed, default
+        None processes them in the thread closing the windows.
+    """
+
+    def __init__(
+        self,
+        window: float,
+        process: Callable[[Any], Any],
+        skip: Callable[[Any], Any],
+        executor: Executor | None = None,
+    ) -> None:
+        self.window = window
+        self._process = process
+        self._skip = skip
+        self._executor = executor
+        self._latest: dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._delay_queue = DelayQueue()
+        self._received = 0
+        self._coalesced = 0
+
+    def add(self, key: str, message: Any) -> None:
+        with self._lock:
+            self._received += 1
+            current = self._latest.get(key)
+            if current is None:
+                self._latest[key] = message
+                self._delay_queue.schedule(
+                    time.time() + self.window, lambda: self._flush(key)
+                )
+                return
+
+            self._coalesced += 1
+            if _published_at(message) >= _published_at(current):
+                self._latest[key] = message
+                replaced = current
+            else:
+                replaced = message
+        self._skip(replaced)
+
+    def _flush(self, key: str) -> None:
+        with self._lock:
+            message = self._latest.pop(key)
+        if self._executor is None:
+            self._process(message)
+        else:
+            self._executor.submit(self._process, message)
+
+    def stats(self) -> CoalesceStats:
+        with self._lock:
+            return CoalesceStats(self._received, self._coalesced)
+
+
+def _published_at(message: Any) -> float:
+    published_at = _timestamp(message.attributes.get("published_at"))
+    if published_at is not None:
+        return published_at
+    # Messages published without rele are ordered by their PubSub publish time.
+    publish_time = message.publish_time
+    return publish_time.timestamp() if isinstance(publish_time, datetime) else 0.0
@@ -0,0 +1,108 @@
+import gzip
+from typing import Any
+
+try:
+    import zstandard
+except ImportError:
+    HAS_ZSTANDARD = False
+else:
+    HAS_ZSTANDARD = True
+
+COMPRESSION_ATTRIBUTE = "rele_compression"
+DEFAULT_COMPRESSION_THRESHOLD = 1024
+GZIP = "gzip"
+ZSTD = "zstd"
+
+
+class Compressor:
+    """Compresses payloads above a size threshold.
+
+    Compressed messages are published with a ``rele_compression`` attribute
+    naming the algorithm, so workers only decompress the messages that need
+    it. Payloads that do not shrink are published as they are.
+
+    ``zstd`` requires the ``zstandard`` package (``pip install rele[zstd]``)
+    and supports dictionaries trained per topic, which help with small,
+    repetitive messages. Workers must be given the same dictionaries.
+
+    Usage::
+
+        RELE = {
+            'COMPRESSOR': Compressor(
+                'zstd', dictionaries={'order-created': ORDER_CREATED_DICT}
+            ),
+        }
+
+    :param algorithm: string ``gzip`` or ``zstd``.
+    :param threshold: int Payload size in bytes above which it is compressed.
+    :param level: int Compression level, defaults to the algorithm's default.
+    :param dictionaries: dict Trained zstd dictionaries, indexed by topic.
+    """
+
+    def __init__(
+        self,
+        algorithm: str = GZIP,
+        threshold: int = DEFAULT_COMPRESSION_THRESHOLD,
+        level: int | None = None,
+        dictionaries: dict[str, bytes] | None = None,
+    ) -> None:
+        if algorithm not in (GZIP, ZSTD):
+            raise ValueError(f"Unsupported compression algorithm: {algorithm}")
+        if algorithm == ZSTD or dictionaries:
+            _check_zstandard()
+        if dictionaries and algorithm != ZSTD:
+            raise ValueError("Dictionaries are only supported by zstd")
+
+        self.algorithm = algorithm
+        self.threshold = threshold
+        self.level = level
+        self._dictionaries = {
+            topic: zstandard.ZstdCompressionDict(dictionary)
+            for topic, dictionary in (dictionaries or {}).items()
+        }
+
+    def compress(self, topic: str, payload: bytes, attrs: dict[str, Any]) -> bytes:
+        """Compress the payload if it is large enough, returning the body."""
+        if len(payload) <= self.threshold:
+            return payload
+
+        if self.algorithm == ZSTD:
+            compressed = bytes(self._zstd_compressor(topic).compress(payload))
+        else:
+            compressed = gzip.compress(
+                payload, compresslevel=9 if self.level is None else self.level
+            )
+        if len(compressed) >= len(payload):
+            return payload
+
+        attrs[COMPRESSION_ATTRIBUTE] = self.algorithm
+        return compressed
+
+    def decompress(self, topic: str, body: bytes, attrs: Any) -> bytes:
+        """Return the payload of a message, decompressing it if needed."""
+        algorithm = attrs.get(COMPRESSION_ATTRIBUTE)
+        if not algorithm:
+            return body
+        if algorithm == GZIP:
+            return gzip.decompress(body)
+        if algorithm == ZSTD:
+            _check_zstandard()
+            dictionary = self._dictionaries.get(topic)
+            decompressor = zstandard.ZstdDecompressor(dict_data=dictionary)
+            return bytes(decompressor.decompress(body))
+        raise ValueError(f"Unsupported compression algorithm: {algorithm}")
+
+    def _zstd_compressor(self, topic: str) -> Any:
+        # zstandard compressors are not thread-safe, so a new one is built for
+        # every message. The dictionaries are prepared once in the constructor.
+        return zstandard.ZstdCompressor(
+            level=3 if self.level is None else self.level,
+            dict_data=self._dictionaries.get(topic),
+        )
+
+
+def _check_zstandard() -> None:
+    if not HAS_ZSTANDARD:
+        raise ImportError(
+            "zstd compression requires the zstandard package: pip install rele[zstd]"
+        )
@@ -1,22 +1,33 @@
+import functools
 import importlib
 import json
+import logging
 import os
 from collections.abc import Callable, Iterable
 from typing import Any, cast
 
 from google.oauth2 import service_account
 
+from .claim_check import ClaimCheck
 from .client import (
     DEFAULT_ACK_DEADLINE,
     DEFAULT_BLOCKING,
     DEFAULT_ENCODER_PATH,
     get_google_defaults,
 )
+from .compression import Compressor
+from .dedup import Deduplicator
+from .delayed import DEFAULT_DELAYED_STORE_THRESHOLD
 from .middleware import default_middleware, register_middleware
-from .publishing import init_global_publisher
-from .retry_policy import RetryPolicy
+from .outbox import DEFAULT_OUTBOX_BATCH_SIZE, DEFAULT_OUTBOX_FLUSH_INTERVAL
+from .publishing import init_global_publisher, warmup
+from .rate_limit import PublishRateLimit
+from .retry_policy import PublishRetryPolicy, RetryPolicy
+from .scheduler import DEFAULT_MAX_PENDING_PER_KEY
 from .subscription import Subscription
 
+logger = logging.getLogger(__name__)
+
 
 class Config:
     """Configuration class.
@@ -30,6 +41,7 @@ class Config:
     """
 
     def __init__(self, setting: dict[str, Any]) -> None:
+        self._setting = setting
         self._gc_project_id: str | None = setting.get("GC_PROJECT_ID")
         self.gc_credentials_path: str | None = setting.get("GC_CREDENTIALS_PATH")
         self.gc_storage_region: str | list[str] | None = setting.get(
@@ -48,32 +60,77 @@ class Config:
         )
         self._encoder_path: str = setting.get("ENCODER_PATH", DEFAULT_ENCODER_PATH)
         self.publisher_timeout: float = setting.get("PUBLISHER_TIMEOUT", 3.0)
+        self.warmup: bool = setting.get("WARMUP", False)
+        self.publisher_retry_policy: PublishRetryPolicy | None = setting.get(
+            "PUBLISHER_RETRY_POLICY"
+        )
+        self.publisher_rate_limit: PublishRateLimit | None = setting.get(
+            "PUBLISHER_RATE_LIMIT"
+        )
         self.threads_per_subscription: int = setting.get("THREADS_PER_SUBSCRIPTION", 2)
+        self.max_pending_per_key: int = setting.get(
+            "MAX_PENDING_PER_KEY", DEFAULT_MAX_PENDING_PER_KEY
+        )
         self.filter_by: Callable[..., bool] | Iterable[Callable[..., bool]] | None = (
             setting.get("FILTER_SUBS_BY")
         )
-        self._credentials: Any = None
         self.retry_policy: RetryPolicy | None = setting.get("DEFAULT_RETRY_POLICY")
+        self.dead_letter_topic: str | None = setting.get("DEFAULT_DEAD_LETTER_TOPIC")
+        self.max_delivery_attempts: int | None = setting.get(
+            "DEFAULT_MAX_DELIVERY_ATTEMPTS"
+        )
         self.client_options: dict[str, Any] | None = setting.get("CLIENT_OPTIONS")
+        self.grpc_channel_options: dict[str, Any] | None = setting.get(
+            "GRPC_CHANNEL_OPTIONS"
+        )
+        self.grpc_compression: str | None = setting.get("GRPC_COMPRESSION")
+        self.publisher_projects: dict[str, dict[str, Any]] = setting.get(
+            "PUBLISHER_PROJECTS", {}
+        )
+        self.claim_check: ClaimCheck | None = setting.get("CLAIM_CHECK")
+        self.compressor: Compressor | None = setting.get("COMPRESSOR")
+        self.deduplicator: Deduplicator | None = setting.get("DEDUPLICATOR")
+        self.outbox_path: str | None = setting.get("OUTBOX_PATH")
+        self.outbox_batch_size: int = setting.get(
+            "OUTBOX_BATCH_SIZE", DEFAULT_OUTBOX_BATCH_SIZE
+        )
+        self.outbox_flush_interval: float = setting.get(
+            "OUTBOX_FLUSH_INTERVAL", DEFAULT_OUTBOX_FLUSH_INTERVAL
+        )
+        self.prometheus_port: int | None = setting.get("PROMETHEUS_PORT")
+        self.delayed_store_path: str | None = setting.get("DELAYED_STORE_PATH")
+        self.delayed_store_threshold: float = setting.get(
+            "DELAYED_STORE_THRESHOLD", DEFAULT_DELAYED_STORE_THRESHOLD
+        )
 
-    @property
+    def for_project(self, project: str) -> "Config":
+        """Return the configuration used to publish to the topics of ``project``,
+        with its :ref:`settings_publisher_projects` overrides applied.
+        """
+        return Config({**self._setting, **self.publisher_projects.get(project, {})})
+
+    @functools.cached_property
     def encoder(self) -> type[json.JSONEncoder]:
         module_name, class_name = self._encoder_path.rsplit(".", 1)
         module = importlib.import_module(module_name)
         return cast(type[json.JSONEncoder], getattr(module, class_name))
 
-    @property
+    @functools.cached_property
     def credentials(self) -> Any:
+        """Credentials loaded on first access.
+
+        Service account files are only read once per process, so the Publisher
+        and the Subscriber share the same credentials, and access token, even
+        when they are built from different Config instances.
+        """
         if self.gc_credentials_path:
-            self._credentials = service_account.Credentials.from_service_account_file(  # type: ignore[no-untyped-call]
-                self.gc_credentials_path
-            )
-        else:
-            credentials, project_id = get_google_defaults()
-            self._credentials = credentials
-            if not self._gc_project_id:
-                self._gc_project_id = project_id
-        return self._credentials
+            return _load_service_account_credentials(self.gc_credentials_path)
+
+        credentials, project_id = get_google_defaults()
+        if not self._gc_project_id:
+            self._gc_project_id = project_id
+        _use_non_blocking_refresh(credentials)
+        return credentials
 
     @property
     def gc_project_id(self) -> str | None:
@@ -88,6 +145,20 @@ class Config:
             return None
 
 
+@functools.cache
+def _load_service_account_credentials(path: str) -> Any:
+    credentials = service_account.Credentials.from_service_account_file(path)  # type: ignore[no-untyped-call]
+    _use_non_blocking_refresh(credentials)
+    return credentials
+
+
+def _use_non_blocking_refresh(credentials: Any) -> None:
+    # Refresh tokens from a background thread before they expire, so a
+    # publish or an ack never waits for one, when google-auth supports it.
+    if hasattr(credentials, "with_non_blocking_refresh"):
+        credentials.with_non_blocking_refresh()
+
+
 def setup(setting: dict[str, Any] | None = None, **kwargs: Any) -> Config:
     if setting is None:
         setting = {}
@@ -95,6 +166,11 @@ def setup(setting: dict[str, Any] | None = None, **kwargs: Any) -> Config:
     config = Config(setting)
     init_global_publisher(config)
     register_middleware(config, **kwargs)
+    if config.warmup:
+        try:
+            warmup()
+        except Exception:
+            logger.warning("Could not warm up the Publisher", exc_info=True)
     return config
 
 
@@ -5,5 +5,16 @@ from .verbose_logging_middleware import VerboseLoggingMiddleware  # noqa
 
 try:
     from .django_db_middleware import DjangoDBMiddleware  # noqa
+    from .django_publish_buffer import DjangoPublishBufferMiddleware  # noqa
+except ImportError:
+    pass
+
+try:
+    from .flask_publish_buffer import FlaskPublishBuffer  # noqa
+except ImportError:
+    pass
+
+try:
+    from .prometheus_middleware import PrometheusMiddleware  # noqa
 except ImportError:
     pass
@@ -0,0 +1 @@
+from .publishing import publish  # noqa
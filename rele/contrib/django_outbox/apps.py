@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+
+class ReleOutboxConfig(AppConfig):
+    name = "rele.contrib.django_outbox"
+    label = "rele_outbox"
+    verbose_name = "Relé outbox"
+    default_auto_field = "django.db.models.BigAutoField"
@@ -0,0 +1,57 @@
+import logging
+from typing import Any
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandParser
+
+from rele import config, publishing
+from rele.contrib.django_outbox.relay import (
+    DEFAULT_RELAY_BATCH_SIZE,
+    relay_batch,
+    run_relay,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Publish the messages stored in the Relé outbox table."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_RELAY_BATCH_SIZE,
+            help="Maximum number of messages published per transaction.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=1.0,
+            help="Seconds to wait once the outbox is drained.",
+        )
+        parser.add_argument(
+            "--database", default=None, help="Database alias of the outbox table."
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Relay a single batch and exit.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        publisher = publishing.init_global_publisher(config.Config(settings.RELE))
+        if options["once"]:
+            published, failed = relay_batch(
+                publisher, options["batch_size"], options["database"]
+            )
+            self.stdout.write(f"Published {published} message(s), {failed} failed.")
+            return
+
+        self.stdout.write("Relaying outbox messages...")
+        run_relay(
+            publisher,
+            batch_size=options["batch_size"],
+            interval=options["interval"],
+            using=options["database"],
+        )
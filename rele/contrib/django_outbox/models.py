@@ -0,0 +1,18 @@
+from django.db import models
+
+
+class OutboxMessage(models.Model):
+    """A message waiting to be published by the ``relayoutbox`` command."""
+
+    topic = models.CharField(max_length=255)
+    payload = models.BinaryField()
+    attributes = models.JSONField(default=dict)
+    project = models.CharField(max_length=255, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        db_table = "rele_outbox_message"
+        ordering = ("id",)
+
+    def __str__(self) -> str:
+        return f"{self.topic} - {self.pk}"
@@ -0,0 +1,47 @@
+import time
+from typing import Any
+
+from rele import publishing
+from rele.middleware import run_middleware_hook
+
+
+def publish(
+    topic: str,
+    data: Any,
+    using: str | None = None,
+    project: str | None = None,
+    **attrs: Any,
+) -> None:
+    """Store a message in the outbox table instead of publishing it.
+
+    The message is written with the current database connection, so it is
+    part of the ongoing transaction: it is discarded if the transaction rolls
+    back and becomes visible to the ``relayoutbox`` command once it commits.
+    Publishing itself happens later, in batches, outside the transaction.
+
+    Usage::
+
+        from django.db import transaction
+        from rele.contrib import django_outbox
+
+        with transaction.atomic():
+            order.save()
+            django_outbox.publish(topic='order-created', data={'id': order.id})
+
+    :param topic: str PubSub topic name
+    :param data: dict-like Data to be sent as the message.
+    :param using: str Database alias to write the message to.
+    :param project: str Google Cloud Project ID of the topic, default None
+        publishes to the project of the relaying Publisher.
+    :param attrs: Any optional key-value pairs that are included as attributes
+        in the message
+    """
+    from .models import OutboxMessage
+
+    attrs["published_at"] = str(time.time())
+    run_middleware_hook("pre_publish", topic, data, attrs)
+    # Compressed or offloaded as it would be by rele.publish.
+    context = publishing.get_publisher(project).prepare(topic, data, attrs)
+    OutboxMessage.objects.using(using).create(
+        topic=topic, payload=context.body, attributes=attrs, project=project
+    )
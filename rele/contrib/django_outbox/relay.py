@@ -0,0 +1,97 @@
+import logging
+import threading
+
+from django.db import transaction
+
+from rele import publishing
+from rele.client import Publisher
+
+from .models import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RELAY_BATCH_SIZE = 500
+
+
+def relay_batch(
+    publisher: Publisher,
+    batch_size: int = DEFAULT_RELAY_BATCH_SIZE,
+    using: str | None = None,
+) -> tuple[int, int]:
+    """Publish one batch of outbox messages and delete the published ones.
+
+    The batch is locked with ``SELECT ... FOR UPDATE SKIP LOCKED`` for the
+    duration of the transaction, so several relays can drain the same table
+    in parallel without publishing a message twice. On databases without row
+    locking (SQLite) a single relay must be run. Messages are sent with
+    :meth:`~rele.client.Publisher.send`, so the rate limit and retry policy
+    of the Publisher apply. Messages stored with a ``project`` are sent with
+    the Publisher :func:`~rele.publishing.get_publisher` returns for it, which
+    has its own credentials when the project is in
+    :ref:`settings_publisher_projects`.
+
+    :return: tuple with the number of published and failed messages.
+    """
+    with transaction.atomic(using=using):
+        messages = list(
+            OutboxMessage.objects.using(using)
+            .select_for_update(skip_locked=True)
+            .order_by("id")[:batch_size]
+        )
+        pending = []
+        for message in messages:
+            try:
+                message_publisher = (
+                    publishing.get_publisher(message.project)
+                    if message.project
+                    else publisher
+                )
+                future = message_publisher.send(
+                    message.topic,
+                    bytes(message.payload),
+                    message.attributes,
+                    project=message.project,
+                )
+            except Exception as e:
+                _log_failure(message, e)
+            else:
+                pending.append((message, future, message_publisher.timeout))
+
+        published_ids = []
+        for message, future, timeout in pending:
+            try:
+                future.result(timeout=timeout)
+            except Exception as e:
+                _log_failure(message, e)
+            else:
+                published_ids.append(message.pk)
+
+        OutboxMessage.objects.using(using).filter(pk__in=published_ids).delete()
+
+    return len(published_ids), len(messages) - len(published_ids)
+
+
+def _log_failure(message: OutboxMessage, exception: Exception) -> None:
+    logger.warning(
+        f"Could not publish outbox message {message.pk} "
+        f"to {message.topic}: {exception.__class__.__name__!s}"
+    )
+
+
+def run_relay(
+    publisher: Publisher,
+    batch_size: int = DEFAULT_RELAY_BATCH_SIZE,
+    interval: float = 1.0,
+    using: str | None = None,
+    stop_event: threading.Event | None = None,
+) -> None:
+    """Relay outbox messages until ``stop_event`` is set.
+
+    Batches are relayed back to back while the table is full, waiting
+    ``interval`` seconds once it is drained or after a failed batch.
+    """
+    stop_event = stop_event or threading.Event()
+    while not stop_event.is_set():
+        published, failed = relay_batch(publisher, batch_size, using)
+        if failed or published < batch_size:
+            stop_event.wait(interval)
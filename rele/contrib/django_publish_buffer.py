@@ -0,0 +1,34 @@
+from collections.abc import Callable
+from typing import Any
+
+from django.db import transaction
+
+from rele import publishing
+
+
+class DjangoPublishBufferMiddleware:
+    """Django request middleware that publishes once the response is ready.
+
+    Every ``rele.publish`` call made while handling the request is buffered
+    and the messages are published together, from a background thread, when
+    the response has been built. If a transaction is still open at that
+    point, publishing waits until it commits and is skipped if it rolls back.
+
+    Add it to Django's ``MIDDLEWARE`` setting (not to ``RELE['MIDDLEWARE']``)::
+
+        MIDDLEWARE = [
+            'rele.contrib.DjangoPublishBufferMiddleware',
+            ...
+        ]
+    """
+
+    def __init__(self, get_response: Callable[[Any], Any]) -> None:
+        self.get_response = get_response
+
+    def __call__(self, request: Any) -> Any:
+        token = publishing.start_buffer()
+        try:
+            return self.get_response(request)
+        finally:
+            messages = publishing.stop_buffer(token)
+            transaction.on_commit(lambda: publishing.publish_buffered(messages))
@@ -0,0 +1,35 @@
+from flask import Flask, g
+
+from rele import publishing
+
+
+class FlaskPublishBuffer:
+    """Flask extension that publishes once the request is done.
+
+    Every ``rele.publish`` call made while handling a request is buffered and
+    the messages are published together, from a background thread, when the
+    request is torn down.
+
+    Usage::
+
+        app = Flask(__name__)
+        FlaskPublishBuffer(app)
+
+    :param app: Flask application, can also be given later to ``init_app``.
+    """
+
+    def __init__(self, app: Flask | None = None) -> None:
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask) -> None:
+        app.before_request(self._start_buffer)
+        app.teardown_request(self._flush_buffer)
+
+    def _start_buffer(self) -> None:
+        g._rele_publish_buffer = publishing.start_buffer()
+
+    def _flush_buffer(self, exception: BaseException | None = None) -> None:
+        token = g.pop("_rele_publish_buffer", None)
+        if token is not None:
+            publishing.flush_buffer(token)
@@ -3,7 +3,9 @@ import logging
 import time
 from typing import TYPE_CHECKING, Any
 
-from rele.middleware import BaseMiddleware
+from google.cloud.pubsub_v1.subscriber.exceptions import AcknowledgeError
+
+from rele.middleware import BaseMiddleware, PublishContext
 
 if TYPE_CHECKING:
     from rele.config import Config
@@ -13,7 +15,9 @@ if TYPE_CHECKING:
 class LoggingMiddleware(BaseMiddleware):
     """Default logging middleware.
 
-    Logging format has been configured for Prometheus.
+    Logging format has been configured for Prometheus, through log scraping.
+    :class:`~rele.contrib.prometheus_middleware.PrometheusMiddleware` keeps the
+    metrics in process instead.
     """
 
     def __init__(self) -> None:
@@ -39,6 +43,9 @@ class LoggingMiddleware(BaseMiddleware):
             "attributes": dict(message.attributes),
         }
 
+        if message.delivery_attempt is not None:
+            result["delivery_attempt"] = message.delivery_attempt
+
         if start_processing_time is not None:
             end_processing_time = time.time()
             result["duration_seconds"] = round(
@@ -60,7 +67,11 @@ class LoggingMiddleware(BaseMiddleware):
         )
 
     def post_publish_success(
-        self, topic: str, data: Any, attrs: dict[str, Any]
+        self,
+        topic: str,
+        data: Any,
+        attrs: dict[str, Any],
+        context: PublishContext | None = None,
     ) -> None:
         self._logger.info(
             f"Successfully published to {topic}",
@@ -74,7 +85,11 @@ class LoggingMiddleware(BaseMiddleware):
         )
 
     def post_publish_failure(
-        self, topic: str, exception: Exception, message: Any
+        self,
+        topic: str,
+        exception: Exception,
+        message: Any,
+        context: PublishContext | None = None,
     ) -> None:
         self._logger.exception(
             f"Exception raised while publishing message "
@@ -85,7 +100,47 @@ class LoggingMiddleware(BaseMiddleware):
                     "name": "publications",
                     "data": {"agent": self._app_name, "topic": topic},
                 },
-                "subscription_message": json.dumps(message, cls=self._encoder),
+                "subscription_message": self._encode(message, context),
+            },
+        )
+
+    def _encode(self, data: Any, context: PublishContext | None) -> str:
+        if context is not None:
+            return context.payload.decode("utf-8")
+        return json.dumps(data, cls=self._encoder)
+
+    def post_publish_retry(
+        self, topic: str, exception: Exception, attempt: int
+    ) -> None:
+        self._logger.warning(
+            f"Retrying publish to {topic} after attempt {attempt} failed: "
+            f"{exception.__class__.__name__!s}",
+            extra={
+                "metrics": {
+                    "name": "publications",
+                    "data": {
+                        "agent": self._app_name,
+                        "topic": topic,
+                        "attempt": attempt,
+                    },
+                },
+            },
+        )
+
+    def post_publish_throttle(self, topic: str, seconds: float, rejected: bool) -> None:
+        action = "Rejected" if rejected else "Delayed"
+        self._logger.debug(
+            f"{action} publish to {topic} by the rate limit ({seconds:.3f}s)",
+            extra={
+                "metrics": {
+                    "name": "publications",
+                    "data": {
+                        "agent": self._app_name,
+                        "topic": topic,
+                        "throttle_seconds": seconds,
+                        "rejected": rejected,
+                    },
+                },
             },
         )
 
@@ -137,5 +192,40 @@ class LoggingMiddleware(BaseMiddleware):
             },
         )
 
+    def post_process_message_skipped(
+        self, subscription: "Subscription", reason: str, message: Any
+    ) -> None:
+        self._logger.debug(
+            f"Skipped {reason} message for {subscription}",
+            extra={
+                "metrics": {
+                    "name": "subscriptions",
+                    "data": {
+                        **self._build_data_metrics(subscription, message, "skipped"),
+                        "reason": reason,
+                    },
+                }
+            },
+        )
+
+    def post_process_message_ack_failure(
+        self,
+        subscription: "Subscription",
+        exception: AcknowledgeError,
+        message: Any,
+    ) -> None:
+        self._logger.warning(
+            f"Ack refused for message processed by {subscription}: "
+            f"{exception.error_code.name}",
+            extra={
+                "metrics": {
+                    "name": "subscriptions",
+                    "data": self._build_data_metrics(
+                        subscription, message, "ack_failed"
+                    ),
+                }
+            },
+        )
+
     def pre_worker_stop(self, subscriptions: list["Subscription"]) -> None:
         self._logger.info(f"Cleaning up {len(subscriptions)} subscription(s)...")
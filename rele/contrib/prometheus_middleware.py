@@ -0,0 +1,282 @@
+import functools
+import threading
+import time
+from collections.abc import Iterator
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    start_http_server,
+)
+from prometheus_client.core import HistogramMetricFamily
+
+from rele.metrics import HistogramSnapshot, lag_stats
+from rele.middleware import BaseMiddleware, PublishContext
+
+if TYPE_CHECKING:
+    from google.cloud.pubsub_v1.subscriber.exceptions import AcknowledgeError
+
+    from rele.config import Config
+    from rele.subscription import Subscription
+
+# Bytes, from a small event to the PubSub limit of 10MB.
+PAYLOAD_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 10485760)
+
+
+class _Metrics(NamedTuple):
+    messages: Counter
+    skipped: Counter
+    ack_failures: Counter
+    duration: Histogram
+    payload_bytes: Histogram
+    in_flight: Gauge
+    published: Counter
+    publish_latency: Histogram
+
+
+class _SubscriptionMetrics(NamedTuple):
+    succeeded: Any
+    failed: Any
+    ack_failures: Any
+    duration: Any
+    payload_bytes: Any
+    in_flight: Any
+
+
+class _TopicMetrics(NamedTuple):
+    succeeded: Any
+    failed: Any
+    latency: Any
+
+
+@functools.cache
+def _build_metrics(registry: CollectorRegistry) -> _Metrics:
+    # Metrics are registered once per registry, however many times the
+    # middleware is set up.
+    registry.register(_LagCollector())
+    return _Metrics(
+        messages=Counter(
+            "rele_messages",
+            "Messages processed by subscription and status.",
+            ["subscription", "status"],
+            registry=registry,
+        ),
+        skipped=Counter(
+            "rele_messages_skipped",
+            "Messages acked without being processed, by reason.",
+            ["subscription", "reason"],
+            registry=registry,
+        ),
+        ack_failures=Counter(
+            "rele_ack_failures",
+            "Acks refused by PubSub on exactly_once subscriptions.",
+            ["subscription"],
+            registry=registry,
+        ),
+        duration=Histogram(
+            "rele_message_duration_seconds",
+            "Time spent processing a message.",
+            ["subscription"],
+            registry=registry,
+        ),
+        payload_bytes=Histogram(
+            "rele_message_payload_bytes",
+            "Size of the messages received.",
+            ["subscription"],
+            buckets=PAYLOAD_BUCKETS,
+            registry=registry,
+        ),
+        in_flight=Gauge(
+            "rele_messages_in_flight",
+            "Messages being processed.",
+            ["subscription"],
+            registry=registry,
+        ),
+        published=Counter(
+            "rele_published_messages",
+            "Messages published by topic and status.",
+            ["topic", "status"],
+            registry=registry,
+        ),
+        publish_latency=Histogram(
+            "rele_publish_latency_seconds",
+            "Time until PubSub confirms a blocking publish.",
+            ["topic"],
+            registry=registry,
+        ),
+    )
+
+
+class _LagCollector:
+    """Exports the lag histograms of :func:`rele.metrics.lag_stats`."""
+
+    def collect(self) -> Iterator[HistogramMetricFamily]:
+        family = HistogramMetricFamily(
+            "rele_subscription_lag_seconds",
+            "Lag of the messages received, by subscription and kind.",
+            labels=["subscription", "kind"],
+        )
+        for name, stats in lag_stats().items():
+            for kind, snapshot in stats._asdict().items():
+                family.add_metric(
+                    [name, kind], _cumulative_buckets(snapshot), snapshot.sum
+                )
+        yield family
+
+
+def _cumulative_buckets(snapshot: HistogramSnapshot) -> list[tuple[str, float]]:
+    buckets = []
+    total = 0
+    bounds = [*map(str, snapshot.buckets), "+Inf"]
+    for bound, count in zip(bounds, snapshot.counts, strict=True):
+        total += count
+        buckets.append((bound, float(total)))
+    return buckets
+
+
+class PrometheusMiddleware(BaseMiddleware):
+    """Keeps Prometheus metrics of the messages published and processed in
+    memory, instead of writing a log record per message.
+
+    The labelled children of each subscription and topic are bound the first
+    time they are seen, so the hooks only update them. When the
+    :ref:`settings_prometheus_port` setting is set, the Worker serves the
+    metrics over HTTP on that port once it starts.
+
+    Requires the ``prometheus-client`` package (``pip install rele[prometheus]``).
+
+    :param registry: obj ``CollectorRegistry`` where metrics are registered,
+        default the global one of ``prometheus_client``.
+    """
+
+    def __init__(self, registry: CollectorRegistry = REGISTRY) -> None:
+        self._registry = registry
+        self._metrics = _build_metrics(registry)
+        self._subscriptions: dict[str, _SubscriptionMetrics] = {}
+        # Skip reasons are open-ended, so their children are bound per reason.
+        self._skipped: dict[tuple[str, str], Any] = {}
+        self._topics: dict[str, _TopicMetrics] = {}
+        self._lock = threading.Lock()
+        # Pre and post process hooks of a message run in the same thread.
+        self._processing = threading.local()
+        self._port: int | None = None
+
+    def setup(self, config: "Config", **kwargs: Any) -> None:
+        self._port = config.prometheus_port
+
+    def _for_subscription(self, subscription: "Subscription") -> _SubscriptionMetrics:
+        children = self._subscriptions.get(subscription.name)
+        if children is None:
+            with self._lock:
+                name = subscription.name
+                metrics = self._metrics
+                children = self._subscriptions.setdefault(
+                    name,
+                    _SubscriptionMetrics(
+                        succeeded=metrics.messages.labels(name, "succeeded"),
+                        failed=metrics.messages.labels(name, "failed"),
+                        ack_failures=metrics.ack_failures.labels(name),
+                        duration=metrics.duration.labels(name),
+                        payload_bytes=metrics.payload_bytes.labels(name),
+                        in_flight=metrics.in_flight.labels(name),
+                    ),
+                )
+        return children
+
+    def _skipped_for(self, subscription: "Subscription", reason: str) -> Any:
+        key = (subscription.name, reason)
+        child = self._skipped.get(key)
+        if child is None:
+            with self._lock:
+                child = self._skipped.setdefault(
+                    key, self._metrics.skipped.labels(*key)
+                )
+        return child
+
+    def _for_topic(self, topic: str) -> _TopicMetrics:
+        children = self._topics.get(topic)
+        if children is None:
+            with self._lock:
+                metrics = self._metrics
+                children = self._topics.setdefault(
+                    topic,
+                    _TopicMetrics(
+                        succeeded=metrics.published.labels(topic, "succeeded"),
+                        failed=metrics.published.labels(topic, "failed"),
+                        latency=metrics.publish_latency.labels(topic),
+                    ),
+                )
+        return children
+
+    def post_publish_success(
+        self,
+        topic: str,
+        data: Any,
+        attrs: dict[str, Any],
+        context: PublishContext | None = None,
+    ) -> None:
+        children = self._for_topic(topic)
+        children.succeeded.inc()
+        if "published_at" in attrs:
+            children.latency.observe(time.time() - float(attrs["published_at"]))
+
+    def post_publish_failure(
+        self,
+        topic: str,
+        exception: Exception,
+        message: Any,
+        context: PublishContext | None = None,
+    ) -> None:
+        self._for_topic(topic).failed.inc()
+
+    def pre_process_message(self, subscription: "Subscription", message: Any) -> None:
+        children = self._for_subscription(subscription)
+        children.in_flight.inc()
+        children.payload_bytes.observe(len(message.data))
+        self._processing.children = children
+
+    def post_process_message(self) -> None:
+        children = getattr(self._processing, "children", None)
+        if children is not None:
+            children.in_flight.dec()
+            self._processing.children = None
+
+    def post_process_message_success(
+        self, subscription: "Subscription", start_time: float, message: Any
+    ) -> None:
+        children = self._for_subscription(subscription)
+        children.succeeded.inc()
+        children.duration.observe(time.time() - start_time)
+
+    def post_process_message_failure(
+        self,
+        subscription: "Subscription",
+        exception: Exception,
+        start_time: float,
+        message: Any,
+    ) -> None:
+        children = self._for_subscription(subscription)
+        children.failed.inc()
+        children.duration.observe(time.time() - start_time)
+
+    def post_process_message_skipped(
+        self, subscription: "Subscription", reason: str, message: Any
+    ) -> None:
+        self._skipped_for(subscription, reason).inc()
+
+    def post_process_message_ack_failure(
+        self,
+        subscription: "Subscription",
+        exception: "AcknowledgeError",
+        message: Any,
+    ) -> None:
+        self._for_subscription(subscription).ack_failures.inc()
+
+    def post_worker_start(self) -> None:
+        if self._port is not None:
+            # Serves from a daemon thread, stopped with the Worker process.
+            start_http_server(self._port, registry=self._registry)
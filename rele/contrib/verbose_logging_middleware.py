@@ -2,6 +2,7 @@ import json
 from typing import TYPE_CHECKING, Any
 
 from rele.contrib.logging_middleware import LoggingMiddleware
+from rele.middleware import PublishContext
 
 if TYPE_CHECKING:
     from rele.config import Config
@@ -14,7 +15,11 @@ class VerboseLoggingMiddleware(LoggingMiddleware):
         self._encoder = config.encoder
 
     def post_publish_success(
-        self, topic: str, message_data: Any, message_attributes: dict[str, Any]
+        self,
+        topic: str,
+        message_data: Any,
+        message_attributes: dict[str, Any],
+        context: PublishContext | None = None,
     ) -> None:
         self._logger.info(
             f"Successfully published to {topic}",
@@ -24,7 +29,7 @@ class VerboseLoggingMiddleware(LoggingMiddleware):
                     "name": "publications",
                     "data": {"agent": self._app_name, "topic": topic},
                 },
-                "subscription_message": json.dumps(message_data, cls=self._encoder),
+                "subscription_message": self._encode(message_data, context),
             },
         )
 
@@ -60,6 +65,7 @@ class _VerboseMessage:
     def __init__(self, message: Any) -> None:
         self._message = message
         self.attributes = message.attributes
+        self.delivery_attempt = message.delivery_attempt
 
     def __repr__(self) -> str:
         message_repr = """\
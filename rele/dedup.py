@@ -0,0 +1,238 @@
+import sqlite3
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, NamedTuple
+
+DEFAULT_DEDUP_TTL = 3600.0
+DEFAULT_DEDUP_MAX_KEYS = 100_000
+
+# Rough size of an OrderedDict entry holding a float, on top of its key.
+_ENTRY_OVERHEAD_BYTES = 100
+
+
+class DedupStore(ABC):
+    """Base class for the stores of processed message keys.
+
+    Subclasses must implement ``contains``, ``add`` and ``__len__``. Keys are
+    made of the subscription name and the message id or idempotency
+    attribute, separated by a slash.
+    """
+
+    @abstractmethod
+    def contains(self, key: str) -> bool: ...
+
+    @abstractmethod
+    def add(self, key: str) -> None: ...
+
+    @abstractmethod
+    def __len__(self) -> int: ...
+
+    @property
+    def memory_bytes(self) -> int:
+        """Approximate memory held by the store in the process."""
+        return 0
+
+
+class MemoryDedupStore(DedupStore):
+    """Keeps the keys in memory, forgetting them after ``ttl`` seconds or,
+    once ``max_keys`` are stored, the least recently seen first.
+
+    Only deduplicates the messages received by the same process.
+
+    :param ttl: float Seconds a key is remembered.
+    :param max_keys: int Maximum number of keys kept, bounding the memory.
+    """
+
+    def __init__(
+        self, ttl: float = DEFAULT_DEDUP_TTL, max_keys: int = DEFAULT_DEDUP_MAX_KEYS
+    ) -> None:
+        self.ttl = ttl
+        self.max_keys = max_keys
+        self._expires_at: OrderedDict[str, float] = OrderedDict()
+        self._key_bytes = 0
+        self._lock = threading.Lock()
+
+    def contains(self, key: str) -> bool:
+        with self._lock:
+            expires_at = self._expires_at.get(key)
+            if expires_at is None:
+                return False
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                return False
+            self._expires_at.move_to_end(key)
+            return True
+
+    def add(self, key: str) -> None:
+        with self._lock:
+            if key not in self._expires_at:
+                self._key_bytes += sys.getsizeof(key)
+            self._expires_at[key] = time.monotonic() + self.ttl
+            self._expires_at.move_to_end(key)
+            while len(self._expires_at) > self.max_keys:
+                self._remove(next(iter(self._expires_at)))
+
+    def _remove(self, key: str) -> None:
+        del self._expires_at[key]
+        self._key_bytes -= sys.getsizeof(key)
+
+    def __len__(self) -> int:
+        return len(self._expires_at)
+
+    @property
+    def memory_bytes(self) -> int:
+        return self._key_bytes + len(self._expires_at) * _ENTRY_OVERHEAD_BYTES
+
+
+class SQLiteDedupStore(DedupStore):
+    """Keeps the keys in a SQLite database for ``ttl`` seconds, so the worker
+    processes of a host sharing the file deduplicate each other's messages.
+
+    Expired keys are deleted every ``purge_interval`` seconds.
+
+    :param path: string Path of the SQLite database file.
+    :param ttl: float Seconds a key is remembered.
+    :param purge_interval: float Seconds between deletions of expired keys.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl: float = DEFAULT_DEDUP_TTL,
+        purge_interval: float = 60.0,
+    ) -> None:
+        self.path = path
+        self.ttl = ttl
+        self.purge_interval = purge_interval
+        self._purged_at = 0.0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS dedup ("
+            "key TEXT PRIMARY KEY, "
+            "expires_at REAL NOT NULL) WITHOUT ROWID"
+        )
+
+    def contains(self, key: str) -> bool:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT 1 FROM dedup WHERE key = ? AND expires_at > ?",
+                (key, time.time()),
+            ).fetchone()
+        return row is not None
+
+    def add(self, key: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO dedup (key, expires_at) VALUES (?, ?)",
+                (key, now + self.ttl),
+            )
+            if now - self._purged_at >= self.purge_interval:
+                self._connection.execute(
+                    "DELETE FROM dedup WHERE expires_at <= ?", (now,)
+                )
+                self._purged_at = now
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._connection.execute(
+                "SELECT COUNT(*) FROM dedup WHERE expires_at > ?", (time.time(),)
+            ).fetchone()
+        return int(count)
+
+
+class DedupStats(NamedTuple):
+    """Counters of a :class:`Deduplicator` since it was created."""
+
+    #: Messages skipped because their key had already been processed.
+    hits: int
+    #: Messages processed because their key was new.
+    misses: int
+    #: Keys currently stored.
+    keys: int
+    #: Approximate memory held by the store in the process.
+    memory_bytes: int
+
+    @property
+    def hit_rate(self) -> float:
+        checked = self.hits + self.misses
+        return self.hits / checked if checked else 0.0
+
+
+class Deduplicator:
+    """Skips the messages of ``deduplicate`` subscriptions that were already
+    processed.
+
+    The key of a message is its message id, or the value of the idempotency
+    attribute named by the subscription's ``deduplicate``. It is only stored
+    once the message has been processed, so a message that fails is retried,
+    and a redelivery of a message still being processed in this process is
+    nacked until the first delivery is done.
+
+    Usage::
+
+        RELE = {
+            'DEDUPLICATOR': Deduplicator(SQLiteDedupStore('/var/lib/rele/dedup.db')),
+        }
+
+    :param store: obj :class:`~rele.dedup.DedupStore`, default a
+        :class:`~rele.dedup.MemoryDedupStore`.
+    """
+
+    DUPLICATE = "duplicate"
+    IN_FLIGHT = "in_flight"
+
+    def __init__(self, store: DedupStore | None = None) -> None:
+        self.store = store if store is not None else MemoryDedupStore()
+        self._in_flight: set[str] = set()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def key(self, subscription_name: str, deduplicate: bool | str, message: Any) -> str:
+        """Key of ``message``, or an empty string when it has no
+        idempotency attribute and cannot be deduplicated.
+        """
+        if deduplicate is True:
+            value = message.message_id
+        else:
+            value = message.attributes.get(deduplicate)
+        return f"{subscription_name}/{value}" if value else ""
+
+    def check(self, key: str) -> str | None:
+        """Start processing the message of ``key``.
+
+        :return: None if it must be processed, :attr:`DUPLICATE` if it was
+            already processed, or :attr:`IN_FLIGHT` if it is being processed.
+        """
+        with self._lock:
+            if key in self._in_flight:
+                return self.IN_FLIGHT
+            if self.store.contains(key):
+                self._hits += 1
+                return self.DUPLICATE
+            self._misses += 1
+            self._in_flight.add(key)
+        return None
+
+    def done(self, key: str, processed: bool) -> None:
+        """Finish processing the message of ``key``, remembering it only when
+        it was ``processed``.
+        """
+        if processed:
+            self.store.add(key)
+        with self._lock:
+            self._in_flight.discard(key)
+
+    def stats(self) -> DedupStats:
+        with self._lock:
+            hits, misses = self._hits, self._misses
+        return DedupStats(hits, misses, len(self.store), self.store.memory_bytes)
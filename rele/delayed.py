@@ -0,0 +1,115 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+from collections.abc import Callable
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DELAYED_STORE_THRESHOLD = 60.0
+
+
+def due_time(
+    delay: float | None = None, deliver_at: datetime | float | None = None
+) -> float | None:
+    """Epoch time at which a delayed message is due, or None if it is not
+    delayed.
+
+    :param delay: float Seconds from now.
+    :param deliver_at: datetime or epoch float. Naive datetimes are local time.
+    """
+    if delay is not None and deliver_at is not None:
+        raise ValueError("Pass either delay or deliver_at, not both")
+    if delay is not None:
+        return time.time() + delay
+    if isinstance(deliver_at, datetime):
+        return deliver_at.timestamp()
+    return deliver_at
+
+
+class DelayQueue:
+    """Runs callbacks when they are due, from a single background thread.
+
+    Pending callbacks are kept in a heap ordered by due time, so scheduling
+    and running them costs O(log n) however many are waiting. They only live
+    in memory: the ones still pending when the process exits are lost.
+    """
+
+    def __init__(self) -> None:
+        self._heap: list[
+            tuple[float, int, Callable[[], None], Callable[[], None] | None]
+        ] = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._thread: threading.Thread | None = None
+        self._stopped = False
+
+    def __len__(self) -> int:
+        with self._condition:
+            return len(self._heap)
+
+    def schedule(
+        self,
+        due: float,
+        callback: Callable[[], None],
+        on_drop: Callable[[], None] | None = None,
+    ) -> None:
+        """Run ``callback`` once the epoch time ``due`` is reached, or
+        ``on_drop`` if the queue is stopped before.
+        """
+        with self._condition:
+            if self._stopped:
+                raise RuntimeError("Cannot schedule on a stopped DelayQueue")
+            # The counter keeps callbacks due at the same time in order.
+            heapq.heappush(self._heap, (due, next(self._counter), callback, on_drop))
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="ReleDelayQueue", daemon=True
+                )
+                self._thread.start()
+            else:
+                # Wake the thread up in case this callback is due first.
+                self._condition.notify()
+
+    def stop(self) -> int:
+        """Stop the background thread, dropping the pending callbacks and
+        running their ``on_drop``.
+
+        :return: int Number of callbacks dropped.
+        """
+        with self._condition:
+            self._stopped = True
+            dropped = self._heap
+            self._heap = []
+            self._condition.notify()
+
+        for _, _, _, on_drop in dropped:
+            if on_drop is None:
+                continue
+            try:
+                on_drop()
+            except Exception:
+                logger.exception("Unexpected error dropping a delayed callback")
+        return len(dropped)
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._stopped:
+                    if not self._heap:
+                        self._condition.wait()
+                        continue
+                    wait = self._heap[0][0] - time.time()
+                    if wait <= 0:
+                        break
+                    self._condition.wait(wait)
+                if self._stopped:
+                    return
+                _, _, callback, _ = heapq.heappop(self._heap)
+
+            try:
+                callback()
+            except Exception:
+                logger.exception("Unexpected error running a delayed callback")
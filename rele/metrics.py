@@ -0,0 +1,164 @@
+import bisect
+import math
+import threading
+from collections.abc import Sequence
+from datetime import datetime
+from typing import Any, NamedTuple
+
+# Seconds, from a few milliseconds to the hour of a large backlog.
+DEFAULT_LAG_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    300.0,
+    900.0,
+    3600.0,
+)
+
+
+class HistogramSnapshot(NamedTuple):
+    """Observations of a :class:`Histogram` at a point in time."""
+
+    #: Upper bounds of the buckets, in increasing order.
+    buckets: tuple[float, ...]
+    #: Observations per bucket, the last one counting those above every bound.
+    counts: tuple[int, ...]
+    #: Number of observations.
+    observations: int
+    #: Sum of the observations.
+    sum: float
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.observations if self.observations else 0.0
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the ``q`` quantile, ``inf`` when
+        it is above every bound, or 0 without observations.
+        """
+        if not self.observations:
+            return 0.0
+        rank = q * self.observations
+        seen = 0
+        # The count above every bound is left out, and reaching it means inf.
+        for bound, count in zip(self.buckets, self.counts, strict=False):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+class Histogram:
+    """Counts observations in fixed buckets, so recording one costs a binary
+    search and keeps no per-observation memory.
+
+    :param buckets: Sequence of increasing upper bounds.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LAG_BUCKETS) -> None:
+        if list(buckets) != sorted(set(buckets)):
+            raise ValueError("buckets must be increasing")
+
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def snapshot(self) -> HistogramSnapshot:
+        with self._lock:
+            counts = tuple(self._counts)
+            total = self._sum
+        return HistogramSnapshot(self.buckets, counts, sum(counts), total)
+
+
+class LagStats(NamedTuple):
+    """Lag observed by a subscription, in seconds."""
+
+    #: From ``published_at`` until the worker started processing the message.
+    end_to_end: HistogramSnapshot
+    #: From the PubSub publish time until the worker started processing it.
+    pubsub: HistogramSnapshot
+    #: From the moment the client received it until it started processing it.
+    queue_time: HistogramSnapshot
+
+
+class SubscriptionLag:
+    """Lag histograms of a subscription, fed by its
+    :class:`~rele.subscription.Callback` with every message received.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LAG_BUCKETS) -> None:
+        self.end_to_end = Histogram(buckets)
+        self.pubsub = Histogram(buckets)
+        self.queue_time = Histogram(buckets)
+
+    def observe(self, message: Any, started_at: float) -> None:
+        published_at = _timestamp(message.attributes.get("published_at"))
+        if published_at is not None:
+            self.end_to_end.observe(started_at - published_at)
+        publish_time = message.publish_time
+        if isinstance(publish_time, datetime):
+            self.pubsub.observe(started_at - publish_time.timestamp())
+        # Set by the PubSub client when the message is pulled.
+        received_at = getattr(message, "_received_timestamp", None)
+        if isinstance(received_at, float):
+            self.queue_time.observe(started_at - received_at)
+
+    def stats(self) -> LagStats:
+        return LagStats(
+            self.end_to_end.snapshot(),
+            self.pubsub.snapshot(),
+            self.queue_time.snapshot(),
+        )
+
+
+def _timestamp(value: Any) -> float | None:
+    """``value`` as a timestamp, None when it is missing or not a number, as
+    the ``published_at`` of messages not published by rele can be.
+    """
+    try:
+        timestamp = float(value)
+    except (TypeError, ValueError):
+        return None
+    return timestamp if math.isfinite(timestamp) else None
+
+
+_lags: dict[str, SubscriptionLag] = {}
+_lags_lock = threading.Lock()
+
+
+def subscription_lag(subscription_name: str) -> SubscriptionLag:
+    """Lag histograms of ``subscription_name``, created on first use."""
+    with _lags_lock:
+        if subscription_name not in _lags:
+            _lags[subscription_name] = SubscriptionLag()
+        return _lags[subscription_name]
+
+
+def lag_stats() -> dict[str, LagStats]:
+    """Lag of every subscription consumed by this process, by name.
+
+    Usage::
+
+        stats = lag_stats()['shop-order-created']
+        stats.end_to_end.quantile(0.99)
+    """
+    with _lags_lock:
+        lags = dict(_lags)
+    return {name: lag.stats() for name, lag in lags.items()}
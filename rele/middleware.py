@@ -1,8 +1,13 @@
+import functools
 import importlib
+import inspect
 import warnings
-from typing import TYPE_CHECKING, Any
+from collections.abc import Callable
+from typing import TYPE_CHECKING, Any, NamedTuple
 
 if TYPE_CHECKING:
+    from google.cloud.pubsub_v1.subscriber.exceptions import AcknowledgeError
+
     from rele.config import Config
     from rele.subscription import Subscription
 
@@ -27,10 +32,45 @@ def register_middleware(config: "Config", **kwargs: Any) -> None:
         _middlewares.append(middleware)
 
 
-def run_middleware_hook(hook_name: str, *args: Any, **kwargs: Any) -> None:
+class PublishContext(NamedTuple):
+    """Encoded message, passed to the publish hooks that accept a ``context``
+    argument so they do not need to encode the data again.
+
+    :param payload: bytes The data encoded as JSON.
+    :param body: bytes The body sent to PubSub. It differs from the payload
+        when the message is compressed or offloaded to a claim-check.
+    """
+
+    payload: bytes
+    body: bytes
+
+    @property
+    def size(self) -> int:
+        """Size in bytes of the encoded data."""
+        return len(self.payload)
+
+
+def run_middleware_hook(
+    hook_name: str, *args: Any, context: PublishContext | None = None, **kwargs: Any
+) -> None:
     for middleware in _middlewares:
         if hook_name not in DEPRECATED_HOOKS or hasattr(middleware, hook_name):
-            getattr(middleware, hook_name)(*args, **kwargs)
+            hook = getattr(middleware, hook_name)
+            if context is not None and _accepts_context(
+                getattr(hook, "__func__", hook)
+            ):
+                hook(*args, context=context, **kwargs)
+            else:
+                hook(*args, **kwargs)
+
+
+@functools.cache
+def _accepts_context(function: Callable[..., Any]) -> bool:
+    # Middleware written before the context existed keep their signature.
+    try:
+        return "context" in inspect.signature(function).parameters
+    except (TypeError, ValueError):
+        return False
 
 
 class WarnDeprecatedHooks(type):
@@ -67,21 +107,50 @@ class BaseMiddleware(metaclass=WarnDeprecatedHooks):
         """
 
     def post_publish_success(
-        self, topic: str, data: Any, attrs: dict[str, Any]
+        self,
+        topic: str,
+        data: Any,
+        attrs: dict[str, Any],
+        context: PublishContext | None = None,
     ) -> None:
         """Called after Publisher succesfully sends message.
         :param topic:
         :param data:
         :param attrs:
+        :param context: :class:`~rele.middleware.PublishContext`, only passed
+            to hooks that declare it.
         """
 
     def post_publish_failure(
-        self, topic: str, exception: Exception, message: Any
+        self,
+        topic: str,
+        exception: Exception,
+        message: Any,
+        context: PublishContext | None = None,
     ) -> None:
         """Called after publishing fails.
         :param topic:
         :param exception:
         :param message:
+        :param context: :class:`~rele.middleware.PublishContext`, only passed
+            to hooks that declare it.
+        """
+
+    def post_publish_retry(
+        self, topic: str, exception: Exception, attempt: int
+    ) -> None:
+        """Called when a publish attempt fails and is going to be retried.
+        :param topic:
+        :param exception:
+        :param attempt: number of the attempt that failed, starting at 1
+        """
+
+    def post_publish_throttle(self, topic: str, seconds: float, rejected: bool) -> None:
+        """Called when a publish goes over the Publisher's rate limit.
+        :param topic:
+        :param seconds: seconds the message waits before it is sent, or would
+            have waited when it is rejected
+        :param rejected: whether the message was rejected instead of delayed
         """
 
     def pre_process_message(self, subscription: "Subscription", message: Any) -> None:
@@ -116,6 +185,28 @@ class BaseMiddleware(metaclass=WarnDeprecatedHooks):
         :param message:
         """
 
+    def post_process_message_skipped(
+        self, subscription: "Subscription", reason: str, message: Any
+    ) -> None:
+        """Called when a message is acked without being processed.
+        :param subscription:
+        :param reason: why it was skipped, e.g. ``duplicate``
+        :param message:
+        """
+
+    def post_process_message_ack_failure(
+        self,
+        subscription: "Subscription",
+        exception: "AcknowledgeError",
+        message: Any,
+    ) -> None:
+        """Called when PubSub refuses the ack of a processed message on an
+        ``exactly_once`` subscription, so the message will be redelivered.
+        :param subscription:
+        :param exception: ``AcknowledgeError`` with the error code
+        :param message:
+        """
+
     def pre_worker_start(self) -> None:
         """Called before the Worker process starts up."""
 
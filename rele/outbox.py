@@ -0,0 +1,278 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+if TYPE_CHECKING:
+    from rele.client import Publisher
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_OUTBOX_BATCH_SIZE = 500
+DEFAULT_OUTBOX_FLUSH_INTERVAL = 1.0
+DEFAULT_OUTBOX_MAX_BACKOFF = 60.0
+DEFAULT_OUTBOX_LEASE = 60.0
+
+
+class OutboxEntry(NamedTuple):
+    id: int
+    topic: str
+    payload: bytes
+    attrs: dict[str, Any]
+    project: str | None
+    deliver_at: float
+
+
+class Outbox:
+    """Durable local store for messages waiting to be published.
+
+    Messages are appended to a SQLite database and published in batches by a
+    background thread, so publishing never waits on Google PubSub and pending
+    messages survive a restart of the process. A message is only removed from
+    the outbox once PubSub has confirmed it; failed batches are retried with
+    an exponential backoff.
+
+    Messages appended with a ``deliver_at`` time are held until it is reached,
+    so an outbox also works as a durable store of delayed messages. Due
+    messages are found through an index, however many are waiting.
+
+    Several processes can share the same file, like the workers of a gunicorn
+    server: each batch is claimed inside an immediate transaction, leasing
+    its messages to one outbox for ``lease`` seconds, so every message is
+    published by a single process. Messages of a process that dies while
+    publishing them are published again once their lease expires.
+
+    Usage::
+
+        outbox = Outbox('/var/lib/myapp/rele-outbox.db')
+        publisher = Publisher(..., outbox=outbox)
+
+    :param path: string Path of the SQLite database file.
+    :param batch_size: int Maximum number of messages published per batch.
+    :param flush_interval: float Seconds to wait when the outbox is empty.
+    :param max_backoff: float Maximum seconds to wait between failed batches.
+    :param lease: float Seconds a claimed batch is reserved to this outbox. It
+        must be longer than the Publisher timeout.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        batch_size: int = DEFAULT_OUTBOX_BATCH_SIZE,
+        flush_interval: float = DEFAULT_OUTBOX_FLUSH_INTERVAL,
+        max_backoff: float = DEFAULT_OUTBOX_MAX_BACKOFF,
+        lease: float = DEFAULT_OUTBOX_LEASE,
+    ) -> None:
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_backoff = max_backoff
+        self.lease = lease
+        self._owner = uuid.uuid4().hex
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._connection = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS outbox ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "topic TEXT NOT NULL, "
+            "payload BLOB NOT NULL, "
+            "attributes TEXT NOT NULL, "
+            "project TEXT, "
+            "deliver_at REAL NOT NULL DEFAULT 0, "
+            "claimed_by TEXT, "
+            "claimed_until REAL NOT NULL DEFAULT 0, "
+            "created_at REAL NOT NULL)"
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS outbox_deliver_at ON outbox (deliver_at, id)"
+        )
+
+    def append(
+        self,
+        topic: str,
+        payload: bytes,
+        attrs: dict[str, Any],
+        project: str | None = None,
+        deliver_at: float | None = None,
+    ) -> None:
+        """Store an encoded message until the background thread publishes it.
+
+        :param deliver_at: float Epoch time before which the message is not
+            published, default None publishes it as soon as possible.
+        """
+        with self._lock:
+            self._connection.execute(
+                "INSERT INTO outbox "
+                "(topic, payload, attributes, project, deliver_at, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    topic,
+                    payload,
+                    json.dumps(attrs),
+                    project,
+                    deliver_at or 0,
+                    time.time(),
+                ),
+            )
+
+    def claim(self, limit: int) -> list[OutboxEntry]:
+        """Lease the messages that are due to this outbox and return them,
+        oldest first. Other outboxes sharing the file skip them until they
+        are deleted, released or the lease expires.
+        """
+        now = time.time()
+        with self._lock:
+            # Taking the write lock first keeps two processes from selecting
+            # the same messages.
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._select_due(limit, now)
+                self._connection.executemany(
+                    "UPDATE outbox SET claimed_by = ?, claimed_until = ? WHERE id = ?",
+                    [(self._owner, now + self.lease, row[0]) for row in rows],
+                )
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+            self._connection.execute("COMMIT")
+        return [_entry(row) for row in rows]
+
+    def _select_due(self, limit: int, now: float) -> list[Any]:
+        return self._connection.execute(
+            "SELECT id, topic, payload, attributes, project, deliver_at "
+            "FROM outbox WHERE deliver_at <= ? AND claimed_until <= ? "
+            "ORDER BY deliver_at, id LIMIT ?",
+            (now, now, limit),
+        ).fetchall()
+
+    def release(self, ids: list[int]) -> None:
+        """Give back claimed messages, so they can be claimed again at once."""
+        with self._lock:
+            self._connection.executemany(
+                "UPDATE outbox SET claimed_by = NULL, claimed_until = 0 "
+                "WHERE id = ? AND claimed_by = ?",
+                [(id, self._owner) for id in ids],
+            )
+
+    def delete(self, ids: list[int]) -> None:
+        with self._lock:
+            self._connection.executemany(
+                "DELETE FROM outbox WHERE id = ?", [(id,) for id in ids]
+            )
+
+    def depth(self) -> int:
+        """Number of messages waiting to be published, including the delayed
+        ones that are not due yet.
+        """
+        with self._lock:
+            (count,) = self._connection.execute(
+                "SELECT COUNT(*) FROM outbox"
+            ).fetchone()
+        return int(count)
+
+    def oldest_age(self) -> float | None:
+        """Seconds the oldest due message has been waiting, if any."""
+        now = time.time()
+        with self._lock:
+            (waiting_since,) = self._connection.execute(
+                "SELECT MIN(MAX(created_at, deliver_at)) FROM outbox "
+                "WHERE deliver_at <= ?",
+                (now,),
+            ).fetchone()
+        return None if waiting_since is None else now - waiting_since
+
+    def flush_once(self, publisher: "Publisher") -> tuple[int, int]:
+        """Publish one batch of pending messages and wait for the results.
+
+        The rate limit of the Publisher was applied to the messages when they
+        were appended, except for the delayed ones, throttled when sent.
+
+        :return: tuple with the number of published and failed messages.
+        """
+        pending, failed_ids = [], []
+        for entry in self.claim(self.batch_size):
+            try:
+                future = publisher.send(
+                    entry.topic,
+                    entry.payload,
+                    entry.attrs,
+                    project=entry.project,
+                    throttle=entry.deliver_at > 0,
+                )
+            except Exception as e:
+                _log_failure(entry, e)
+                failed_ids.append(entry.id)
+            else:
+                pending.append((entry, future))
+
+        published_ids = []
+        for entry, future in pending:
+            try:
+                future.result(timeout=publisher.timeout)
+            except Exception as e:
+                _log_failure(entry, e)
+                failed_ids.append(entry.id)
+            else:
+                published_ids.append(entry.id)
+
+        self.delete(published_ids)
+        self.release(failed_ids)
+        return len(published_ids), len(failed_ids)
+
+    def start(self, publisher: "Publisher") -> None:
+        """Start publishing pending messages in a background thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(publisher,), name="ReleOutbox", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Stop the background thread. Pending messages stay in the outbox."""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self, publisher: "Publisher") -> None:
+        backoff = self.flush_interval
+        while not self._stop_event.is_set():
+            try:
+                published, failed = self.flush_once(publisher)
+            except Exception:
+                logger.exception("Unexpected error while flushing the outbox")
+                published, failed = 0, 1
+
+            if failed:
+                self._stop_event.wait(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+                continue
+
+            backoff = self.flush_interval
+            if published < self.batch_size:
+                self._stop_event.wait(self.flush_interval)
+
+
+def _entry(row: Any) -> OutboxEntry:
+    id, topic, payload, attributes, project, deliver_at = row
+    return OutboxEntry(
+        id, topic, bytes(payload), json.loads(attributes), project, deliver_at
+    )
+
+
+def _log_failure(entry: OutboxEntry, exception: Exception) -> None:
+    logger.warning(
+        f"Could not publish outbox message {entry.id} "
+        f"to {entry.topic}: {exception.__class__.__name__!s}"
+    )
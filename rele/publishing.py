@@ -1,29 +1,74 @@
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from contextvars import ContextVar, Token
 from typing import TYPE_CHECKING, Any
 
 from rele import config, discover
 
-from .client import Publisher
+from .client import FlushResult, Publisher, WarmupResult
+from .outbox import Outbox
 
 if TYPE_CHECKING:
     from rele.config import Config
 
+logger = logging.getLogger(__name__)
+
 _publisher: Publisher | None = None
+_publisher_config: "Config | None" = None
+_project_publishers: dict[tuple[str | None, str], Publisher] = {}
+_project_publishers_lock = threading.Lock()
+
+_BufferedMessage = tuple[str, Any, dict[str, Any]]
+_buffer: ContextVar[list[_BufferedMessage] | None] = ContextVar(
+    "rele_publish_buffer", default=None
+)
+_buffer_executor: ThreadPoolExecutor | None = None
+_last_buffered: "Future[None] | None" = None
 
 
 def init_global_publisher(config: "Config") -> Publisher:
-    global _publisher
+    global _publisher, _publisher_config
+    _publisher_config = config
     if not _publisher:
-        _publisher = Publisher(
-            gc_project_id=config.gc_project_id,
-            credentials=config.credentials,
-            encoder=config.encoder,
-            timeout=config.publisher_timeout,
-            blocking=config.publisher_blocking,
-            client_options=config.client_options,
-        )
+        _publisher = _build_publisher(config)
     return _publisher
 
 
+def _build_publisher(config: "Config") -> Publisher:
+    return Publisher(
+        gc_project_id=config.gc_project_id,
+        credentials=config.credentials,
+        encoder=config.encoder,
+        timeout=config.publisher_timeout,
+        blocking=config.publisher_blocking,
+        client_options=config.client_options,
+        outbox=_build_outbox(config, config.outbox_path),
+        retry_policy=config.publisher_retry_policy,
+        claim_check=config.claim_check,
+        compressor=config.compressor,
+        channel_options=config.grpc_channel_options,
+        grpc_compression=config.grpc_compression,
+        rate_limit=config.publisher_rate_limit,
+        delayed_store=_build_outbox(config, config.delayed_store_path),
+        delayed_store_threshold=config.delayed_store_threshold,
+    )
+
+
+def _build_outbox(config: "Config", path: str | None) -> Outbox | None:
+    if not path:
+        return None
+    return Outbox(
+        path,
+        batch_size=config.outbox_batch_size,
+        flush_interval=config.outbox_flush_interval,
+    )
+
+
 def publish(topic: str, data: Any, **kwargs: Any) -> None:
     """Shortcut method to publishing data to PubSub.
 
@@ -41,15 +86,146 @@ def publish(topic: str, data: Any, **kwargs: Any) -> None:
                          data={'foo': 'bar'},
                          myevent='arrival')
 
+    Inside a request wrapped by a publish buffer (see
+    :meth:`~rele.publishing.start_buffer`), the message is only recorded and
+    published in the background once the request is done.
+
     :param topic: str PubSub topic name
     :param data: dict-like Data to be sent as the message.
     :param timeout: float. Default None, falls back to RELE['PUBLISHER_TIMEOUT'] value
     :param blocking: boolean. Default False
+    :param project: str Google Cloud Project ID of the topic. Default None, falls
+        back to RELE['GC_PROJECT_ID']. See :ref:`settings_publisher_projects`.
     :param kwargs: Any optional key-value pairs that are included as attributes
         in the message
     :return: None
     """
-    if not _publisher:
+    buffer = _buffer.get()
+    if buffer is not None:
+        buffer.append((topic, data, kwargs))
+        return
+
+    get_publisher(kwargs.get("project")).publish(topic, data, **kwargs)
+
+
+def publish_fanout(topics: list[str], data: Any, **kwargs: Any) -> dict[str, Any]:
+    """Shortcut method to publish the same data to several topics.
+
+    The data is encoded once for all of them, see
+    :meth:`~rele.client.Publisher.publish_fanout`.
+
+    Usage::
+
+        import rele
+
+        rele.publish_fanout(
+            topics=['order-created', 'order-created-analytics'],
+            data={'foo': 'bar'},
+        )
+
+    Inside a request wrapped by a publish buffer, a message is recorded for
+    every topic, as if :meth:`~rele.publishing.publish` had been called for
+    each of them.
+
+    :param topics: list of PubSub topic names
+    :param data: dict-like Data to be sent as the message.
+    :param kwargs: see :meth:`~rele.publishing.publish`
+    :return: dict with the result of every topic.
+    """
+    buffer = _buffer.get()
+    if buffer is not None:
+        buffer.extend((topic, data, dict(kwargs)) for topic in topics)
+        return dict.fromkeys(topics)
+
+    return get_publisher(kwargs.get("project")).publish_fanout(topics, data, **kwargs)
+
+
+def flush(timeout: float | None = None) -> FlushResult:
+    """Wait for every message published by the process to be sent.
+
+    Non-blocking publishes return before PubSub confirms the message, so a
+    short-lived process (a management command, a job, a task) may exit
+    before they are sent. Calling ``flush`` once at the end waits for all of
+    them, including the ones held in a publish buffer.
+
+    Usage::
+
+        import rele
+
+        for order in orders:
+            rele.publish(topic='order-updated', data=order)
+        result = rele.flush(timeout=30.0)
+
+    It is also called when the interpreter exits, waiting up to
+    :ref:`settings_publisher_timeout`.
+
+    :param timeout: float Maximum seconds to wait, default None waits until
+        every message is sent.
+    :return: :class:`~rele.client.FlushResult`
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    if _last_buffered is not None:
+        # The buffer executor has a single thread, so every buffered message
+        # has been handed to the Publisher once the last one is.
+        wait([_last_buffered], timeout=timeout)
+
+    published = failed = pending = 0
+    for publisher in _all_publishers():
+        remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+        result = publisher.flush(timeout=remaining)
+        published += result.published
+        failed += result.failed
+        pending += result.pending
+    return FlushResult(published=published, failed=failed, pending=pending)
+
+
+def warmup(timeout: float | None = None) -> WarmupResult:
+    """Get the global Publisher ready to publish without any delay.
+
+    Otherwise the first call to :meth:`~rele.publishing.publish` in a process
+    may discover the settings, set up Relé, fetch an access token and connect
+    to PubSub, adding that time to whatever request it is part of.
+
+    Usage::
+
+        import rele
+
+        result = rele.warmup()
+        logger.info(f'Relé ready in {result.total_seconds:.3f}s')
+
+    It is called by :meth:`~rele.config.setup` when
+    :ref:`settings_warmup` is enabled.
+
+    :param timeout: float Maximum seconds to wait for the connection, default
+        None falls back to :ref:`settings_publisher_timeout`
+    :return: :class:`~rele.client.WarmupResult`
+    """
+    start = time.monotonic()
+    publisher = get_publisher()
+    setup_seconds = time.monotonic() - start
+
+    result = publisher.warmup(timeout=timeout)._replace(setup_seconds=setup_seconds)
+    logger.debug(
+        f"Publisher warmed up in {result.total_seconds:.3f}s",
+        extra={"warmup": result._asdict()},
+    )
+    return result
+
+
+def get_publisher(project: str | None = None) -> Publisher:
+    """Return the global Publisher, setting up Relé from the discovered
+    settings module if it has not been set up yet.
+
+    When ``project`` has its own credentials or client options in
+    :ref:`settings_publisher_projects`, the Publisher for them is returned
+    instead. It is created on first use and shared by every project with the
+    same credentials and client options, so they also share its channel.
+
+    :param project: str Google Cloud Project ID of the topic to publish to.
+    """
+    if not _publisher and _publisher_config:
+        init_global_publisher(_publisher_config)
+    elif not _publisher:
         settings, _ = discover.sub_modules()
         if settings is None or not hasattr(settings, "RELE"):
             raise ValueError("Config setup not called and settings module not found.")
@@ -57,4 +233,140 @@ def publish(topic: str, data: Any, **kwargs: Any) -> None:
         config.setup(settings.RELE)
 
     assert _publisher is not None
-    _publisher.publish(topic, data, **kwargs)
+    if (
+        project is None
+        or _publisher_config is None
+        or project not in _publisher_config.publisher_projects
+    ):
+        return _publisher
+
+    project_config = _publisher_config.for_project(project)
+    key = (
+        project_config.gc_credentials_path,
+        json.dumps(project_config.client_options, sort_keys=True),
+    )
+    with _project_publishers_lock:
+        publisher = _project_publishers.get(key)
+        if publisher is None:
+            for setting in ("outbox_path", "delayed_store_path"):
+                path = getattr(project_config, setting)
+                if path and path == getattr(_publisher_config, setting):
+                    raise ValueError(
+                        f"PUBLISHER_PROJECTS['{project}'] must set its own "
+                        f"{setting.upper()}"
+                    )
+            publisher = _project_publishers[key] = _build_publisher(project_config)
+    return publisher
+
+
+def _all_publishers() -> list[Publisher]:
+    with _project_publishers_lock:
+        publishers = list(_project_publishers.values())
+    return [_publisher, *publishers] if _publisher else publishers
+
+
+def start_buffer() -> Token[list[_BufferedMessage] | None]:
+    """Hold back the messages published from the current context.
+
+    Until :meth:`~rele.publishing.flush_buffer` is called with the returned
+    token, :meth:`~rele.publishing.publish` only records the messages. It is
+    meant to be called at the beginning of a request, see
+    :class:`~rele.contrib.DjangoPublishBufferMiddleware` and
+    :class:`~rele.contrib.FlaskPublishBuffer`.
+
+    :return: token to pass to :meth:`~rele.publishing.flush_buffer`
+    """
+    return _buffer.set([])
+
+
+def flush_buffer(
+    token: Token[list[_BufferedMessage] | None],
+) -> "Future[None] | None":
+    """Stop buffering and publish the buffered messages in the background.
+
+    :param token: token returned by :meth:`~rele.publishing.start_buffer`
+    :return: see :meth:`~rele.publishing.publish_buffered`
+    """
+    return publish_buffered(stop_buffer(token))
+
+
+def stop_buffer(
+    token: Token[list[_BufferedMessage] | None],
+) -> list[_BufferedMessage]:
+    """Stop buffering and return the buffered messages without publishing them.
+
+    :param token: token returned by :meth:`~rele.publishing.start_buffer`
+    """
+    messages = _buffer.get() or []
+    _buffer.reset(token)
+    return messages
+
+
+def publish_buffered(messages: list[_BufferedMessage]) -> "Future[None] | None":
+    """Publish messages returned by :meth:`~rele.publishing.stop_buffer`.
+
+    Messages are encoded and published by a dedicated thread, grouped by topic
+    and keeping their order within each topic, so the caller does not wait for
+    any of it.
+
+    :return: `Future` resolved once every message has been handed to the
+        Publisher, or None if there was nothing to publish.
+    """
+    if not messages:
+        return None
+
+    global _buffer_executor, _last_buffered
+    if _buffer_executor is None:
+        _buffer_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="RelePublishBuffer"
+        )
+    _last_buffered = _buffer_executor.submit(_publish_buffered, messages)
+    return _last_buffered
+
+
+def _publish_buffered(messages: list[_BufferedMessage]) -> None:
+    for topic, data, kwargs in sorted(messages, key=lambda message: message[0]):
+        kwargs["blocking"] = False
+        try:
+            get_publisher(kwargs.get("project")).publish(topic, data, **kwargs)
+        except Exception:
+            logger.exception(f"Could not publish buffered message to {topic}")
+
+
+def _flush_at_exit() -> None:
+    if _publisher is None:
+        return
+
+    result = flush(timeout=_publisher._timeout)
+    if result.failed or result.pending:
+        logger.warning(
+            f"Exiting with {result.failed} failed and {result.pending} pending "
+            "published messages"
+        )
+    delayed = sum(publisher.delayed for publisher in _all_publishers())
+    if delayed:
+        logger.warning(
+            f"Exiting with {delayed} delayed messages held in memory, "
+            "which will not be published"
+        )
+
+
+atexit.register(_flush_at_exit)
+
+
+def _after_fork_in_child() -> None:
+    # The gRPC channel and the threads of the inherited Publishers did not
+    # survive the fork. Forget them, so the child builds its own Publishers the
+    # next time it publishes, while the parent keeps publishing with its own.
+    # The lock may have been held by a thread of the parent when forking.
+    global _publisher, _project_publishers, _project_publishers_lock
+    global _buffer_executor, _last_buffered
+    _publisher = None
+    _project_publishers = {}
+    _project_publishers_lock = threading.Lock()
+    _buffer_executor = None
+    _last_buffered = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
@@ -0,0 +1,219 @@
+import threading
+import time
+from dataclasses import dataclass
+
+BLOCK = "block"
+DEFER = "defer"
+REJECT = "reject"
+
+
+class RateLimitError(Exception):
+    """Raised when a publish goes over a :class:`PublishRateLimit`, either in
+    ``reject`` mode or when the wait would be longer than ``max_wait``.
+
+    :param topic: string Topic of the rejected message.
+    :param retry_after: float Seconds until the message would fit the limit.
+    """
+
+    def __init__(self, topic: str, retry_after: float) -> None:
+        super().__init__(
+            f"Publish rate limit exceeded for {topic}, retry after {retry_after:.3f}s"
+        )
+        self.topic = topic
+        self.retry_after = retry_after
+
+
+@dataclass
+class RateLimit:
+    """A RateLimit caps the messages and bytes published per second.
+
+    Limits are enforced with token buckets holding ``burst`` seconds of
+    traffic, so short spikes are let through while the average stays under
+    the rate. If provided values are wrong, a ValueError is raised.
+
+    :param messages_per_second: float Maximum messages per second, default
+        None does not limit them.
+    :param bytes_per_second: float Maximum bytes per second, measured on the
+        body sent to PubSub, default None does not limit them.
+    :param burst: float Seconds of traffic that can be published at once.
+    """
+
+    messages_per_second: float | None
+    bytes_per_second: float | None
+    burst: float
+
+    def __init__(
+        self,
+        messages_per_second: float | None = None,
+        bytes_per_second: float | None = None,
+        burst: float = 1.0,
+    ) -> None:
+        self._guard_against_wrong_parameters(
+            messages_per_second, bytes_per_second, burst
+        )
+
+        self.messages_per_second = messages_per_second
+        self.bytes_per_second = bytes_per_second
+        self.burst = burst
+
+    def _guard_against_wrong_parameters(
+        self,
+        messages_per_second: float | None,
+        bytes_per_second: float | None,
+        burst: float,
+    ) -> None:
+        if messages_per_second is None and bytes_per_second is None:
+            raise ValueError("messages_per_second or bytes_per_second must be set")
+
+        if messages_per_second is not None and messages_per_second <= 0:
+            raise ValueError("messages_per_second must be greater than 0")
+
+        if bytes_per_second is not None and bytes_per_second <= 0:
+            raise ValueError("bytes_per_second must be greater than 0")
+
+        if burst <= 0:
+            raise ValueError("burst must be greater than 0")
+
+
+class TokenBucket:
+    """Tokens refilled at ``rate`` per second, up to ``capacity``.
+
+    Reservations may leave the bucket in debt: the caller waits until the
+    debt is paid, so concurrent publishers are served in order.
+    """
+
+    def __init__(self, rate: float, capacity: float, now: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until ``amount`` tokens are available."""
+        self._refill(now)
+        # Amounts over the capacity are let through once the bucket is full.
+        missing = min(amount, self.capacity) - self._tokens
+        return max(missing, 0.0) / self.rate
+
+    def reserve(self, amount: float, now: float) -> float:
+        """Take ``amount`` tokens, returning the seconds to wait for them."""
+        self._refill(now)
+        self._tokens -= amount
+        return max(-self._tokens, 0.0) / self.rate
+
+    def _refill(self, now: float) -> None:
+        elapsed = max(now - self._updated_at, 0.0)
+        self._tokens = min(self._tokens + elapsed * self.rate, self.capacity)
+        self._updated_at = now
+
+
+@dataclass
+class PublishRateLimit:
+    """A PublishRateLimit throttles the Publisher per topic and in total.
+
+    Every message must fit both the limit of its topic, when it has one, and
+    the ``total`` limit shared by all topics. What happens to a message over
+    the limit depends on ``mode``:
+
+    - ``block``: ``publish`` sleeps until the message fits.
+    - ``defer``: non-blocking publishes return at once and the message is
+      sent in the background when it fits. Blocking publishes, and
+      publishes stored in an :class:`~rele.outbox.Outbox`, block.
+    - ``reject``: ``publish`` raises :class:`RateLimitError`.
+
+    Usage::
+
+        RELE = {
+            'PUBLISHER_RATE_LIMIT': PublishRateLimit(
+                topics={'order-created': RateLimit(messages_per_second=500)},
+                total=RateLimit(bytes_per_second=10 * 1024 * 1024),
+            ),
+        }
+
+    :param topics: dict :class:`RateLimit` of each limited topic.
+    :param total: :class:`RateLimit` shared by all the topics, default None.
+    :param mode: string ``block``, ``defer`` or ``reject``.
+    :param max_wait: float Longest wait in ``block`` and ``defer`` modes,
+        above which :class:`RateLimitError` is raised instead, default None
+        waits as long as needed.
+    """
+
+    topics: dict[str, RateLimit]
+    total: RateLimit | None
+    mode: str
+    max_wait: float | None
+
+    def __init__(
+        self,
+        topics: dict[str, RateLimit] | None = None,
+        total: RateLimit | None = None,
+        mode: str = BLOCK,
+        max_wait: float | None = None,
+    ) -> None:
+        if mode not in (BLOCK, DEFER, REJECT):
+            raise ValueError(f"Unsupported rate limit mode: {mode}")
+
+        self.topics = topics or {}
+        self.total = total
+        self.mode = mode
+        self.max_wait = max_wait
+        self._buckets: dict[str | None, list[tuple[TokenBucket, bool]]] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, topic: str, size: int) -> float:
+        """Account for a message of ``size`` bytes published to ``topic``.
+
+        :return: float Seconds the message must wait before it is sent.
+        :raises: :class:`RateLimitError` in ``reject`` mode, or when the
+            wait is longer than ``max_wait``.
+        """
+        now = time.monotonic()
+        with self._lock:
+            buckets = self._buckets_for(topic, now) + self._buckets_for(None, now)
+            wait = max(
+                (
+                    bucket.wait_time(size if by_size else 1, now)
+                    for bucket, by_size in buckets
+                ),
+                default=0.0,
+            )
+            if wait > 0 and (
+                self.mode == REJECT
+                or (self.max_wait is not None and wait > self.max_wait)
+            ):
+                raise RateLimitError(topic, wait)
+
+            wait = max(
+                (
+                    bucket.reserve(size if by_size else 1, now)
+                    for bucket, by_size in buckets
+                ),
+                default=0.0,
+            )
+        # A message over the capacity of a bucket leaves it in debt, which
+        # rejects the next ones instead of delaying this one.
+        return 0.0 if self.mode == REJECT else wait
+
+    def _buckets_for(
+        self, topic: str | None, now: float
+    ) -> list[tuple[TokenBucket, bool]]:
+        if topic not in self._buckets:
+            limit = self.total if topic is None else self.topics.get(topic)
+            self._buckets[topic] = _build_buckets(limit, now)
+        return self._buckets[topic]
+
+
+def _build_buckets(
+    limit: RateLimit | None, now: float
+) -> list[tuple[TokenBucket, bool]]:
+    # Each bucket is paired with whether it counts bytes instead of messages.
+    if limit is None:
+        return []
+    buckets = []
+    if limit.messages_per_second:
+        rate = limit.messages_per_second
+        buckets.append((TokenBucket(rate, max(rate * limit.burst, 1.0), now), False))
+    if limit.bytes_per_second:
+        rate = limit.bytes_per_second
+        buckets.append((TokenBucket(rate, rate * limit.burst, now), True))
+    return buckets
@@ -1,5 +1,9 @@
+import random
+from collections.abc import Iterable
 from dataclasses import dataclass
 
+from google.api_core import exceptions
+
 
 @dataclass
 class RetryPolicy:
@@ -32,3 +36,160 @@ class RetryPolicy:
 
         if minimum_backoff > maximum_backoff:
             raise ValueError("minimum_backoff should be less than maximum_backoff.")
+
+
+DEFAULT_RETRYABLE_EXCEPTIONS: tuple[type[Exception], ...] = (
+    exceptions.ServiceUnavailable,
+    exceptions.DeadlineExceeded,
+    exceptions.ResourceExhausted,
+)
+
+
+@dataclass
+class PublishRetryPolicy:
+    """A PublishRetryPolicy defines how the Publisher retries failed publishes.
+
+    Only the exceptions in ``retryable_exceptions`` are retried, waiting an
+    exponentially growing backoff between attempts. If provided values are
+    wrong, a ValueError is raised.
+
+    Usage::
+
+        RELE = {
+            'PUBLISHER_RETRY_POLICY': PublishRetryPolicy(max_attempts=5),
+        }
+
+    :param max_attempts: int Total number of attempts, including the first one.
+    :param initial_backoff: float Seconds to wait before the first retry.
+    :param maximum_backoff: float Maximum seconds to wait between attempts.
+    :param multiplier: float Growth factor of the backoff after each attempt.
+    :param jitter: bool If True, wait a random time between 0 and the backoff.
+    :param retryable_exceptions: tuple Exception classes worth retrying.
+        Defaults to ServiceUnavailable, DeadlineExceeded and ResourceExhausted.
+    """
+
+    max_attempts: int
+    initial_backoff: float
+    maximum_backoff: float
+    multiplier: float
+    jitter: bool
+    retryable_exceptions: tuple[type[Exception], ...]
+
+    def __init__(
+        self,
+        max_attempts: int = 5,
+        initial_backoff: float = 0.1,
+        maximum_backoff: float = 10.0,
+        multiplier: float = 2.0,
+        jitter: bool = True,
+        retryable_exceptions: tuple[type[Exception], ...] = (
+            DEFAULT_RETRYABLE_EXCEPTIONS
+        ),
+    ) -> None:
+        self._guard_against_wrong_parameters(
+            max_attempts, initial_backoff, maximum_backoff, multiplier
+        )
+
+        self.max_attempts = max_attempts
+        self.initial_backoff = initial_backoff
+        self.maximum_backoff = maximum_backoff
+        self.multiplier = multiplier
+        self.jitter = jitter
+        self.retryable_exceptions = retryable_exceptions
+
+    def _guard_against_wrong_parameters(
+        self,
+        max_attempts: int,
+        initial_backoff: float,
+        maximum_backoff: float,
+        multiplier: float,
+    ) -> None:
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be greater than 0")
+
+        if initial_backoff < 0:
+            raise ValueError("initial_backoff must not be negative")
+
+        if initial_backoff > maximum_backoff:
+            raise ValueError("initial_backoff should be less than maximum_backoff.")
+
+        if multiplier < 1:
+            raise ValueError("multiplier must be greater or equal than 1")
+
+    def is_retryable(self, exception: BaseException) -> bool:
+        return isinstance(exception, self.retryable_exceptions)
+
+    def should_retry(self, exception: BaseException, attempt: int) -> bool:
+        """Whether a publish that failed on its ``attempt`` try is retried."""
+        return attempt < self.max_attempts and self.is_retryable(exception)
+
+    def backoff(self, attempt: int) -> float:
+        """Seconds to wait after the ``attempt`` try failed."""
+        backoff = min(
+            self.initial_backoff * self.multiplier ** (attempt - 1),
+            self.maximum_backoff,
+        )
+        return random.uniform(0, backoff) if self.jitter else backoff
+
+
+RETRY_ATTEMPT_ATTRIBUTE = "rele_retry_attempt"
+RETRY_DUE_ATTRIBUTE = "rele_retry_due"
+
+# PubSub does not accept a retry policy backoff longer than 10 minutes.
+MAXIMUM_SUBSCRIPTION_BACKOFF = 600
+
+
+@dataclass
+class RetryTopics:
+    """A RetryTopics policy moves failed messages out of their subscription.
+
+    When the handler fails, the message is republished to the retry topic of
+    its attempt and acked, so it no longer holds a lease on the subscription
+    nor competes with fresh traffic. Each delay gets its own retry topic and
+    subscription, consumed by the same handler once the delay has passed.
+    Messages failing on the last retry topic stay there, redelivered by
+    PubSub until they are dead lettered, if the subscription has a dead letter
+    topic. If provided values are wrong, a ValueError is raised.
+
+    Usage::
+
+        @sub(topic='order-created', retry_topics=RetryTopics(delays=(10, 60, 600)))
+        def sub_process_order(data, **kwargs):
+            pass
+
+    :param delays: tuple Seconds to wait before each retry, one retry topic per
+        delay. Retry topics are named after the subscription and the delay,
+        e.g. ``shop-order-created-retry-60s``.
+    """
+
+    delays: tuple[int, ...]
+
+    def __init__(self, delays: Iterable[int] = (10, 60, 600)) -> None:
+        delays = tuple(delays)
+        self._guard_against_wrong_parameters(delays)
+
+        self.delays = delays
+
+    def _guard_against_wrong_parameters(self, delays: tuple[int, ...]) -> None:
+        if not delays:
+            raise ValueError("delays must have at least one delay")
+
+        if any(not isinstance(delay, int) or delay <= 0 for delay in delays):
+            raise ValueError("delays must be integers greater than 0")
+
+        if len(set(delays)) != len(delays):
+            raise ValueError("delays must not be repeated")
+
+    def topic(self, subscription_name: str, attempt: int) -> str:
+        """Name of the retry topic of ``attempt``, starting at 0."""
+        return f"{subscription_name}-retry-{self.delays[attempt]}s"
+
+    def subscription_retry_policy(self, attempt: int) -> RetryPolicy:
+        """Redelivery backoff of the retry subscription of ``attempt``.
+
+        Messages received before their delay has passed are nacked, so
+        PubSub redelivers them once the delay is over, or every 10 minutes
+        for longer delays.
+        """
+        backoff = min(self.delays[attempt], MAXIMUM_SUBSCRIPTION_BACKOFF)
+        return RetryPolicy(backoff, backoff)
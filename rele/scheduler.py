@@ -0,0 +1,130 @@
+import threading
+import warnings
+from collections import deque
+from collections.abc import Callable
+from concurrent import futures
+from typing import Any
+
+from google.cloud.pubsub_v1.subscriber.scheduler import ThreadScheduler
+
+DEFAULT_MAX_PENDING_PER_KEY = 100
+
+KeyFunc = Callable[[Any], str | None]
+_Task = tuple[Callable[..., Any], tuple[Any, ...], dict[str, Any]]
+
+
+class KeyAffinityScheduler(ThreadScheduler):
+    """A thread pool-based scheduler that keeps messages with the same key in
+    sequence.
+
+    Every message is routed to a lane using ``key_func``. Messages that share
+    a lane are processed one at a time and in the order they were received,
+    while different lanes run in parallel using every thread of the executor.
+    Messages without a key are not serialized at all.
+
+    Each lane holds at most ``max_pending_per_key`` messages waiting to be
+    processed. Messages arriving at a full lane are nacked, so PubSub
+    redelivers them later. Scheduling never blocks, since the PubSub client
+    calls it while holding the lock its dispatcher needs to process acks.
+    The total of messages held is bounded by the subscriber's flow control.
+
+    :param executor: ``ThreadPoolExecutor`` shared by all the lanes.
+    :param key_func: Function receiving a message and returning its lane key.
+    :param max_pending_per_key: int Maximum number of queued messages per lane.
+    """
+
+    def __init__(
+        self,
+        executor: futures.ThreadPoolExecutor,
+        key_func: KeyFunc,
+        max_pending_per_key: int = DEFAULT_MAX_PENDING_PER_KEY,
+    ) -> None:
+        super().__init__(executor=executor)
+        self._key_func = key_func
+        self._max_pending_per_key = max_pending_per_key
+        # A key is present while its lane has a callback running; the deque
+        # holds the callbacks waiting for it to finish.
+        self._lanes: dict[str, deque[_Task]] = {}
+        self._condition = threading.Condition()
+        self._is_shutdown = False
+
+    def schedule(self, callback: Callable[..., Any], *args: Any, **kwargs: Any) -> None:
+        key = self._key_func(args[0]) if args else None
+        if not key:
+            super().schedule(callback, *args, **kwargs)
+            return
+
+        overflow = False
+        with self._condition:
+            lane = self._lanes.get(key)
+            if lane is None:
+                self._lanes[key] = deque()
+            elif self._is_shutdown:
+                warnings.warn(
+                    "Scheduling a callback after scheduler shutdown.",
+                    category=RuntimeWarning,
+                    stacklevel=2,
+                )
+                return
+            elif len(lane) >= self._max_pending_per_key:
+                overflow = True
+            else:
+                lane.append((callback, args, kwargs))
+                return
+
+        if overflow:
+            args[0].nack()
+            return
+
+        self._submit(key, (callback, args, kwargs))
+
+    def shutdown(self, await_msg_callbacks: bool = False) -> list[Any]:
+        dropped_messages: list[Any] = []
+        with self._condition:
+            self._is_shutdown = True
+            for lane in self._lanes.values():
+                dropped_messages.extend(args[0] for _, args, _ in lane)
+                lane.clear()
+            self._condition.notify_all()
+
+        dropped_messages.extend(super().shutdown(await_msg_callbacks))
+        return dropped_messages
+
+    def _submit(self, key: str, task: _Task) -> None:
+        callback, args, kwargs = task
+        try:
+            # The message stays as the first positional argument so that
+            # ThreadScheduler.shutdown can report it when it is dropped.
+            self._executor.submit(
+                self._run, *args, lane_key=key, callback=callback, kwargs=kwargs
+            )
+        except RuntimeError:
+            self._release(key)
+            warnings.warn(
+                "Scheduling a callback after executor shutdown.",
+                category=RuntimeWarning,
+                stacklevel=2,
+            )
+
+    def _run(
+        self,
+        *args: Any,
+        lane_key: str,
+        callback: Callable[..., Any],
+        kwargs: dict[str, Any],
+    ) -> None:
+        try:
+            callback(*args, **kwargs)
+        finally:
+            self._release(lane_key)
+
+    def _release(self, key: str) -> None:
+        with self._condition:
+            lane = self._lanes[key]
+            if not lane or self._is_shutdown:
+                del self._lanes[key]
+                return
+            task = lane.popleft()
+            self._condition.notify_all()
+
+        self._submit(key, task)
@@ -1,17 +1,38 @@
 import json
 import logging
+import math
+import threading
 import time
 from collections.abc import Callable, Iterable
+from concurrent.futures import Executor
 from inspect import getfullargspec, getmodule
 from typing import Any
 
+from google.cloud.pubsub_v1.subscriber.exceptions import AcknowledgeError
+
+from .claim_check import CLAIM_CHECK_ATTRIBUTE, ClaimCheck
+from .coalesce import DEFAULT_COALESCE_WINDOW, Coalescer
+from .compression import Compressor
+from .dedup import Deduplicator
+from .metrics import SubscriptionLag, subscription_lag
 from .middleware import run_middleware_hook
-from .retry_policy import RetryPolicy
+from .retry_policy import (
+    MAXIMUM_SUBSCRIPTION_BACKOFF,
+    RETRY_ATTEMPT_ATTRIBUTE,
+    RETRY_DUE_ATTRIBUTE,
+    RetryPolicy,
+    RetryTopics,
+)
 
 FilterBy = Callable[..., bool]
+SerializeBy = str | Callable[[dict[str, str]], str | None]
 
 logger = logging.getLogger(__name__)
 
+# PubSub only accepts between 5 and 100 delivery attempts.
+MIN_DELIVERY_ATTEMPTS = 5
+MAX_DELIVERY_ATTEMPTS = 100
+
 
 class Subscription:
     """The Subscription class
@@ -47,8 +68,25 @@ class Subscription:
         filter_by: FilterBy | Iterable[FilterBy] | None = None,
         backend_filter_by: str | None = None,
         retry_policy: RetryPolicy | None = None,
+        serialize_by: SerializeBy | None = None,
+        retry_topics: RetryTopics | None = None,
+        dead_letter_topic: str | None = None,
+        max_delivery_attempts: int | None = None,
+        exactly_once: bool = False,
+        deduplicate: bool | str = False,
+        coalesce_by: str | None = None,
+        window: float = DEFAULT_COALESCE_WINDOW,
+        max_age: float | None = None,
     ) -> None:
         self._validate_filter_by(filter_by)
+        self._validate_max_delivery_attempts(max_delivery_attempts)
+        if window <= 0:
+            raise ValueError("window must be greater than 0")
+        # Coalesced messages are processed outside the lanes of serialize_by.
+        if coalesce_by and serialize_by:
+            raise ValueError("coalesce_by cannot be combined with serialize_by")
+        if max_age is not None and max_age <= 0:
+            raise ValueError("max_age must be greater than 0")
 
         self._func = func
         self.topic = topic
@@ -57,6 +95,18 @@ class Subscription:
         self._filters = self._init_filters(filter_by)
         self.backend_filter_by = backend_filter_by
         self.retry_policy = retry_policy
+        self.serialize_by = serialize_by
+        self.retry_topics = retry_topics
+        self.dead_letter_topic = dead_letter_topic
+        self.max_delivery_attempts = max_delivery_attempts
+        self.exactly_once = exactly_once
+        self.deduplicate = deduplicate
+        self.coalesce_by = coalesce_by
+        self.window = window
+        self.max_age = max_age
+        self._retry_of: Subscription | None = None
+        self._retry_attempt = 0
+        self._retry_subscriptions: list[Subscription] | None = None
 
     def _validate_filter_by(
         self, filter_by: FilterBy | Iterable[FilterBy] | None
@@ -70,6 +120,17 @@ class Subscription:
         ):
             raise ValueError("Filter_by must be a callable or a list of callables.")
 
+    def _validate_max_delivery_attempts(
+        self, max_delivery_attempts: int | None
+    ) -> None:
+        if max_delivery_attempts is not None and not (
+            MIN_DELIVERY_ATTEMPTS <= max_delivery_attempts <= MAX_DELIVERY_ATTEMPTS
+        ):
+            raise ValueError(
+                f"max_delivery_attempts must be between {MIN_DELIVERY_ATTEMPTS} "
+                f"and {MAX_DELIVERY_ATTEMPTS}."
+            )
+
     def _init_filters(
         self, filter_by: FilterBy | Iterable[FilterBy] | None
     ) -> Iterable[FilterBy] | None:
@@ -91,6 +152,7 @@ class Subscription:
 
     def set_prefix(self, prefix: str) -> None:
         self._prefix = prefix
+        self._retry_subscriptions = None
 
     @property
     def filter_by(self) -> Iterable[FilterBy] | None:
@@ -99,6 +161,93 @@ class Subscription:
     def set_filters(self, filter_by: FilterBy | Iterable[FilterBy]) -> None:
         self._filters = self._init_filters(filter_by)
 
+    @property
+    def retry_of(self) -> "Subscription | None":
+        """The subscription whose failed messages this retry subscription
+        consumes, None if it is not a retry subscription.
+        """
+        return self._retry_of
+
+    @property
+    def retry_subscriptions(self) -> list["Subscription"]:
+        """Subscriptions to the retry topics of ``retry_topics``, processing
+        the messages with the same handler.
+        """
+        if self._retry_subscriptions is None:
+            self._retry_subscriptions = []
+            # Retry subscriptions move their failures to the next retry topic
+            # of the subscription they retry instead of having their own.
+            if self.retry_topics and self._retry_of is None:
+                self._retry_subscriptions = [
+                    self._build_retry_subscription(attempt)
+                    for attempt in range(len(self.retry_topics.delays))
+                ]
+        return self._retry_subscriptions
+
+    def _build_retry_subscription(self, attempt: int) -> "Subscription":
+        assert self.retry_topics is not None
+        retry_subscription = Subscription(
+            func=self._func,
+            topic=self.retry_topics.topic(self.name, attempt),
+            filter_by=self._filters,
+            retry_policy=self.retry_topics.subscription_retry_policy(attempt),
+            serialize_by=self.serialize_by,
+            retry_topics=self.retry_topics,
+            dead_letter_topic=self.dead_letter_topic,
+            max_delivery_attempts=self.max_delivery_attempts,
+            exactly_once=self.exactly_once,
+            deduplicate=self.deduplicate,
+            coalesce_by=self.coalesce_by,
+            window=self.window,
+            max_age=self.max_age,
+        )
+        retry_subscription._retry_of = self
+        retry_subscription._retry_attempt = attempt
+        return retry_subscription
+
+    def dead_letter_attempts(self, default: int) -> int | None:
+        """Deliveries of a message before it is dead lettered, None when this
+        subscription must not dead letter.
+
+        Retry subscriptions nack the messages that are not due yet, and every
+        nack counts as a delivery. Failures of all but the last retry topic
+        are moved to the next one, so only the last one dead letters, once
+        the message has had the deliveries needed to wait for its delay.
+        """
+        attempts = self.max_delivery_attempts or default
+        if self._retry_of is None or self.retry_topics is None:
+            return attempts
+
+        delays = self.retry_topics.delays
+        if self._retry_attempt < len(delays) - 1:
+            return None
+
+        waits = math.ceil(delays[self._retry_attempt] / MAXIMUM_SUBSCRIPTION_BACKOFF)
+        return min(max(attempts, waits + 2), MAX_DELIVERY_ATTEMPTS)
+
+    def retry_topic(self, attempt: int) -> str | None:
+        """Retry topic a message failing on its ``attempt`` retry is moved to,
+        None when there are no retries left.
+        """
+        if not self.retry_topics or attempt >= len(self.retry_topics.delays):
+            return None
+        origin = self._retry_of or self
+        return self.retry_topics.topic(origin.name, attempt)
+
+    def lane_key(self, message: Any) -> str | None:
+        """Key of the lane the message is processed in when ``serialize_by``
+        is set. Falls back to the message ordering key.
+        """
+        attributes = dict(message.attributes)
+        if callable(self.serialize_by):
+            key = self.serialize_by(attributes)
+        elif self.serialize_by:
+            key = attributes.get(self.serialize_by)
+        else:
+            key = None
+
+        return key or message.ordering_key or None
+
     def __call__(self, data: Any, **kwargs: Any) -> Any:
         if "published_at" in kwargs:
             kwargs["published_at"] = float(kwargs["published_at"])
@@ -119,18 +268,124 @@ class Subscription:
 
 
 class Callback:
-    def __init__(self, subscription: Subscription, suffix: str | None = None) -> None:
+    def __init__(
+        self,
+        subscription: Subscription,
+        suffix: str | None = None,
+        claim_check: ClaimCheck | None = None,
+        compressor: Compressor | None = None,
+        deduplicator: Deduplicator | None = None,
+        executor: Executor | None = None,
+    ) -> None:
         self._subscription = subscription
         self._suffix = suffix
+        self._claim_check = claim_check
+        # Compressed messages are decompressed even when no compressor is set.
+        self._compressor = compressor or Compressor()
+        self._deduplicator = deduplicator or Deduplicator()
+        self._stale_messages = 0
+        self._lag = subscription_lag(subscription.name)
+        self._lock = threading.Lock()
+        self._coalescer: Coalescer | None = None
+        if subscription.coalesce_by:
+            self._coalescer = Coalescer(
+                subscription.window,
+                process=self._handle,
+                skip=lambda message: self._skip(message, "coalesced"),
+                executor=executor,
+            )
+
+    @property
+    def coalescer(self) -> Coalescer | None:
+        """The :class:`~rele.coalesce.Coalescer` of subscriptions with
+        ``coalesce_by``, giving access to its stats.
+        """
+        return self._coalescer
+
+    @property
+    def stale_messages(self) -> int:
+        """Messages older than the subscription's ``max_age`` that were acked
+        without processing.
+        """
+        return self._stale_messages
+
+    @property
+    def lag(self) -> SubscriptionLag:
+        """Lag histograms of the subscription, also available through
+        :func:`rele.metrics.lag_stats`.
+        """
+        return self._lag
 
     def __call__(self, message: Any) -> Any:
+        started_at = time.time()
+        if self._is_not_due(message):
+            # PubSub redelivers it after the backoff of the retry subscription.
+            message.nack()
+            return
+
+        self._lag.observe(message, started_at)
+
+        if self._is_stale(message):
+            with self._lock:
+                self._stale_messages += 1
+            self._skip(message, "stale")
+            return
+
+        if self._coalescer:
+            key = message.attributes.get(self._subscription.coalesce_by)
+            if key:
+                self._coalescer.add(key, message)
+                return
+
+        return self._handle(message)
+
+    def _skip(self, message: Any, reason: str) -> None:
+        self._ack(message)
+        run_middleware_hook(
+            "post_process_message_skipped", self._subscription, reason, message
+        )
+
+    def _handle(self, message: Any) -> Any:
+        key = self._dedup_key(message)
+        if not key:
+            return self._process(message)[0]
+
+        status = self._deduplicator.check(key)
+        if status == Deduplicator.IN_FLIGHT:
+            # Redelivered once the first delivery is done, to be skipped then.
+            message.nack()
+            return
+        if status == Deduplicator.DUPLICATE:
+            self._skip(message, status)
+            return
+
+        handled = False
+        try:
+            res, handled = self._process(message)
+            return res
+        finally:
+            self._deduplicator.done(key, handled)
+
+    def _dedup_key(self, message: Any) -> str:
+        if not self._subscription.deduplicate:
+            return ""
+        origin = self._subscription.retry_of or self._subscription
+        return self._deduplicator.key(
+            origin.name, self._subscription.deduplicate, message
+        )
+
+    def _process(self, message: Any) -> tuple[Any, bool]:
+        """Run the subscription on the message.
+
+        :return: tuple with the result of the subscription and whether the
+            message was handled, i.e. it must not be processed again.
+        """
         run_middleware_hook("pre_process_message", self._subscription, message)
         start_time = time.time()
 
         try:
-            data = json.loads(message.data.decode("utf-8"))
-        except json.JSONDecodeError as e:
-            message.ack()
+            payload = self._load_payload(message)
+        except Exception as e:
             run_middleware_hook(
                 "post_process_message_failure",
                 self._subscription,
@@ -139,11 +394,12 @@ class Callback:
                 message,
             )
             run_middleware_hook("post_process_message")
-            return
+            return None, False
 
         try:
-            res = self._subscription(data, **dict(message.attributes))
-        except Exception as e:
+            data = json.loads(payload.decode("utf-8"))
+        except json.JSONDecodeError as e:
+            self._ack(message)
             run_middleware_hook(
                 "post_process_message_failure",
                 self._subscription,
@@ -151,18 +407,112 @@ class Callback:
                 start_time,
                 message,
             )
-        else:
-            message.ack()
+            run_middleware_hook("post_process_message")
+            return None, True
+
+        kwargs = dict(message.attributes)
+        # Only set by PubSub when the subscription has a dead letter policy.
+        if message.delivery_attempt is not None:
+            kwargs["delivery_attempt"] = message.delivery_attempt
+
+        try:
+            res = self._subscription(data, **kwargs)
+        except Exception as e:
             run_middleware_hook(
-                "post_process_message_success",
+                "post_process_message_failure",
                 self._subscription,
+                e,
                 start_time,
                 message,
             )
-            return res
+            self._retry_later(message)
+            return None, False
+        else:
+            if self._ack(message):
+                run_middleware_hook(
+                    "post_process_message_success",
+                    self._subscription,
+                    start_time,
+                    message,
+                )
+            return res, True
         finally:
             run_middleware_hook("post_process_message")
 
+    def _ack(self, message: Any) -> bool:
+        """Ack the message, waiting for PubSub to confirm it on
+        ``exactly_once`` subscriptions.
+
+        :return: bool False when PubSub refused the ack.
+        """
+        if not self._subscription.exactly_once:
+            message.ack()
+            return True
+
+        try:
+            message.ack_with_response().result()
+        except AcknowledgeError as e:
+            run_middleware_hook(
+                "post_process_message_ack_failure", self._subscription, e, message
+            )
+            return False
+        return True
+
+    def _load_payload(self, message: Any) -> bytes:
+        payload = bytes(message.data)
+        if self._claim_check:
+            payload = self._claim_check.fetch(payload, message.attributes)
+        elif CLAIM_CHECK_ATTRIBUTE in message.attributes:
+            # Left unacked, so a worker with CLAIM_CHECK set can process it.
+            raise ValueError(
+                "Message payload is in a claim check, but CLAIM_CHECK is not set"
+            )
+        # Retried messages keep the compression of the topic they came from.
+        origin = self._subscription.retry_of or self._subscription
+        return self._compressor.decompress(origin.topic, payload, message.attributes)
+
+    def _is_not_due(self, message: Any) -> bool:
+        if self._subscription.retry_of is None:
+            return False
+        due = message.attributes.get(RETRY_DUE_ATTRIBUTE)
+        return due is not None and float(due) > time.time()
+
+    def _is_stale(self, message: Any) -> bool:
+        if self._subscription.max_age is None:
+            return False
+        try:
+            published_at = float(message.attributes.get("published_at"))
+        except (TypeError, ValueError):
+            # Messages published without rele only have the PubSub timestamp.
+            published_at = message.publish_time.timestamp()
+        return time.time() - published_at > self._subscription.max_age
+
+    def _retry_later(self, message: Any) -> None:
+        """Move a failed message to its next retry topic and ack it. Messages
+        without retries left are not acked, so PubSub redelivers them.
+        """
+        attempt = int(message.attributes.get(RETRY_ATTEMPT_ATTRIBUTE, 0))
+        topic = self._subscription.retry_topic(attempt)
+        if topic is None:
+            return
+
+        # Imported here since the publishing module imports this one.
+        from .publishing import get_publisher
+
+        assert self._subscription.retry_topics is not None
+        delay = self._subscription.retry_topics.delays[attempt]
+        attrs = {
+            **message.attributes,
+            RETRY_ATTEMPT_ATTRIBUTE: str(attempt + 1),
+            RETRY_DUE_ATTRIBUTE: str(time.time() + delay),
+        }
+        try:
+            get_publisher().republish(topic, bytes(message.data), attrs)
+        except Exception:
+            logger.exception(f"Could not move the failed message to {topic}")
+            return
+        self._ack(message)
+
 
 def sub(
     topic: str,
@@ -171,6 +521,15 @@ def sub(
     filter_by: FilterBy | Iterable[FilterBy] | None = None,
     backend_filter_by: str | None = None,
     retry_policy: RetryPolicy | None = None,
+    serialize_by: SerializeBy | None = None,
+    retry_topics: RetryTopics | None = None,
+    dead_letter_topic: str | None = None,
+    max_delivery_attempts: int | None = None,
+    exactly_once: bool = False,
+    deduplicate: bool | str = False,
+    coalesce_by: str | None = None,
+    window: float = DEFAULT_COALESCE_WINDOW,
+    max_age: float | None = None,
 ) -> Callable[[Callable[..., Any]], Subscription]:
     """Decorator function that makes declaring a PubSub Subscription simple.
 
@@ -207,6 +566,14 @@ def sub(
         def sub_process_landscape_photos(data, **kwargs):
             pass
 
+        @sub(topic='order-updated', serialize_by='order_id')
+        def sub_process_order(data, **kwargs):
+            pass
+
+        @sub(topic='price-updated', coalesce_by='product_id', window=0.5)
+        def sub_update_price(data, **kwargs):
+            pass
+
     :param topic: string The topic that is being subscribed to.
     :param prefix: string An optional prefix to the subscription name.
                    Useful to namespace your subscription with your project name
@@ -217,6 +584,40 @@ def sub(
                       functions that filters the messages to be processed by
                       the sub regarding their attributes.
     :param retry_policy: obj :class:`~rele.retry_policy.RetryPolicy`
+    :param serialize_by: Union[string, function] An optional attribute name, or
+                         function receiving the message attributes, whose value
+                         groups messages that must be processed one at a time.
+                         Messages without it fall back to their ordering key.
+                         Different groups are still processed in parallel.
+    :param retry_topics: obj :class:`~rele.retry_policy.RetryTopics` An optional
+                         policy moving failed messages to retry topics with
+                         growing delays, instead of redelivering them here.
+    :param dead_letter_topic: string An optional topic where PubSub forwards the
+                              messages that could not be processed after
+                              ``max_delivery_attempts``. It is created with a
+                              subscription of the same name if missing.
+                              Defaults to :ref:`settings_default_dead_letter_topic`.
+    :param max_delivery_attempts: int Deliveries before a message is dead
+                                  lettered, between 5 and 100. Defaults to
+                                  :ref:`settings_default_max_delivery_attempts`.
+    :param exactly_once: bool If True, the subscription is created with exactly-once
+                         delivery and acks wait for PubSub to confirm them, so
+                         a processed message is not redelivered unless its ack
+                         fails. Lowers throughput and adds latency to every ack.
+    :param deduplicate: Union[bool, string] If True, messages already processed
+                        by the subscription are acked and skipped, keyed on their
+                        message id. A string names the idempotency attribute to
+                        key on instead. See :class:`~rele.dedup.Deduplicator`.
+    :param coalesce_by: string An optional attribute name identifying the entity
+                        a message is the state of. Messages sharing its value
+                        are held for ``window`` seconds and only the latest
+                        published is processed; the rest are acked. Cannot be
+                        combined with ``serialize_by``.
+    :param window: float Seconds messages are held when ``coalesce_by`` is set.
+    :param max_age: float Optional seconds since a message was published after
+                    which it is acked without being processed. Useful when
+                    freshness matters more than completeness, to recover fast
+                    from a backlog.
     :return: :class:`~rele.subscription.Subscription`
     """
 
@@ -245,6 +646,15 @@ def sub(
             filter_by=filter_by,
             backend_filter_by=backend_filter_by,
             retry_policy=retry_policy,
+            serialize_by=serialize_by,
+            retry_topics=retry_topics,
+            dead_letter_topic=dead_letter_topic,
+            max_delivery_attempts=max_delivery_attempts,
+            exactly_once=exactly_once,
+            deduplicate=deduplicate,
+            coalesce_by=coalesce_by,
+            window=window,
+            max_age=max_age,
         )
 
     return decorator
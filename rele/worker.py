@@ -12,9 +12,13 @@ from typing import TYPE_CHECKING, Any, NoReturn
 from google.cloud.pubsub_v1.futures import Future
 from google.cloud.pubsub_v1.subscriber.scheduler import ThreadScheduler
 
+from .claim_check import ClaimCheck
 from .client import Subscriber
+from .compression import Compressor
+from .dedup import Deduplicator
 from .middleware import run_middleware_hook
 from .retry_policy import RetryPolicy
+from .scheduler import DEFAULT_MAX_PENDING_PER_KEY, KeyAffinityScheduler
 from .subscription import Callback, Subscription
 
 if TYPE_CHECKING:
@@ -50,7 +54,29 @@ class Worker:
     Facilitates the creation of subscriptions if not already created,
     and the starting and stopping the consumption of them.
 
+    Subscriptions declaring ``serialize_by`` are consumed with a
+    :class:`~rele.scheduler.KeyAffinityScheduler`, so messages sharing a key
+    run one at a time while the rest keep using every thread.
+
+    Subscriptions declaring ``retry_topics`` also consume their retry
+    subscriptions, each with its own thread pool.
+
     :param subscriptions: list :class:`~rele.subscription.Subscription`
+    :param max_pending_per_key: int Messages queued per key before the next
+        ones are nacked. Only used when ``serialize_by`` is set.
+    :param claim_check: obj :class:`~rele.claim_check.ClaimCheck` used to fetch
+        offloaded payloads.
+    :param compressor: obj :class:`~rele.compression.Compressor` used to
+        decompress payloads.
+    :param channel_options: dict :ref:`settings_grpc_channel_options`
+    :param grpc_compression: str :ref:`settings_grpc_compression`
+    :param default_dead_letter_topic: str
+        :ref:`settings_default_dead_letter_topic`
+    :param default_max_delivery_attempts: int
+        :ref:`settings_default_max_delivery_attempts`
+    :param deduplicator: obj :class:`~rele.dedup.Deduplicator` shared by the
+        subscriptions declaring ``deduplicate``, default one keeping the keys
+        in memory.
     """
 
     def __init__(
@@ -63,6 +89,14 @@ class Worker:
         default_ack_deadline: int | None = None,
         threads_per_subscription: int | None = None,
         default_retry_policy: RetryPolicy | None = None,
+        max_pending_per_key: int = DEFAULT_MAX_PENDING_PER_KEY,
+        claim_check: ClaimCheck | None = None,
+        compressor: Compressor | None = None,
+        channel_options: dict[str, Any] | None = None,
+        grpc_compression: str | None = None,
+        default_dead_letter_topic: str | None = None,
+        default_max_delivery_attempts: int | None = None,
+        deduplicator: Deduplicator | None = None,
     ) -> None:
         self._subscriber = Subscriber(
             gc_project_id,
@@ -71,10 +105,18 @@ class Worker:
             client_options,
             default_ack_deadline,
             default_retry_policy,
+            channel_options=channel_options,
+            grpc_compression=grpc_compression,
+            default_dead_letter_topic=default_dead_letter_topic,
+            default_max_delivery_attempts=default_max_delivery_attempts,
         )
         self._futures: dict[Subscription, Future] = {}
         self._subscriptions = subscriptions
         self.threads_per_subscription = threads_per_subscription
+        self.max_pending_per_key = max_pending_per_key
+        self._claim_check = claim_check
+        self._compressor = compressor
+        self._deduplicator = deduplicator or Deduplicator()
         self.internet_check_endpoint = self._get_internet_check_endpoint(client_options)
 
     def _get_internet_check_endpoint(
@@ -112,6 +154,10 @@ class Worker:
         run_middleware_hook("pre_worker_start")
         for subscription in self._subscriptions:
             self._boostrap_consumption(subscription)
+            # Retries get their own streams and threads, so they never hold
+            # back fresh messages.
+            for retry_subscription in subscription.retry_subscriptions:
+                self._boostrap_consumption(retry_subscription)
         run_middleware_hook("post_worker_start")
         logger.debug("[start] end start")
 
@@ -191,11 +237,25 @@ class Worker:
             max_workers=self.threads_per_subscription,
             thread_name_prefix="ThreadPoolExecutor-ThreadScheduler",
         )
-        scheduler = ThreadScheduler(executor=executor)
+        scheduler: ThreadScheduler
+        if subscription.serialize_by:
+            scheduler = KeyAffinityScheduler(
+                executor=executor,
+                key_func=subscription.lane_key,
+                max_pending_per_key=self.max_pending_per_key,
+            )
+        else:
+            scheduler = ThreadScheduler(executor=executor)
 
         self._futures[subscription] = self._subscriber.consume(
             subscription_name=subscription.name,
-            callback=Callback(subscription),
+            callback=Callback(
+                subscription,
+                claim_check=self._claim_check,
+                compressor=self._compressor,
+                deduplicator=self._deduplicator,
+                executor=executor,
+            ),
             scheduler=scheduler,
         )
         logger.debug(
@@ -267,6 +327,14 @@ def create_and_run(subs: list[Subscription], config: "Config") -> None:
         config.ack_deadline,
         config.threads_per_subscription,
         config.retry_policy,
+        max_pending_per_key=config.max_pending_per_key,
+        claim_check=config.claim_check,
+        compressor=config.compressor,
+        channel_options=config.grpc_channel_options,
+        grpc_compression=config.grpc_compression,
+        default_dead_letter_topic=config.dead_letter_topic,
+        default_max_delivery_attempts=config.max_delivery_attempts,
+        deduplicator=config.deduplicator,
     )
 
     # to allow killing runrele worker via ctrl+c
@@ -26,6 +26,14 @@ class TestRunReleCommand:
             60,
             2,
             None,
+            max_pending_per_key=100,
+            claim_check=None,
+            compressor=None,
+            channel_options=None,
+            grpc_compression=None,
+            default_dead_letter_topic=None,
+            default_max_delivery_attempts=None,
+            deduplicator=None,
         )
         mock_worker.return_value.run_forever.assert_called_once_with()
 
@@ -50,5 +58,13 @@ class TestRunReleCommand:
             60,
             2,
             None,
+            max_pending_per_key=100,
+            claim_check=None,
+            compressor=None,
+            channel_options=None,
+            grpc_compression=None,
+            default_dead_letter_topic=None,
+            default_max_delivery_attempts=None,
+            deduplicator=None,
         )
         mock_worker.return_value.run_forever.assert_called_once_with()
@@ -0,0 +1,198 @@
+import gzip
+from concurrent.futures import Future, TimeoutError
+from unittest.mock import patch
+
+import pytest
+from django.core.management import call_command
+from django.db import transaction
+from google.api_core.exceptions import ServiceUnavailable
+
+from rele import publishing
+from rele.client import Publisher
+from rele.compression import COMPRESSION_ATTRIBUTE, Compressor
+from rele.config import Config
+from rele.contrib import django_outbox
+from rele.contrib.django_outbox.models import OutboxMessage
+from rele.contrib.django_outbox.relay import relay_batch
+from rele.retry_policy import PublishRetryPolicy
+
+
+def resolved_future():
+    future = Future()
+    future.set_result("message-id")
+    return future
+
+
+def failed_future(exception=None):
+    future = Future()
+    future.set_exception(exception or TimeoutError())
+    return future
+
+
+@pytest.fixture(autouse=True)
+def global_publisher(publisher):
+    original_publisher = publishing._publisher
+    publishing._publisher = publisher
+    yield publisher
+    publishing._publisher = original_publisher
+
+
+@pytest.fixture
+def project_publisher(config):
+    project_publisher = Publisher(
+        gc_project_id="rele-pt",
+        credentials=config.credentials,
+        encoder=config.encoder,
+        timeout=config.publisher_timeout,
+        blocking=config.publisher_blocking,
+        client_options={"api_endpoint": "pubsub.pt"},
+        compressor=Compressor(threshold=10),
+    )
+    original_config = publishing._publisher_config
+    publishing._publisher_config = Config(
+        {
+            "GC_CREDENTIALS_PATH": "tests/dummy-pub-sub-credentials.json",
+            "PUBLISHER_PROJECTS": {
+                "rele-pt": {"CLIENT_OPTIONS": {"api_endpoint": "pubsub.pt"}}
+            },
+        }
+    )
+    with patch("rele.publishing.Publisher", return_value=project_publisher):
+        yield project_publisher
+    publishing._publisher_config = original_config
+    publishing._project_publishers.clear()
+
+
+@pytest.fixture
+def payload_publisher(publisher):
+    with patch.object(publisher, "_publish_payload") as mock:
+        mock.side_effect = lambda *args, **kwargs: resolved_future()
+        yield mock
+
+
+@pytest.mark.django_db(transaction=True)
+class TestPublish:
+    def test_stores_the_encoded_message(self, published_at, time_mock):
+        django_outbox.publish("order-created", {"id": 1}, lang="es")
+
+        message = OutboxMessage.objects.get()
+        assert message.topic == "order-created"
+        assert bytes(message.payload) == b'{"id": 1}'
+        assert message.attributes == {
+            "lang": "es",
+            "published_at": str(published_at),
+        }
+
+    def test_compresses_the_message_like_the_publisher(self, publisher):
+        publisher._compressor = Compressor(threshold=10)
+
+        django_outbox.publish("order-created", {"id": "a" * 100})
+
+        message = OutboxMessage.objects.get()
+        assert message.attributes[COMPRESSION_ATTRIBUTE] == "gzip"
+        assert gzip.decompress(message.payload) == b'{"id": "' + b"a" * 100 + b'"}'
+
+    def test_prepares_the_message_with_the_publisher_of_its_project(
+        self, project_publisher
+    ):
+        django_outbox.publish("order-created", {"id": "a" * 100}, project="rele-pt")
+
+        message = OutboxMessage.objects.get()
+        assert message.attributes[COMPRESSION_ATTRIBUTE] == "gzip"
+
+    def test_discards_the_message_when_the_transaction_rolls_back(self):
+        with pytest.raises(ValueError), transaction.atomic():
+            django_outbox.publish("order-created", {"id": 1})
+            raise ValueError("rollback")
+
+        assert not OutboxMessage.objects.exists()
+
+    def test_does_not_publish_to_pubsub(self, publisher):
+        with transaction.atomic():
+            django_outbox.publish("order-created", {"id": 1})
+
+        publisher._client.publish.assert_not_called()
+
+
+@pytest.mark.django_db(transaction=True)
+class TestRelay:
+    def test_publishes_and_deletes_a_batch(self, publisher, payload_publisher):
+        for i in range(3):
+            django_outbox.publish("order-created", {"id": i})
+
+        assert relay_batch(publisher, batch_size=2) == (2, 0)
+
+        assert payload_publisher.call_count == 2
+        topic, payload, attrs = payload_publisher.call_args_list[0].args
+        assert topic == "order-created"
+        assert payload == b'{"id": 0}'
+        assert "published_at" in attrs
+        assert OutboxMessage.objects.count() == 1
+
+    def test_keeps_the_messages_that_failed(self, publisher, payload_publisher):
+        django_outbox.publish("order-created", {"id": 1})
+        django_outbox.publish("order-created", {"id": 2})
+        payload_publisher.side_effect = [resolved_future(), failed_future()]
+
+        assert relay_batch(publisher) == (1, 1)
+
+        assert bytes(OutboxMessage.objects.get().payload) == b'{"id": 2}'
+
+    def test_publishes_to_the_project_of_the_message(
+        self, publisher, payload_publisher
+    ):
+        django_outbox.publish("order-created", {"id": 1}, project="rele-pt")
+
+        relay_batch(publisher)
+
+        assert payload_publisher.call_args.kwargs == {"project": "rele-pt"}
+
+    def test_sends_with_the_publisher_of_the_project(
+        self, publisher, payload_publisher, project_publisher
+    ):
+        django_outbox.publish("order-created", {"id": 1}, project="rele-pt")
+        django_outbox.publish("order-created", {"id": 2})
+
+        with patch.object(project_publisher, "_publish_payload") as project_payload:
+            project_payload.return_value = resolved_future()
+            assert relay_batch(publisher) == (2, 0)
+
+        project_payload.assert_called_once()
+        assert project_payload.call_args.kwargs == {"project": "rele-pt"}
+        payload_publisher.assert_called_once()
+        assert payload_publisher.call_args.args[1] == b'{"id": 2}'
+
+    def test_retries_with_the_retry_policy_of_the_publisher(
+        self, publisher, payload_publisher
+    ):
+        publisher._retry_policy = PublishRetryPolicy(
+            max_attempts=2, initial_backoff=0, jitter=False
+        )
+        payload_publisher.side_effect = [
+            failed_future(ServiceUnavailable("down")),
+            resolved_future(),
+        ]
+        django_outbox.publish("order-created", {"id": 1})
+
+        assert relay_batch(publisher) == (1, 0)
+        assert payload_publisher.call_count == 2
+
+    def test_command_relays_a_single_batch_when_once_is_given(
+        self, payload_publisher, capsys
+    ):
+        django_outbox.publish("order-created", {"id": 1})
+
+        call_command("relayoutbox", "--once")
+
+        out, _ = capsys.readouterr()
+        assert "Published 1 message(s), 0 failed." in out
+        assert not OutboxMessage.objects.exists()
+
+    def test_command_uses_the_global_publisher(self, publisher):
+        with patch(
+            "rele.contrib.django_outbox.management.commands.relayoutbox.relay_batch",
+            return_value=(0, 0),
+        ) as mock_relay:
+            call_command("relayoutbox", "--once", "--batch-size", "10")
+
+        mock_relay.assert_called_once_with(publisher, 10, None)
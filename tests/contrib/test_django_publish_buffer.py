@@ -0,0 +1,64 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+from django.db import transaction
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from rele import Publisher, publishing
+from rele.contrib import DjangoPublishBufferMiddleware
+
+
+@pytest.fixture
+def mock_publisher():
+    original_publisher = publishing._publisher
+    publishing._publisher = MagicMock(spec=Publisher)
+    yield publishing._publisher
+    publishing._publisher = original_publisher
+
+
+@pytest.fixture
+def mock_publish_buffered():
+    with patch.object(publishing, "publish_buffered", autospec=True) as mock:
+        yield mock
+
+
+def view(request):
+    publishing.publish(topic="order-created", data={"id": 1})
+    return HttpResponse("ok")
+
+
+@pytest.mark.django_db(transaction=True)
+class TestDjangoPublishBufferMiddleware:
+    def test_publishes_buffered_messages_once_the_response_is_ready(
+        self, mock_publisher, mock_publish_buffered
+    ):
+        middleware = DjangoPublishBufferMiddleware(view)
+
+        response = middleware(RequestFactory().get("/orders"))
+
+        assert response.status_code == 200
+        mock_publisher.publish.assert_not_called()
+        mock_publish_buffered.assert_called_once_with(
+            [("order-created", {"id": 1}, {})]
+        )
+
+    def test_waits_for_the_open_transaction_to_commit(self, mock_publish_buffered):
+        middleware = DjangoPublishBufferMiddleware(view)
+
+        with transaction.atomic():
+            middleware(RequestFactory().get("/orders"))
+            mock_publish_buffered.assert_not_called()
+
+        mock_publish_buffered.assert_called_once()
+
+    def test_does_not_publish_when_the_open_transaction_rolls_back(
+        self, mock_publish_buffered
+    ):
+        middleware = DjangoPublishBufferMiddleware(view)
+
+        with pytest.raises(ValueError), transaction.atomic():
+            middleware(RequestFactory().get("/orders"))
+            raise ValueError("rollback")
+
+        mock_publish_buffered.assert_not_called()
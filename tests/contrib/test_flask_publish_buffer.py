@@ -0,0 +1,55 @@
+from unittest.mock import MagicMock
+
+import flask
+import pytest
+
+from rele import Publisher, publishing
+from rele.contrib import FlaskPublishBuffer
+
+
+@pytest.fixture
+def mock_publisher():
+    original_publisher = publishing._publisher
+    publishing._publisher = MagicMock(spec=Publisher)
+    yield publishing._publisher
+    publishing._publisher = original_publisher
+
+
+@pytest.fixture
+def flask_app(mock_publisher):
+    app = flask.Flask("rele-test-app")
+    FlaskPublishBuffer(app)
+
+    @app.route("/orders")
+    def create_order():
+        publishing.publish(topic="order-created", data={"id": 1})
+        assert not mock_publisher.publish.called
+        return "ok"
+
+    return app
+
+
+class TestFlaskPublishBuffer:
+    def test_publishes_buffered_messages_after_the_request(
+        self, flask_app, mock_publisher, monkeypatch
+    ):
+        futures = []
+        flush_buffer = publishing.flush_buffer
+        monkeypatch.setattr(
+            publishing,
+            "flush_buffer",
+            lambda token: futures.append(flush_buffer(token)),
+        )
+
+        response = flask_app.test_client().get("/orders")
+
+        assert response.status_code == 200
+        futures[0].result(timeout=1)
+        mock_publisher.publish.assert_called_once_with(
+            "order-created", {"id": 1}, blocking=False
+        )
+
+    def test_publishes_directly_outside_a_request(self, flask_app, mock_publisher):
+        publishing.publish(topic="order-created", data={"id": 1})
+
+        mock_publisher.publish.assert_called_once_with("order-created", {"id": 1})
@@ -1,12 +1,18 @@
+import logging
 import queue
 from decimal import Decimal
 from unittest.mock import MagicMock
 
 import pytest
 from google.cloud import pubsub_v1
+from google.cloud.pubsub_v1.subscriber.exceptions import (
+    AcknowledgeError,
+    AcknowledgeStatus,
+)
 
 from rele.config import Config
 from rele.contrib.logging_middleware import LoggingMiddleware
+from rele.middleware import PublishContext
 from tests.subs import sub_stub
 
 
@@ -66,6 +72,63 @@ class TestLoggingMiddleware:
         logging_middleware.setup(config)
         return logging_middleware
 
+    def test_post_publish_retry_logs_the_failed_attempt(
+        self, logging_middleware, caplog
+    ):
+        logging_middleware.post_publish_retry("order-cancelled", TimeoutError(), 2)
+
+        log = caplog.records[0]
+        assert log.levelname == "WARNING"
+        assert log.message == (
+            "Retrying publish to order-cancelled after attempt 2 failed: TimeoutError"
+        )
+        assert log.metrics == {
+            "name": "publications",
+            "data": {"agent": "rele", "topic": "order-cancelled", "attempt": 2},
+        }
+
+    def test_post_publish_throttle_logs_the_wait(self, logging_middleware, caplog):
+        caplog.set_level(logging.DEBUG)
+        logging_middleware.post_publish_throttle("order-cancelled", 0.25, False)
+
+        log = caplog.records[0]
+        assert log.message == (
+            "Delayed publish to order-cancelled by the rate limit (0.250s)"
+        )
+        assert log.metrics["data"]["throttle_seconds"] == 0.25
+        assert log.metrics["data"]["rejected"] is False
+
+    def test_post_process_message_skipped_logs_the_reason(
+        self, logging_middleware, caplog, message_wrapper
+    ):
+        caplog.set_level(logging.DEBUG)
+        logging_middleware.post_process_message_skipped(
+            sub_stub, "duplicate", message_wrapper
+        )
+
+        log = caplog.records[0]
+        assert log.message == (
+            "Skipped duplicate message for rele-some-cool-topic - sub_stub"
+        )
+        assert log.metrics["data"]["status"] == "skipped"
+        assert log.metrics["data"]["reason"] == "duplicate"
+
+    def test_post_process_message_ack_failure_logs_the_error_code(
+        self, logging_middleware, caplog, message_wrapper
+    ):
+        error = AcknowledgeError(AcknowledgeStatus.INVALID_ACK_ID, "expired")
+
+        logging_middleware.post_process_message_ack_failure(
+            sub_stub, error, message_wrapper
+        )
+
+        log = caplog.records[0]
+        assert log.message == (
+            "Ack refused for message processed by "
+            "rele-some-cool-topic - sub_stub: INVALID_ACK_ID"
+        )
+        assert log.metrics["data"]["status"] == "ack_failed"
+
     def test_message_payload_log_is_converted_to_string_on_post_publish_failure(
         self,
         logging_middleware,
@@ -98,6 +161,17 @@ class TestLoggingMiddleware:
 
         assert message_log == expected_message_data_log_with_decimal
 
+    def test_message_payload_log_reuses_the_encoded_payload_from_the_context(
+        self, logging_middleware, caplog, message_data
+    ):
+        context = PublishContext(payload=b'{"already": "encoded"}', body=b"")
+
+        logging_middleware.post_publish_failure(
+            sub_stub, RuntimeError("💩"), message_data, context=context
+        )
+
+        assert caplog.records[0].subscription_message == '{"already": "encoded"}'
+
     def test_message_payload_log_is_converted_to_string_on_post_process_message_failure(
         self,
         logging_middleware,
@@ -0,0 +1,165 @@
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+from google.cloud.pubsub_v1.subscriber.exceptions import (
+    AcknowledgeError,
+    AcknowledgeStatus,
+)
+from prometheus_client import CollectorRegistry
+
+from rele.config import Config
+from rele.contrib.prometheus_middleware import PrometheusMiddleware
+from rele.metrics import subscription_lag
+from tests.subs import sub_stub
+
+
+@pytest.fixture
+def registry():
+    return CollectorRegistry()
+
+
+@pytest.fixture
+def middleware(registry, config):
+    middleware = PrometheusMiddleware(registry=registry)
+    middleware.setup(config)
+    return middleware
+
+
+@pytest.fixture
+def message():
+    return MagicMock(data=b'{"foo": "bar"}', attributes={})
+
+
+def sample(registry, name, **labels):
+    return registry.get_sample_value(name, labels) or 0.0
+
+
+class TestProcessMetrics:
+    def test_counts_processed_messages(self, middleware, registry, message):
+        middleware.pre_process_message(sub_stub, message)
+        middleware.post_process_message_success(sub_stub, time.time() - 1, message)
+        middleware.post_process_message()
+
+        labels = {"subscription": sub_stub.name}
+        assert sample(registry, "rele_messages_total", status="succeeded", **labels)
+        assert sample(registry, "rele_message_duration_seconds_count", **labels) == 1
+        assert sample(registry, "rele_message_duration_seconds_sum", **labels) >= 1
+        assert sample(registry, "rele_message_payload_bytes_sum", **labels) == 14
+
+    def test_counts_failed_messages(self, middleware, registry, message):
+        middleware.post_process_message_failure(
+            sub_stub, ValueError("Boom"), time.time(), message
+        )
+
+        assert sample(
+            registry,
+            "rele_messages_total",
+            subscription=sub_stub.name,
+            status="failed",
+        )
+
+    def test_tracks_the_messages_in_flight(self, middleware, registry, message):
+        labels = {"subscription": sub_stub.name}
+
+        middleware.pre_process_message(sub_stub, message)
+        assert sample(registry, "rele_messages_in_flight", **labels) == 1
+
+        middleware.post_process_message()
+        assert sample(registry, "rele_messages_in_flight", **labels) == 0
+
+    def test_counts_skipped_messages_by_reason(self, middleware, registry, message):
+        middleware.post_process_message_skipped(sub_stub, "stale", message)
+
+        assert sample(
+            registry,
+            "rele_messages_skipped_total",
+            subscription=sub_stub.name,
+            reason="stale",
+        )
+
+    def test_counts_refused_acks(self, middleware, registry, message):
+        error = AcknowledgeError(AcknowledgeStatus.INVALID_ACK_ID, info=None)
+
+        middleware.post_process_message_ack_failure(sub_stub, error, message)
+
+        assert sample(registry, "rele_ack_failures_total", subscription=sub_stub.name)
+
+    def test_binds_the_labels_of_a_subscription_once(self, middleware, message):
+        with patch.object(middleware._metrics.messages, "labels") as labels:
+            middleware.post_process_message_success(sub_stub, time.time(), message)
+            middleware.post_process_message_success(sub_stub, time.time(), message)
+
+        assert labels.call_count == 2  # the succeeded and failed children
+
+    def test_binds_the_labels_of_a_skip_reason_once(self, middleware, message):
+        with patch.object(middleware._metrics.skipped, "labels") as labels:
+            middleware.post_process_message_skipped(sub_stub, "stale", message)
+            middleware.post_process_message_skipped(sub_stub, "stale", message)
+            middleware.post_process_message_skipped(sub_stub, "duplicate", message)
+
+        assert labels.call_count == 2
+
+    def test_exports_the_lag_histograms(self, middleware, registry):
+        subscription_lag("prometheus-lag-sub").end_to_end.observe(0.2)
+
+        assert (
+            sample(
+                registry,
+                "rele_subscription_lag_seconds_bucket",
+                subscription="prometheus-lag-sub",
+                kind="end_to_end",
+                le="0.25",
+            )
+            == 1
+        )
+
+
+class TestPublishMetrics:
+    def test_observes_the_publish_latency(self, middleware, registry):
+        attrs = {"published_at": str(time.time() - 0.5)}
+
+        middleware.post_publish_success("order-created", {}, attrs)
+
+        labels = {"topic": "order-created"}
+        assert sample(
+            registry, "rele_published_messages_total", status="succeeded", **labels
+        )
+        assert sample(registry, "rele_publish_latency_seconds_sum", **labels) >= 0.5
+
+    def test_counts_failed_publishes(self, middleware, registry):
+        middleware.post_publish_failure("order-created", TimeoutError(), {})
+
+        assert sample(
+            registry,
+            "rele_published_messages_total",
+            topic="order-created",
+            status="failed",
+        )
+
+
+class TestExporter:
+    def test_starts_the_http_server_when_the_port_is_set(self, registry):
+        middleware = PrometheusMiddleware(registry=registry)
+        middleware.setup(Config({"PROMETHEUS_PORT": 9100}))
+
+        with patch(
+            "rele.contrib.prometheus_middleware.start_http_server"
+        ) as start_http_server:
+            middleware.post_worker_start()
+
+        start_http_server.assert_called_once_with(9100, registry=registry)
+
+    def test_does_not_start_the_http_server_by_default(self, middleware):
+        with patch(
+            "rele.contrib.prometheus_middleware.start_http_server"
+        ) as start_http_server:
+            middleware.post_worker_start()
+
+        start_http_server.assert_not_called()
+
+    def test_reuses_the_metrics_of_a_registry(self, registry):
+        assert (
+            PrometheusMiddleware(registry=registry)._metrics
+            is PrometheusMiddleware(registry=registry)._metrics
+        )
@@ -144,6 +144,7 @@ class TestVerboseLoggingMiddleware:
                 "status": "succeeded",
                 "subscription": "rele-some-cool-topic",
                 "attributes": {"lang": "es", "published_at": "1560244246.863829"},
+                "delivery_attempt": 1,
             },
         }
         assert emitted_log.subscription_message == expected_message_log
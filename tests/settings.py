@@ -14,13 +14,20 @@ INSTALLED_APPS = [
     "django.contrib.contenttypes",
     "django.contrib.sites",
     "rele",
+    "rele.contrib.django_outbox",
 ]
 
 SITE_ID = 1
 
 MIDDLEWARE_CLASSES = ()
 
-DATABASES = {"default": {"CONN_MAX_AGE": 0}}
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": ":memory:",
+        "CONN_MAX_AGE": 0,
+    }
+}
 
 RELE = {
     "APP_NAME": "test-rele",
@@ -0,0 +1,142 @@
+import os
+from unittest.mock import ANY, MagicMock, patch
+
+import grpc
+import pytest
+from google.auth.credentials import AnonymousCredentials
+
+from rele import channel
+from rele.channel import publisher_client, release_client, subscriber_client
+
+
+@pytest.fixture(autouse=True)
+def no_shared_channels():
+    channel._channels.clear()
+    yield
+    channel._channels.clear()
+
+
+@pytest.fixture
+def credentials():
+    return AnonymousCredentials()
+
+
+@pytest.fixture
+def mock_create_channel():
+    with patch.object(
+        channel.PublisherGrpcTransport,
+        "create_channel",
+        side_effect=lambda *args, **kwargs: MagicMock(spec=grpc.Channel),
+    ) as mock:
+        yield mock
+
+
+class TestSharedChannel:
+    def test_publisher_and_subscriber_share_the_channel(
+        self, credentials, mock_create_channel
+    ):
+        publisher = publisher_client(credentials)
+        subscriber = subscriber_client(credentials)
+
+        mock_create_channel.assert_called_once()
+        assert publisher.transport.grpc_channel is subscriber.transport.grpc_channel
+
+    def test_creates_a_channel_per_set_of_options(
+        self, credentials, mock_create_channel
+    ):
+        publisher = publisher_client(credentials)
+        compressed = publisher_client(credentials, compression="gzip")
+        other_endpoint = publisher_client(
+            credentials, client_options={"api_endpoint": "pubsub.example.com"}
+        )
+
+        assert mock_create_channel.call_count == 3
+        assert publisher.transport.grpc_channel is not compressed.transport.grpc_channel
+        assert other_endpoint.transport._host == "pubsub.example.com:443"
+
+    def test_merges_channel_options_over_the_defaults(
+        self, credentials, mock_create_channel
+    ):
+        publisher_client(
+            credentials,
+            channel_options={
+                "grpc.keepalive_time_ms": 20000,
+                "grpc.keepalive_timeout_ms": 5000,
+            },
+            compression="gzip",
+        )
+
+        mock_create_channel.assert_called_once_with(
+            "pubsub.googleapis.com:443",
+            credentials=credentials,
+            options=ANY,
+            compression=grpc.Compression.Gzip,
+        )
+        options = dict(mock_create_channel.call_args.kwargs["options"])
+        assert options["grpc.keepalive_time_ms"] == 20000
+        assert options["grpc.keepalive_timeout_ms"] == 5000
+        assert options["grpc.max_receive_message_length"] == -1
+
+    def test_raises_on_unsupported_compression(self, credentials):
+        with pytest.raises(ValueError, match="Unsupported gRPC compression: brotli"):
+            publisher_client(credentials, compression="brotli")
+
+    @patch("rele.channel.grpc.insecure_channel")
+    def test_uses_an_insecure_channel_with_the_emulator(
+        self, mock_insecure_channel, mock_create_channel
+    ):
+        mock_insecure_channel.return_value = MagicMock(spec=grpc.Channel)
+
+        with patch.dict(os.environ, {"PUBSUB_EMULATOR_HOST": "localhost:8085"}):
+            publisher_client(None)
+
+        mock_insecure_channel.assert_called_once_with(
+            "localhost:8085", options=ANY, compression=None
+        )
+        mock_create_channel.assert_not_called()
+
+    @patch("rele.channel.pubsub_v1.PublisherClient")
+    def test_lets_the_client_apply_other_client_options(
+        self, mock_publisher_client, credentials, mock_create_channel
+    ):
+        client_options = {"universe_domain": "example.com"}
+
+        publisher_client(credentials, client_options=client_options)
+
+        mock_publisher_client.assert_called_once_with(
+            credentials=credentials, client_options=client_options
+        )
+        mock_create_channel.assert_not_called()
+
+    def test_raises_when_channel_options_cannot_be_applied(self, credentials):
+        with pytest.raises(ValueError, match="only support the api_endpoint"):
+            subscriber_client(
+                credentials,
+                client_options={"universe_domain": "example.com"},
+                compression="gzip",
+            )
+
+
+class TestReleaseClient:
+    def test_closes_the_channel_when_the_last_client_is_released(
+        self, credentials, mock_create_channel
+    ):
+        publisher = publisher_client(credentials)
+        subscriber = subscriber_client(credentials)
+        shared_channel = publisher.transport.grpc_channel
+
+        release_client(publisher)
+        shared_channel.close.assert_not_called()
+
+        release_client(subscriber)
+        shared_channel.close.assert_called_once_with()
+        assert channel._channels == {}
+
+    def test_creates_a_new_channel_once_released(
+        self, credentials, mock_create_channel
+    ):
+        release_client(publisher_client(credentials))
+
+        publisher_client(credentials)
+
+        assert mock_create_channel.call_count == 2
@@ -0,0 +1,96 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from rele.claim_check import (
+    CLAIM_CHECK_ATTRIBUTE,
+    BlobStore,
+    ClaimCheck,
+    LocalFileSystemBlobStore,
+)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return LocalFileSystemBlobStore(str(tmp_path))
+
+
+class TestBlobStore:
+    def test_cannot_be_created_without_every_method(self):
+        class WriteOnlyBlobStore(BlobStore):
+            def put(self, key, payload):
+                pass
+
+        with pytest.raises(TypeError):
+            WriteOnlyBlobStore()
+
+
+class TestLocalFileSystemBlobStore:
+    def test_reads_back_stored_payloads(self, store):
+        store.put("some-topic/abc", b"payload")
+
+        assert store.get("some-topic/abc") == b"payload"
+
+    def test_raises_when_the_key_does_not_exist(self, store):
+        with pytest.raises(FileNotFoundError):
+            store.get("some-topic/missing")
+
+    @pytest.mark.parametrize("key", ["../secret", "/etc/passwd", "some-topic/../.."])
+    def test_rejects_keys_outside_of_its_path(self, store, key):
+        with pytest.raises(ValueError, match="Invalid claim-check key"):
+            store.get(key)
+
+
+class TestClaimCheck:
+    def test_keeps_small_payloads_inline(self, store):
+        claim_check = ClaimCheck(store, threshold=10)
+        attrs = {}
+
+        body = claim_check.offload("some-topic", b"small", attrs)
+
+        assert body == b"small"
+        assert attrs == {}
+
+    def test_offloads_payloads_above_the_threshold(self, store):
+        claim_check = ClaimCheck(store, threshold=10)
+        attrs = {}
+
+        body = claim_check.offload("some-topic", b"a large payload", attrs)
+
+        assert body == b""
+        assert attrs[CLAIM_CHECK_ATTRIBUTE].startswith("some-topic/")
+        assert store.get(attrs[CLAIM_CHECK_ATTRIBUTE]) == b"a large payload"
+
+    def test_fetches_offloaded_payloads(self, store):
+        claim_check = ClaimCheck(store, threshold=10)
+        attrs = {}
+        body = claim_check.offload("some-topic", b"a large payload", attrs)
+
+        assert claim_check.fetch(body, attrs) == b"a large payload"
+
+    def test_returns_the_body_of_messages_that_were_not_offloaded(self, store):
+        claim_check = ClaimCheck(store)
+
+        assert claim_check.fetch(b"inline", {}) == b"inline"
+
+    def test_fetches_each_blob_from_the_store_once(self):
+        store = MagicMock()
+        store.get.return_value = b"a large payload"
+        claim_check = ClaimCheck(store)
+        attrs = {CLAIM_CHECK_ATTRIBUTE: "some-topic/abc"}
+
+        claim_check.fetch(b"", attrs)
+        claim_check.fetch(b"", attrs)
+
+        store.get.assert_called_once_with("some-topic/abc")
+
+    def test_evicts_least_recently_used_blobs_over_the_cache_size(self):
+        store = MagicMock()
+        store.get.side_effect = lambda key: key.encode()
+        claim_check = ClaimCheck(store, cache_max_bytes=10)
+
+        claim_check.fetch(b"", {CLAIM_CHECK_ATTRIBUTE: "topic/a"})
+        claim_check.fetch(b"", {CLAIM_CHECK_ATTRIBUTE: "topic/b"})
+        claim_check.fetch(b"", {CLAIM_CHECK_ATTRIBUTE: "topic/a"})
+
+        assert store.get.call_count == 3
@@ -0,0 +1,119 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from rele.coalesce import Coalescer
+
+
+def message(published_at):
+    return MagicMock(attributes={"published_at": str(published_at)})
+
+
+class TestCoalescer:
+    @pytest.fixture
+    def process(self):
+        return MagicMock()
+
+    @pytest.fixture
+    def skip(self):
+        return MagicMock()
+
+    @pytest.fixture
+    def schedule(self):
+        with patch("rele.coalesce.DelayQueue.schedule") as mock:
+            yield mock
+
+    def flush(self, schedule):
+        for (_, callback), _ in schedule.call_args_list:
+            callback()
+
+    def test_processes_only_the_latest_message_of_a_key(self, process, skip, schedule):
+        coalescer = Coalescer(0.5, process=process, skip=skip)
+        first, second = message(1.0), message(2.0)
+
+        coalescer.add("7", first)
+        coalescer.add("7", second)
+        self.flush(schedule)
+
+        schedule.assert_called_once()
+        process.assert_called_once_with(second)
+        skip.assert_called_once_with(first)
+
+    def test_drops_messages_published_before_the_kept_one(
+        self, process, skip, schedule
+    ):
+        coalescer = Coalescer(0.5, process=process, skip=skip)
+        newer, older = message(2.0), message(1.0)
+
+        coalescer.add("7", newer)
+        coalescer.add("7", older)
+        self.flush(schedule)
+
+        process.assert_called_once_with(newer)
+        skip.assert_called_once_with(older)
+
+    def test_orders_foreign_timestamps_by_publish_time(self, process, skip, schedule):
+        coalescer = Coalescer(0.5, process=process, skip=skip)
+        older, newer = [
+            MagicMock(
+                attributes={"published_at": "2024-01-01T00:00:00Z"},
+                publish_time=datetime.fromtimestamp(timestamp, tz=timezone.utc),
+            )
+            for timestamp in (1.0, 2.0)
+        ]
+
+        coalescer.add("7", older)
+        coalescer.add("7", newer)
+        self.flush(schedule)
+
+        process.assert_called_once_with(newer)
+        skip.assert_called_once_with(older)
+
+    def test_keeps_a_window_per_key(self, process, skip, schedule):
+        coalescer = Coalescer(0.5, process=process, skip=skip)
+
+        coalescer.add("7", message(1.0))
+        coalescer.add("8", message(1.0))
+        self.flush(schedule)
+
+        assert process.call_count == 2
+        skip.assert_not_called()
+
+    def test_opens_a_new_window_once_flushed(self, process, skip, schedule):
+        coalescer = Coalescer(0.5, process=process, skip=skip)
+        coalescer.add("7", message(1.0))
+        self.flush(schedule)
+
+        coalescer.add("7", message(2.0))
+
+        assert schedule.call_count == 2
+
+    def test_counts_the_coalesced_messages(self, process, skip, schedule):
+        coalescer = Coalescer(0.5, process=process, skip=skip)
+
+        for published_at in range(4):
+            coalescer.add("7", message(published_at))
+
+        stats = coalescer.stats()
+        assert stats.received == 4
+        assert stats.coalesced == 3
+        assert stats.ratio == 0.75
+
+    def test_processes_in_the_executor_after_the_window(self, skip):
+        processed = []
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            coalescer = Coalescer(
+                0.01, process=processed.append, skip=skip, executor=executor
+            )
+            latest = message(2.0)
+            coalescer.add("7", message(1.0))
+            coalescer.add("7", latest)
+
+            deadline = time.time() + 1
+            while not processed and time.time() < deadline:
+                time.sleep(0.01)
+
+        assert processed == [latest]
@@ -0,0 +1,78 @@
+import gzip
+
+import pytest
+
+from rele.compression import COMPRESSION_ATTRIBUTE, Compressor
+
+zstandard = pytest.importorskip("zstandard")
+
+PAYLOAD = b'{"id": 123, "description": "' + b"a" * 2048 + b'"}'
+
+
+class TestCompressor:
+    def test_keeps_small_payloads_uncompressed(self):
+        compressor = Compressor(threshold=1024)
+        attrs = {}
+
+        body = compressor.compress("some-topic", b'{"id": 123}', attrs)
+
+        assert body == b'{"id": 123}'
+        assert attrs == {}
+
+    def test_compresses_payloads_above_the_threshold_with_gzip(self):
+        compressor = Compressor(threshold=1024)
+        attrs = {}
+
+        body = compressor.compress("some-topic", PAYLOAD, attrs)
+
+        assert attrs == {COMPRESSION_ATTRIBUTE: "gzip"}
+        assert len(body) < len(PAYLOAD)
+        assert gzip.decompress(body) == PAYLOAD
+
+    def test_keeps_payloads_that_do_not_shrink_uncompressed(self):
+        compressor = Compressor(threshold=0)
+        attrs = {}
+
+        body = compressor.compress("some-topic", b"{}", attrs)
+
+        assert body == b"{}"
+        assert attrs == {}
+
+    @pytest.mark.parametrize("algorithm", ["gzip", "zstd"])
+    def test_decompresses_compressed_payloads(self, algorithm):
+        compressor = Compressor(algorithm)
+        attrs = {}
+
+        body = compressor.compress("some-topic", PAYLOAD, attrs)
+
+        assert attrs[COMPRESSION_ATTRIBUTE] == algorithm
+        assert Compressor().decompress("some-topic", body, attrs) == PAYLOAD
+
+    def test_returns_the_body_of_messages_that_were_not_compressed(self):
+        assert Compressor().decompress("some-topic", b"{}", {}) == b"{}"
+
+    def test_uses_the_dictionary_of_the_topic(self):
+        samples = [
+            b'{"id": %d, "status": "created", "lines": []}' % i for i in range(1000)
+        ]
+        dictionary = zstandard.train_dictionary(1024, samples).as_bytes()
+        compressor = Compressor(
+            "zstd", threshold=0, dictionaries={"order-created": dictionary}
+        )
+        payload = b'{"id": 1234, "status": "created", "lines": []}'
+        attrs = {}
+
+        body = compressor.compress("order-created", payload, attrs)
+
+        assert attrs == {COMPRESSION_ATTRIBUTE: "zstd"}
+        assert compressor.decompress("order-created", body, attrs) == payload
+        with pytest.raises(zstandard.ZstdError):
+            Compressor("zstd").decompress("order-created", body, attrs)
+
+    def test_raises_when_algorithm_is_not_supported(self):
+        with pytest.raises(ValueError):
+            Compressor("lz4")
+
+    def test_raises_when_dictionaries_are_used_with_gzip(self):
+        with pytest.raises(ValueError):
+            Compressor("gzip", dictionaries={"some-topic": b"dictionary"})
@@ -1,3 +1,4 @@
+import importlib
 import json
 import os
 from unittest.mock import patch
@@ -7,7 +8,13 @@ import pytest
 from google.oauth2 import service_account
 
 from rele import Subscription, sub
-from rele.config import Config, load_subscriptions_from_paths
+from rele.config import (
+    Config,
+    _load_service_account_credentials,
+    load_subscriptions_from_paths,
+    setup,
+)
+from rele.dedup import Deduplicator
 
 
 @sub(topic="test-topic", prefix="rele")
@@ -138,6 +145,7 @@ class TestConfig:
         def filter_by_english(attrs):
             return attrs.get("lang") == "en"
 
+        deduplicator = Deduplicator()
         settings = {
             "APP_NAME": "rele",
             "SUB_PREFIX": "rele",
@@ -149,6 +157,9 @@ class TestConfig:
             "THREADS_PER_SUBSCRIPTION": 7,
             "ACK_DEADLINE": 120,
             "FILTER_SUBS_BY": [filter_by_english],
+            "DEFAULT_DEAD_LETTER_TOPIC": "rele-dead-letter",
+            "DEFAULT_MAX_DELIVERY_ATTEMPTS": 10,
+            "DEDUPLICATOR": deduplicator,
         }
 
         config = Config(settings)
@@ -164,6 +175,9 @@ class TestConfig:
         assert config.threads_per_subscription == 7
         assert config.ack_deadline == 120
         assert config.filter_by == [filter_by_english]
+        assert config.dead_letter_topic == "rele-dead-letter"
+        assert config.max_delivery_attempts == 10
+        assert config.deduplicator is deduplicator
 
     def test_uses_project_id_from_settings_when_given(self):
         settings = {
@@ -212,6 +226,61 @@ class TestConfig:
         assert config.middleware == ["rele.contrib.LoggingMiddleware"]
         assert config.encoder == json.JSONEncoder
         assert config.publisher_blocking is False
+        assert config.prometheus_port is None
+
+    def test_reads_the_credentials_file_once(self):
+        _load_service_account_credentials.cache_clear()
+        settings = {"GC_CREDENTIALS_PATH": "tests/dummy-pub-sub-credentials.json"}
+
+        with patch(
+            "rele.config.service_account.Credentials.from_service_account_file",
+            wraps=service_account.Credentials.from_service_account_file,
+        ) as mock_from_file:
+            config = Config(settings)
+            credentials = config.credentials
+
+            assert config.credentials is credentials
+            assert config.gc_project_id == "rele-test"
+            assert Config(settings).credentials is credentials
+
+        mock_from_file.assert_called_once()
+        _load_service_account_credentials.cache_clear()
+
+    def test_refreshes_the_credentials_in_the_background(self):
+        config = Config({"GC_CREDENTIALS_PATH": "tests/dummy-pub-sub-credentials.json"})
+
+        assert config.credentials._use_non_blocking_refresh is True
+
+    def test_imports_the_encoder_once(self):
+        config = Config({"ENCODER_PATH": "tests.test_config.CustomJSONEncoder"})
+
+        with patch(
+            "rele.config.importlib.import_module", wraps=importlib.import_module
+        ) as mock_import:
+            assert config.encoder is CustomJSONEncoder
+            assert config.encoder is CustomJSONEncoder
+
+        mock_import.assert_called_once_with("tests.test_config")
+
+    def test_applies_the_overrides_of_a_project(self, project_id):
+        config = Config(
+            {
+                "GC_PROJECT_ID": project_id,
+                "PUBLISHER_TIMEOUT": 5.0,
+                "CLIENT_OPTIONS": {"api_endpoint": "pubsub.example.com"},
+                "PUBLISHER_PROJECTS": {
+                    "rele-pt": {"CLIENT_OPTIONS": {"api_endpoint": "pubsub.pt"}}
+                },
+            }
+        )
+
+        project_config = config.for_project("rele-pt")
+
+        assert project_config.client_options == {"api_endpoint": "pubsub.pt"}
+        assert project_config.publisher_timeout == 5.0
+        assert config.for_project("rele-fr").client_options == {
+            "api_endpoint": "pubsub.example.com"
+        }
 
     def test_returns_no_project_id_when_default_creds_have_none(self):
         class UserAdcCredentials:
@@ -248,3 +317,26 @@ class TestConfig:
         assert config.middleware == ["rele.contrib.LoggingMiddleware"]
         assert config.encoder == json.JSONEncoder
         assert config.publisher_blocking is False
+
+
+@patch("rele.config.init_global_publisher")
+class TestSetup:
+    def test_does_not_warm_up_by_default(self, _mock_init_global_publisher):
+        with patch("rele.config.warmup") as mock_warmup:
+            setup({"GC_PROJECT_ID": "rele-test"})
+
+        mock_warmup.assert_not_called()
+
+    def test_warms_up_when_enabled(self, _mock_init_global_publisher):
+        with patch("rele.config.warmup") as mock_warmup:
+            setup({"GC_PROJECT_ID": "rele-test", "WARMUP": True})
+
+        mock_warmup.assert_called_once_with()
+
+    def test_logs_instead_of_raising_when_warmup_fails(
+        self, _mock_init_global_publisher, caplog
+    ):
+        with patch("rele.config.warmup", side_effect=RuntimeError("offline")):
+            setup({"GC_PROJECT_ID": "rele-test", "WARMUP": True})
+
+        assert caplog.records[-1].message == "Could not warm up the Publisher"
@@ -0,0 +1,139 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from rele.dedup import (
+    Deduplicator,
+    DedupStore,
+    MemoryDedupStore,
+    SQLiteDedupStore,
+)
+
+
+@pytest.fixture
+def clock():
+    with patch("rele.dedup.time.monotonic") as mock:
+        mock.return_value = 100.0
+        yield mock
+
+
+class TestDedupStore:
+    def test_cannot_be_created_without_every_method(self):
+        class AddOnlyDedupStore(DedupStore):
+            def add(self, key):
+                pass
+
+        with pytest.raises(TypeError):
+            AddOnlyDedupStore()
+
+
+class TestMemoryDedupStore:
+    def test_contains_the_added_keys(self, clock):
+        store = MemoryDedupStore()
+        store.add("sub/1")
+
+        assert store.contains("sub/1")
+        assert not store.contains("sub/2")
+
+    def test_forgets_keys_after_the_ttl(self, clock):
+        store = MemoryDedupStore(ttl=10)
+        store.add("sub/1")
+
+        clock.return_value = 110.0
+
+        assert not store.contains("sub/1")
+        assert len(store) == 0
+
+    def test_evicts_the_least_recently_seen_key_over_max_keys(self, clock):
+        store = MemoryDedupStore(max_keys=2)
+        store.add("sub/1")
+        store.add("sub/2")
+        store.contains("sub/1")
+
+        store.add("sub/3")
+
+        assert store.contains("sub/1")
+        assert not store.contains("sub/2")
+        assert len(store) == 2
+
+    def test_memory_grows_with_the_keys_and_is_released(self, clock):
+        store = MemoryDedupStore(ttl=10)
+        store.add("sub/1")
+        memory_bytes = store.memory_bytes
+
+        store.add("sub/2")
+        assert store.memory_bytes > memory_bytes
+
+        clock.return_value = 110.0
+        store.contains("sub/1")
+        store.contains("sub/2")
+        assert store.memory_bytes == 0
+
+
+class TestSQLiteDedupStore:
+    @pytest.fixture
+    def path(self, tmp_path):
+        return str(tmp_path / "dedup.db")
+
+    def test_shares_the_keys_through_the_database(self, path):
+        SQLiteDedupStore(path).add("sub/1")
+
+        store = SQLiteDedupStore(path)
+
+        assert store.contains("sub/1")
+        assert not store.contains("sub/2")
+        assert len(store) == 1
+
+    @patch("rele.dedup.time.time")
+    def test_forgets_keys_after_the_ttl(self, mock_time, path):
+        mock_time.return_value = 100.0
+        store = SQLiteDedupStore(path, ttl=10)
+        store.add("sub/1")
+
+        mock_time.return_value = 110.0
+
+        assert not store.contains("sub/1")
+        assert len(store) == 0
+
+
+class TestDeduplicator:
+    @pytest.fixture
+    def message(self):
+        return MagicMock(message_id="42", attributes={"order_id": "7"})
+
+    def test_keys_on_the_message_id(self, message):
+        assert Deduplicator().key("sub", True, message) == "sub/42"
+
+    def test_keys_on_the_idempotency_attribute(self, message):
+        assert Deduplicator().key("sub", "order_id", message) == "sub/7"
+
+    def test_has_no_key_without_the_idempotency_attribute(self, message):
+        assert Deduplicator().key("sub", "payment_id", message) == ""
+
+    def test_skips_the_keys_of_processed_messages(self):
+        deduplicator = Deduplicator()
+
+        assert deduplicator.check("sub/1") is None
+        assert deduplicator.check("sub/1") == Deduplicator.IN_FLIGHT
+        deduplicator.done("sub/1", processed=True)
+
+        assert deduplicator.check("sub/1") == Deduplicator.DUPLICATE
+
+    def test_does_not_remember_messages_that_were_not_processed(self):
+        deduplicator = Deduplicator()
+        deduplicator.check("sub/1")
+        deduplicator.done("sub/1", processed=False)
+
+        assert deduplicator.check("sub/1") is None
+
+    def test_counts_hits_and_misses(self):
+        deduplicator = Deduplicator()
+        deduplicator.check("sub/1")
+        deduplicator.done("sub/1", processed=True)
+        deduplicator.check("sub/1")
+
+        stats = deduplicator.stats()
+
+        assert (stats.hits, stats.misses, stats.keys) == (1, 1, 1)
+        assert stats.hit_rate == 0.5
+        assert stats.memory_bytes > 0
@@ -0,0 +1,72 @@
+import threading
+import time
+from datetime import datetime, timezone
+from unittest.mock import MagicMock
+
+import pytest
+
+from rele.delayed import DelayQueue, due_time
+
+
+class TestDueTime:
+    def test_returns_none_when_not_delayed(self):
+        assert due_time() is None
+
+    def test_adds_the_delay_to_the_current_time(self, time_mock, published_at):
+        assert due_time(delay=900) == published_at + 900
+
+    def test_accepts_datetimes_and_epoch_times(self):
+        deliver_at = datetime(2030, 1, 1, tzinfo=timezone.utc)
+
+        assert due_time(deliver_at=deliver_at) == deliver_at.timestamp()
+        assert due_time(deliver_at=1893456000.0) == 1893456000.0
+
+    def test_raises_when_both_are_given(self):
+        with pytest.raises(ValueError, match="either delay or deliver_at"):
+            due_time(delay=1, deliver_at=1893456000.0)
+
+
+class TestDelayQueue:
+    @pytest.fixture
+    def queue(self):
+        queue = DelayQueue()
+        yield queue
+        queue.stop()
+
+    def test_runs_callbacks_in_due_order(self, queue):
+        ran = []
+        done = threading.Event()
+        now = time.time()
+
+        queue.schedule(now + 0.05, lambda: (ran.append("late"), done.set()))
+        queue.schedule(now + 0.01, lambda: ran.append("early"))
+        queue.schedule(now + 0.01, lambda: ran.append("early-second"))
+
+        assert done.wait(timeout=1)
+        assert ran == ["early", "early-second", "late"]
+        assert len(queue) == 0
+
+    def test_keeps_running_when_a_callback_fails(self, queue):
+        done = threading.Event()
+
+        queue.schedule(time.time(), lambda: 1 / 0)
+        queue.schedule(time.time(), done.set)
+
+        assert done.wait(timeout=1)
+
+    def test_stop_runs_on_drop_of_pending_callbacks(self, queue):
+        callback, on_drop = MagicMock(), MagicMock()
+        queue.schedule(time.time() + 60, callback, on_drop=on_drop)
+
+        queue.stop()
+
+        on_drop.assert_called_once_with()
+        callback.assert_not_called()
+
+    def test_stop_drops_pending_callbacks(self, queue):
+        queue.schedule(time.time() + 60, lambda: None)
+
+        assert len(queue) == 1
+        assert queue.stop() == 1
+        with pytest.raises(RuntimeError):
+            queue.schedule(time.time(), lambda: None)
@@ -0,0 +1,92 @@
+import time
+from datetime import datetime, timezone
+from unittest.mock import MagicMock
+
+import pytest
+
+from rele.metrics import Histogram, SubscriptionLag, lag_stats, subscription_lag
+
+
+class TestHistogram:
+    def test_counts_observations_in_their_bucket(self):
+        histogram = Histogram(buckets=(1.0, 5.0))
+
+        for value in (0.5, 1.0, 3.0, 10.0):
+            histogram.observe(value)
+
+        snapshot = histogram.snapshot()
+        assert snapshot.counts == (2, 1, 1)
+        assert snapshot.observations == 4
+        assert snapshot.sum == 14.5
+        assert snapshot.mean == 3.625
+
+    def test_estimates_quantiles_from_the_buckets(self):
+        histogram = Histogram(buckets=(1.0, 5.0))
+        for value in (0.5, 0.5, 3.0, 10.0):
+            histogram.observe(value)
+
+        snapshot = histogram.snapshot()
+
+        assert snapshot.quantile(0.5) == 1.0
+        assert snapshot.quantile(0.75) == 5.0
+        assert snapshot.quantile(0.99) == float("inf")
+
+    def test_quantile_is_zero_without_observations(self):
+        assert Histogram().snapshot().quantile(0.99) == 0.0
+
+    def test_raises_error_when_buckets_are_not_increasing(self):
+        with pytest.raises(ValueError, match="increasing"):
+            Histogram(buckets=(5.0, 1.0))
+
+
+class TestSubscriptionLag:
+    def test_observes_the_lag_of_a_message(self):
+        lag = SubscriptionLag(buckets=(1.0, 10.0, 100.0))
+        now = time.time()
+        message = MagicMock(
+            attributes={"published_at": str(now - 50)},
+            publish_time=datetime.fromtimestamp(now - 5, tz=timezone.utc),
+            _received_timestamp=now - 0.5,
+        )
+
+        lag.observe(message, now)
+
+        stats = lag.stats()
+        assert stats.end_to_end.counts == (0, 0, 1, 0)
+        assert stats.pubsub.counts == (0, 1, 0, 0)
+        assert stats.queue_time.counts == (1, 0, 0, 0)
+
+    def test_skips_the_lags_that_cannot_be_measured(self):
+        lag = SubscriptionLag()
+
+        lag.observe(MagicMock(attributes={}, publish_time=None), time.time())
+
+        stats = lag.stats()
+        assert stats.end_to_end.observations == 0
+        assert stats.pubsub.observations == 0
+        assert stats.queue_time.observations == 0
+
+    @pytest.mark.parametrize("published_at", ["2024-01-01T00:00:00Z", "nan"])
+    def test_skips_the_end_to_end_lag_of_foreign_timestamps(self, published_at):
+        lag = SubscriptionLag()
+        now = time.time()
+        message = MagicMock(
+            attributes={"published_at": published_at},
+            publish_time=datetime.fromtimestamp(now - 5, tz=timezone.utc),
+        )
+
+        lag.observe(message, now)
+
+        stats = lag.stats()
+        assert stats.end_to_end.observations == 0
+        assert stats.pubsub.observations == 1
+
+
+class TestLagStats:
+    def test_returns_the_lag_of_each_subscription(self):
+        subscription_lag("lag-stats-sub").end_to_end.observe(2.0)
+
+        stats = lag_stats()
+
+        assert stats["lag-stats-sub"].end_to_end.observations == 1
+        assert subscription_lag("lag-stats-sub") is subscription_lag("lag-stats-sub")
@@ -5,7 +5,12 @@ from unittest.mock import patch
 import pytest
 
 import rele
-from rele.middleware import DEPRECATED_HOOKS, BaseMiddleware, run_middleware_hook
+from rele.middleware import (
+    DEPRECATED_HOOKS,
+    BaseMiddleware,
+    PublishContext,
+    run_middleware_hook,
+)
 
 
 def _build_middleware_with_post_publish():
@@ -143,6 +148,27 @@ class TestRunMiddlewareHook:
         assert first.pre_publish_calls == [("some-topic", {"foo": "bar"}, {})]
         assert second.pre_publish_calls == [("some-topic", {"foo": "bar"}, {})]
 
+    def test_passes_the_context_only_to_hooks_that_accept_it(self, registered):
+        class MiddlewareWithContext(BaseMiddleware):
+            def post_publish_success(self, topic, data, attrs, context=None):
+                self.context = context
+
+        class MiddlewareWithoutContext(BaseMiddleware):
+            def post_publish_success(self, topic, data, attrs):
+                self.called = True
+
+        with_context = MiddlewareWithContext()
+        without_context = MiddlewareWithoutContext()
+        registered.extend([with_context, without_context])
+        context = PublishContext(payload=b"{}", body=b"{}")
+
+        run_middleware_hook(
+            "post_publish_success", "some-topic", {}, {}, context=context
+        )
+
+        assert with_context.context is context
+        assert without_context.called
+
     def test_raises_when_a_non_deprecated_hook_is_missing(self, registered):
         registered.append(MiddlewareWithoutPostPublish())
 
@@ -0,0 +1,172 @@
+import time
+from concurrent.futures import Future, TimeoutError
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from rele.outbox import Outbox
+
+
+def resolved_future():
+    future = Future()
+    future.set_result("message-id")
+    return future
+
+
+def failed_future():
+    future = Future()
+    future.set_exception(TimeoutError())
+    return future
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    outbox = Outbox(str(tmp_path / "outbox.db"), batch_size=2, flush_interval=0.01)
+    yield outbox
+    outbox.stop()
+
+
+@pytest.fixture
+def publisher():
+    publisher = MagicMock()
+    publisher.timeout = 1.0
+    publisher.send.side_effect = lambda *args, **kwargs: resolved_future()
+    return publisher
+
+
+class TestOutbox:
+    def test_claims_appended_messages_in_order(self, outbox):
+        outbox.append("topic-a", b'{"id": 1}', {"lang": "es"})
+        outbox.append("topic-b", b'{"id": 2}', {})
+
+        entries = outbox.claim(10)
+
+        assert [(e.topic, e.payload, e.attrs) for e in entries] == [
+            ("topic-a", b'{"id": 1}', {"lang": "es"}),
+            ("topic-b", b'{"id": 2}', {}),
+        ]
+
+    def test_keeps_messages_across_instances(self, outbox):
+        outbox.append("topic-a", b'{"id": 1}', {})
+
+        reopened = Outbox(outbox.path)
+
+        assert reopened.depth() == 1
+
+    def test_publishes_to_the_project_of_the_message(self, outbox, publisher):
+        outbox.append("topic-a", b"{}", {}, project="rele-pt")
+
+        outbox.flush_once(publisher)
+
+        publisher.send.assert_called_once_with(
+            "topic-a", b"{}", {}, project="rele-pt", throttle=False
+        )
+
+    def test_reports_depth_and_age_of_the_oldest_message(self, outbox):
+        assert outbox.depth() == 0
+        assert outbox.oldest_age() is None
+
+        outbox.append("topic-a", b"{}", {})
+        time.sleep(0.01)
+
+        assert outbox.depth() == 1
+        assert outbox.oldest_age() >= 0.01
+
+    def test_holds_delayed_messages_until_they_are_due(self, outbox):
+        outbox.append("topic-a", b'{"id": 1}', {}, deliver_at=time.time() + 60)
+        outbox.append("topic-b", b'{"id": 2}', {}, deliver_at=time.time() - 1)
+        outbox.append("topic-c", b'{"id": 3}', {})
+
+        entries = outbox.claim(10)
+
+        assert [e.topic for e in entries] == ["topic-c", "topic-b"]
+        assert outbox.depth() == 3
+
+    def test_age_only_counts_due_messages(self, outbox):
+        outbox.append("topic-a", b"{}", {}, deliver_at=time.time() + 60)
+
+        assert outbox.oldest_age() is None
+
+    def test_flush_once_publishes_a_batch_and_deletes_it(self, outbox, publisher):
+        for i in range(3):
+            outbox.append("topic-a", f'{{"id": {i}}}'.encode(), {"i": str(i)})
+
+        assert outbox.flush_once(publisher) == (2, 0)
+
+        publisher.send.assert_any_call(
+            "topic-a", b'{"id": 0}', {"i": "0"}, project=None, throttle=False
+        )
+        publisher.send.assert_any_call(
+            "topic-a", b'{"id": 1}', {"i": "1"}, project=None, throttle=False
+        )
+        assert outbox.depth() == 1
+
+    def test_flush_once_keeps_messages_that_failed(self, outbox, publisher):
+        outbox.append("topic-a", b'{"id": 1}', {})
+        outbox.append("topic-a", b'{"id": 2}', {})
+        publisher.send.side_effect = [resolved_future(), failed_future()]
+
+        assert outbox.flush_once(publisher) == (1, 1)
+
+        [entry] = outbox.claim(10)
+        assert entry.payload == b'{"id": 2}'
+
+    def test_flush_once_throttles_delayed_messages(self, outbox, publisher):
+        outbox.append("topic-a", b"{}", {}, deliver_at=time.time() - 1)
+
+        outbox.flush_once(publisher)
+
+        assert publisher.send.call_args.kwargs["throttle"] is True
+
+    def test_flush_once_keeps_messages_that_could_not_be_sent(self, outbox, publisher):
+        outbox.append("topic-a", b'{"id": 1}', {})
+        outbox.append("topic-a", b'{"id": 2}', {})
+        publisher.send.side_effect = [RuntimeError(), resolved_future()]
+
+        assert outbox.flush_once(publisher) == (1, 1)
+
+        [entry] = outbox.claim(10)
+        assert entry.payload == b'{"id": 1}'
+
+    def test_claimed_messages_are_skipped_by_other_outboxes(self, outbox):
+        outbox.append("topic-a", b'{"id": 1}', {})
+        outbox.append("topic-a", b'{"id": 2}', {})
+        other = Outbox(outbox.path)
+
+        outbox.claim(1)
+
+        assert [entry.payload for entry in other.claim(10)] == [b'{"id": 2}']
+
+    def test_claims_again_messages_whose_lease_expired(self, outbox):
+        outbox.append("topic-a", b"{}", {})
+        outbox.claim(10)
+        other = Outbox(outbox.path)
+
+        with patch("rele.outbox.time.time", return_value=time.time() + 61):
+            assert len(other.claim(10)) == 1
+
+    def test_outboxes_sharing_a_file_publish_each_message_once(self, outbox, publisher):
+        for _ in range(5):
+            outbox.append("topic-a", b"{}", {})
+        other = Outbox(outbox.path, batch_size=2, flush_interval=0.01)
+
+        outbox.start(publisher)
+        other.start(publisher)
+
+        deadline = time.time() + 2
+        while outbox.depth() and time.time() < deadline:
+            time.sleep(0.01)
+        other.stop()
+        assert publisher.send.call_count == 5
+
+    def test_background_thread_drains_the_outbox(self, outbox, publisher):
+        for _ in range(5):
+            outbox.append("topic-a", b"{}", {})
+
+        outbox.start(publisher)
+
+        deadline = time.time() + 2
+        while outbox.depth() and time.time() < deadline:
+            time.sleep(0.01)
+        assert outbox.depth() == 0
+        assert publisher.send.call_count == 5
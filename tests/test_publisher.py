@@ -1,16 +1,33 @@
 import concurrent
 import decimal
+import gzip
 import importlib.util
+import json
 import logging
 import os
+import time
 from concurrent.futures import TimeoutError
+from datetime import datetime, timezone
 from unittest.mock import ANY, MagicMock, patch
 
 import pytest
+from google.api_core import exceptions
 from google.cloud.pubsub_v1 import PublisherClient
 
 import rele.client
 from rele import Publisher
+from rele.claim_check import (
+    CLAIM_CHECK_ATTRIBUTE,
+    ClaimCheck,
+    LocalFileSystemBlobStore,
+)
+from rele.client import FanoutPublishError, FlushResult
+from rele.compression import COMPRESSION_ATTRIBUTE, Compressor
+from rele.delayed import DelayQueue
+from rele.middleware import BaseMiddleware
+from rele.outbox import Outbox
+from rele.rate_limit import PublishRateLimit, RateLimit, RateLimitError
+from rele.retry_policy import PublishRetryPolicy
 
 
 def _load_client_module_with_env(env):
@@ -33,7 +50,7 @@ def _load_client_module_with_env(env):
 
 @pytest.mark.usefixtures("publisher", "time_mock")
 class TestPublisher:
-    @patch("rele.client.pubsub_v1.PublisherClient", autospec=True)
+    @patch("rele.client.publisher_client", autospec=True)
     def test_initialises_with_correct_parameters(self, mock_publisher_client, config):
         Publisher(
             gc_project_id=config.gc_project_id,
@@ -42,11 +59,15 @@ class TestPublisher:
             timeout=config.publisher_timeout,
             blocking=config.publisher_blocking,
             client_options=config.client_options,
+            channel_options={"grpc.keepalive_time_ms": 20000},
+            grpc_compression="gzip",
         )
 
         mock_publisher_client.assert_called_with(
-            credentials=ANY,
+            config.credentials,
             client_options={"api_endpoint": "custom-api.interconnect.example.com"},
+            channel_options={"grpc.keepalive_time_ms": 20000},
+            compression="gzip",
         )
 
     @patch("rele.client.pubsub_v1.PublisherClient", autospec=True)
@@ -74,26 +95,31 @@ class TestPublisher:
         mock_future.result.assert_called_once_with(timeout=configured_timeout)
         assert publisher._timeout == configured_timeout
 
-    @patch("rele.client.pubsub_v1.PublisherClient", autospec=True)
-    def test_initialises_without_credentials_when_emulator_host_is_set(
-        self, mock_publisher_client, config
-    ):
+    def test_initialises_without_credentials_when_emulator_host_is_set(self, config):
         client_module = _load_client_module_with_env(
             {"PUBSUB_EMULATOR_HOST": "localhost:8085"}
         )
         assert client_module.USE_EMULATOR is True
 
-        client_module.Publisher(
-            gc_project_id=config.gc_project_id,
-            credentials=config.credentials,
-            encoder=config.encoder,
-            timeout=config.publisher_timeout,
-            blocking=config.publisher_blocking,
+        with patch.object(
+            client_module, "publisher_client", autospec=True
+        ) as mock_publisher_client:
+            client_module.Publisher(
+                gc_project_id=config.gc_project_id,
+                credentials=config.credentials,
+                encoder=config.encoder,
+                timeout=config.publisher_timeout,
+                blocking=config.publisher_blocking,
+                client_options=config.client_options,
+            )
+
+        mock_publisher_client.assert_called_once_with(
+            None,
             client_options=config.client_options,
+            channel_options=None,
+            compression=None,
         )
 
-        mock_publisher_client.assert_called_once_with()
-
     def test_returns_future_when_published_called(self, published_at, publisher):
         message = {"foo": "bar"}
         result = publisher.publish(
@@ -149,6 +175,17 @@ class TestPublisher:
             published_at=str(published_at),
         )
 
+    def test_publishes_to_a_topic_of_another_project(self, published_at, publisher):
+        publisher._client.topic_path.side_effect = PublisherClient.topic_path
+
+        publisher.publish(topic="order-cancelled", data={"foo": "bar"}, project="pt")
+
+        publisher._client.publish.assert_called_once_with(
+            "projects/pt/topics/order-cancelled",
+            b'{"foo": "bar"}',
+            published_at=str(published_at),
+        )
+
     def test_publishes_data_with_custom_encoder(self, publisher, custom_encoder):
         publisher._encoder = custom_encoder
         publisher.publish(topic="order-cancelled", data=decimal.Decimal("1.20"))
@@ -254,3 +291,490 @@ class TestPublisher:
         )
 
         assert result is mock_future
+
+    def test_stores_message_in_outbox_instead_of_publishing(
+        self, published_at, publisher, tmp_path
+    ):
+        publisher._outbox = Outbox(str(tmp_path / "outbox.db"))
+
+        result = publisher.publish(
+            topic="order-cancelled", data={"foo": "bar"}, blocking=True
+        )
+
+        assert result is None
+        publisher._client.publish.assert_not_called()
+        [entry] = publisher._outbox.claim(10)
+        assert entry.topic == "order-cancelled"
+        assert entry.payload == b'{"foo": "bar"}'
+        assert entry.attrs == {"published_at": str(published_at)}
+
+    def test_exposes_the_outbox_backlog(self, publisher, tmp_path):
+        publisher._outbox = Outbox(str(tmp_path / "outbox.db"))
+        publisher._outbox.append("order-cancelled", b"{}", {})
+
+        assert publisher.outbox.depth() == 1
+        assert publisher.delayed_store is None
+
+    def test_offloads_large_payloads_to_the_claim_check(
+        self, published_at, publisher, tmp_path
+    ):
+        store = LocalFileSystemBlobStore(str(tmp_path))
+        publisher._claim_check = ClaimCheck(store, threshold=10)
+
+        publisher.publish(topic="order-cancelled", data={"foo": "a large value"})
+
+        _, kwargs = publisher._client.publish.call_args
+        key = kwargs[CLAIM_CHECK_ATTRIBUTE]
+        assert publisher._client.publish.call_args.args[1] == b""
+        assert key.startswith("order-cancelled/")
+        assert store.get(key) == b'{"foo": "a large value"}'
+
+    def test_compresses_payloads_above_the_compressor_threshold(
+        self, published_at, publisher
+    ):
+        publisher._compressor = Compressor(threshold=10)
+        data = {"foo": "bar" * 100}
+
+        publisher.publish(topic="order-cancelled", data=data)
+
+        args, kwargs = publisher._client.publish.call_args
+        assert kwargs[COMPRESSION_ATTRIBUTE] == "gzip"
+        assert json.loads(gzip.decompress(args[1])) == data
+
+
+class TestPublisherHooks:
+    def test_passes_the_encoded_payload_to_post_publish_success(
+        self, publisher, config, mock_future
+    ):
+        class RecordingMiddleware(BaseMiddleware):
+            def post_publish_success(self, topic, data, attrs, context=None):
+                self.context = context
+
+        middleware = RecordingMiddleware()
+        publisher._compressor = Compressor(threshold=10)
+        data = {"foo": "bar" * 100}
+
+        with patch("rele.middleware._middlewares", [middleware]):
+            publisher.publish(topic="order-cancelled", data=data, blocking=True)
+
+        assert json.loads(middleware.context.payload) == data
+        assert middleware.context.size == len(middleware.context.payload)
+        assert gzip.decompress(middleware.context.body) == middleware.context.payload
+
+
+@pytest.mark.usefixtures("time_mock")
+class TestPublisherFanout:
+    def futures(self, *outcomes):
+        result = []
+        for outcome in outcomes:
+            future = concurrent.futures.Future()
+            if isinstance(outcome, Exception):
+                future.set_exception(outcome)
+            else:
+                future.set_result(outcome)
+            result.append(future)
+        return result
+
+    def test_publishes_the_same_body_to_every_topic(self, published_at, publisher):
+        publisher._client.publish.side_effect = self.futures("id-1", "id-2")
+
+        result = publisher.publish_fanout(
+            ["order-created", "order-created-analytics"], {"foo": "bar"}, lang="es"
+        )
+
+        assert list(result) == ["order-created", "order-created-analytics"]
+        assert [c.args[1] for c in publisher._client.publish.call_args_list] == [
+            b'{"foo": "bar"}',
+            b'{"foo": "bar"}',
+        ]
+        assert [c.kwargs for c in publisher._client.publish.call_args_list] == [
+            {"lang": "es", "published_at": str(published_at)},
+            {"lang": "es", "published_at": str(published_at)},
+        ]
+
+    def test_encodes_the_data_once(self, publisher):
+        publisher._client.publish.side_effect = self.futures("id-1", "id-2")
+
+        with patch("rele.client.json.dumps", wraps=json.dumps) as mock_dumps:
+            publisher.publish_fanout(["topic-a", "topic-b"], {"foo": "bar"})
+
+        mock_dumps.assert_called_once()
+
+    def test_runs_the_hooks_of_every_topic(self, publisher, mock_post_publish_failure):
+        publisher._client.publish.side_effect = self.futures("id-1", "id-2")
+
+        with patch(
+            "rele.contrib.logging_middleware.LoggingMiddleware.post_publish_success"
+        ) as mock_success:
+            publisher.publish_fanout(["topic-a", "topic-b"], {}, blocking=True)
+
+        assert [c.args[0] for c in mock_success.call_args_list] == [
+            "topic-a",
+            "topic-b",
+        ]
+
+    def test_reports_the_failed_topics_when_blocking(
+        self, publisher, mock_post_publish_failure
+    ):
+        publisher._client.publish.side_effect = self.futures("id-1", TimeoutError())
+
+        with pytest.raises(FanoutPublishError) as error:
+            publisher.publish_fanout(["topic-a", "topic-b"], {}, blocking=True)
+
+        assert list(error.value.errors) == ["topic-b"]
+        assert error.value.futures["topic-a"].result() == "id-1"
+        mock_post_publish_failure.assert_called_once_with("topic-b", ANY, {})
+
+    def test_returns_the_futures_when_failing_without_raising(
+        self, publisher, mock_post_publish_failure
+    ):
+        publisher._client.publish.side_effect = self.futures("id-1", TimeoutError())
+
+        result = publisher.publish_fanout(
+            ["topic-a", "topic-b"], {}, blocking=True, raise_exception=False
+        )
+
+        assert result["topic-a"].result() == "id-1"
+        assert isinstance(result["topic-b"].exception(), TimeoutError)
+
+
+class TestPublisherWarmup:
+    @patch("rele.client.grpc.channel_ready_future")
+    def test_refreshes_credentials_and_waits_for_the_channel(
+        self, mock_channel_ready, publisher
+    ):
+        credentials = MagicMock(valid=False)
+        publisher._credentials = credentials
+
+        result = publisher.warmup(timeout=5.0)
+
+        credentials.refresh.assert_called_once()
+        mock_channel_ready.assert_called_once_with(
+            publisher._client.transport.grpc_channel
+        )
+        mock_channel_ready.return_value.result.assert_called_once_with(timeout=5.0)
+        assert result.setup_seconds == 0.0
+        assert result.total_seconds >= 0.0
+
+    @patch("rele.client.grpc.channel_ready_future")
+    def test_does_not_refresh_valid_credentials(self, mock_channel_ready, publisher):
+        credentials = MagicMock(valid=True)
+        publisher._credentials = credentials
+
+        publisher.warmup()
+
+        credentials.refresh.assert_not_called()
+        mock_channel_ready.return_value.result.assert_called_once_with(
+            timeout=publisher._timeout
+        )
+
+
+class TestPublisherFlush:
+    def test_waits_for_non_blocking_publishes(self, publisher):
+        futures = [concurrent.futures.Future(), concurrent.futures.Future()]
+        publisher._client.publish.side_effect = futures
+        publisher.publish(topic="order-cancelled", data={"id": 1})
+        publisher.publish(topic="order-cancelled", data={"id": 2})
+        futures[0].set_result("message-id")
+        futures[1].set_exception(exceptions.ServiceUnavailable("unavailable"))
+
+        result = publisher.flush(timeout=1.0)
+
+        assert result == FlushResult(published=1, failed=1, pending=0)
+
+    def test_reports_publishes_still_in_flight_when_timing_out(self, publisher):
+        publisher._client.publish.return_value = concurrent.futures.Future()
+        publisher.publish(topic="order-cancelled", data={"id": 1})
+
+        result = publisher.flush(timeout=0.01)
+
+        assert result == FlushResult(published=0, failed=0, pending=1)
+
+    def test_resets_the_summary_after_each_flush(self, publisher):
+        future = concurrent.futures.Future()
+        future.set_result("message-id")
+        publisher._client.publish.return_value = future
+        publisher.publish(topic="order-cancelled", data={"id": 1})
+        publisher.flush()
+
+        assert publisher.flush() == FlushResult(published=0, failed=0, pending=0)
+
+
+class TestPublisherRetries:
+    @pytest.fixture
+    def retry_policy(self):
+        return PublishRetryPolicy(max_attempts=3, initial_backoff=0.001, jitter=False)
+
+    @pytest.fixture
+    def publisher(self, publisher, retry_policy):
+        publisher._retry_policy = retry_policy
+        return publisher
+
+    @pytest.fixture
+    def mock_post_publish_retry(self):
+        with patch(
+            "rele.contrib.logging_middleware.LoggingMiddleware.post_publish_retry"
+        ) as mock:
+            yield mock
+
+    def futures(self, *outcomes):
+        result = []
+        for outcome in outcomes:
+            future = concurrent.futures.Future()
+            if isinstance(outcome, Exception):
+                future.set_exception(outcome)
+            else:
+                future.set_result(outcome)
+            result.append(future)
+        return result
+
+    def test_retries_blocking_publish_on_transient_errors(
+        self, publisher, mock_post_publish_retry
+    ):
+        error = exceptions.ServiceUnavailable("unavailable")
+        publisher._client.publish.side_effect = self.futures(error, "message-id")
+
+        future = publisher.publish(topic="order-cancelled", data={}, blocking=True)
+
+        assert future.result() == "message-id"
+        assert publisher._client.publish.call_count == 2
+        mock_post_publish_retry.assert_called_once_with("order-cancelled", error, 1)
+
+    def test_runs_failure_hook_when_blocking_retries_are_exhausted(
+        self, publisher, mock_post_publish_failure
+    ):
+        error = exceptions.ResourceExhausted("quota")
+        publisher._client.publish.side_effect = self.futures(error, error, error)
+
+        with pytest.raises(exceptions.ResourceExhausted):
+            publisher.publish(topic="order-cancelled", data={}, blocking=True)
+
+        assert publisher._client.publish.call_count == 3
+        mock_post_publish_failure.assert_called_once_with("order-cancelled", error, {})
+
+    def test_does_not_retry_errors_that_are_not_transient(self, publisher):
+        publisher._client.publish.side_effect = self.futures(
+            exceptions.NotFound("topic")
+        )
+
+        with pytest.raises(exceptions.NotFound):
+            publisher.publish(topic="order-cancelled", data={}, blocking=True)
+
+        assert publisher._client.publish.call_count == 1
+
+    def test_retries_non_blocking_publish_in_the_background(
+        self, publisher, mock_post_publish_retry
+    ):
+        error = exceptions.DeadlineExceeded("deadline")
+        publisher._client.publish.side_effect = self.futures(error, error, "message-id")
+
+        future = publisher.publish(topic="order-cancelled", data={})
+
+        assert future.result(timeout=1) == "message-id"
+        assert publisher._client.publish.call_count == 3
+        assert mock_post_publish_retry.call_count == 2
+
+    def test_non_blocking_future_fails_when_retries_are_exhausted(self, publisher):
+        error = exceptions.ServiceUnavailable("unavailable")
+        publisher._client.publish.side_effect = self.futures(error, error, error)
+
+        future = publisher.publish(topic="order-cancelled", data={})
+
+        with pytest.raises(exceptions.ServiceUnavailable):
+            future.result(timeout=1)
+        assert publisher._client.publish.call_count == 3
+
+    def test_retries_republish_without_encoding_the_payload_again(self, publisher):
+        error = exceptions.ServiceUnavailable("unavailable")
+        publisher._client.publish.side_effect = self.futures(error, "message-id")
+
+        message_id = publisher.republish(
+            "order-cancelled-retry-10s", b"payload", {"rele_retry_attempt": "1"}
+        )
+
+        assert message_id == "message-id"
+        publisher._client.publish.assert_called_with(
+            ANY, b"payload", rele_retry_attempt="1"
+        )
+
+
+@pytest.mark.usefixtures("time_mock")
+class TestPublisherRateLimit:
+    @pytest.fixture
+    def mock_post_publish_throttle(self):
+        with patch(
+            "rele.contrib.logging_middleware.LoggingMiddleware.post_publish_throttle"
+        ) as mock:
+            yield mock
+
+    @pytest.fixture
+    def rate_limit(self):
+        with patch.object(PublishRateLimit, "acquire", return_value=0.25) as acquire:
+            yield acquire
+
+    @patch("rele.client.time.sleep")
+    def test_blocks_until_the_message_fits(
+        self, mock_sleep, publisher, rate_limit, mock_post_publish_throttle
+    ):
+        publisher._rate_limit = PublishRateLimit(total=RateLimit(1))
+
+        publisher.publish(topic="order-cancelled", data={"id": 1})
+
+        rate_limit.assert_called_once_with("order-cancelled", len(b'{"id": 1}'))
+        mock_sleep.assert_called_once_with(0.25)
+        mock_post_publish_throttle.assert_called_once_with(
+            "order-cancelled", 0.25, False
+        )
+        publisher._client.publish.assert_called_once()
+
+    @patch("rele.client.time.sleep")
+    def test_defers_non_blocking_publishes(
+        self, mock_sleep, publisher, rate_limit, published_at
+    ):
+        publisher._rate_limit = PublishRateLimit(total=RateLimit(1), mode="defer")
+        published = concurrent.futures.Future()
+        publisher._client.publish.return_value = published
+
+        with patch.object(DelayQueue, "schedule") as mock_schedule:
+            future = publisher.publish(topic="order-cancelled", data={"id": 1})
+
+        mock_sleep.assert_not_called()
+        publisher._client.publish.assert_not_called()
+        due, publish_later = mock_schedule.call_args.args
+        assert due == published_at + 0.25
+
+        publish_later()
+        published.set_result("message-id")
+
+        assert future.result(timeout=1) == "message-id"
+
+    @patch("rele.client.time.sleep")
+    def test_blocks_blocking_publishes_when_deferring(
+        self, mock_sleep, publisher, rate_limit, mock_future
+    ):
+        publisher._rate_limit = PublishRateLimit(total=RateLimit(1), mode="defer")
+        publisher._client.publish.return_value = mock_future
+
+        publisher.publish(topic="order-cancelled", data={"id": 1}, blocking=True)
+
+        mock_sleep.assert_called_once_with(0.25)
+
+    def test_rejects_messages_over_the_limit(
+        self, publisher, mock_post_publish_throttle
+    ):
+        publisher._rate_limit = PublishRateLimit(
+            topics={"order-cancelled": RateLimit(messages_per_second=1)},
+            mode="reject",
+        )
+        publisher.publish(topic="order-cancelled", data={"id": 1})
+
+        with pytest.raises(RateLimitError):
+            publisher.publish(topic="order-cancelled", data={"id": 2})
+
+        assert publisher._client.publish.call_count == 1
+        mock_post_publish_throttle.assert_called_once_with("order-cancelled", ANY, True)
+
+
+class TestPublisherDelayed:
+    @pytest.fixture
+    def mock_schedule(self):
+        with patch.object(DelayQueue, "schedule") as mock:
+            yield mock
+
+    def test_holds_delayed_messages_in_memory(self, publisher, mock_schedule):
+        published = concurrent.futures.Future()
+        publisher._client.publish.return_value = published
+
+        future = publisher.publish(
+            topic="order-cancelled", data={"id": 1}, delay=900, blocking=True
+        )
+
+        publisher._client.publish.assert_not_called()
+        due, publish_later = mock_schedule.call_args.args
+        assert due == pytest.approx(time.time() + 900, abs=5)
+
+        publish_later()
+        published.set_result("message-id")
+
+        assert future.result(timeout=1) == "message-id"
+        assert "delay" not in publisher._client.publish.call_args.kwargs
+
+    def test_publishes_when_due(self, publisher):
+        publisher._client.publish.return_value = concurrent.futures.Future()
+        publisher._client.publish.return_value.set_result("message-id")
+
+        future = publisher.publish(
+            topic="order-cancelled", data={"id": 1}, deliver_at=time.time() + 0.01
+        )
+
+        assert future.result(timeout=1) == "message-id"
+        assert publisher.delayed == 0
+
+    def test_stores_long_delays_in_the_delayed_store(self, publisher, mock_schedule):
+        publisher._delayed_store = MagicMock(spec=Outbox)
+
+        result = publisher.publish(topic="order-cancelled", data={"id": 1}, delay=900)
+
+        assert result is None
+        mock_schedule.assert_not_called()
+        publisher._delayed_store.append.assert_called_once_with(
+            "order-cancelled",
+            b'{"id": 1}',
+            {"published_at": ANY},
+            project=None,
+            deliver_at=pytest.approx(time.time() + 900, abs=5),
+        )
+
+    def test_stamps_delayed_messages_with_their_due_time(
+        self, publisher, mock_schedule
+    ):
+        publisher._delayed_store = MagicMock(spec=Outbox)
+
+        publisher.publish(topic="order-cancelled", data={"id": 1}, delay=900)
+
+        attrs = publisher._delayed_store.append.call_args.args[2]
+        assert (
+            float(attrs["published_at"])
+            == (publisher._delayed_store.append.call_args.kwargs["deliver_at"])
+        )
+
+    def test_keeps_short_delays_in_memory(self, publisher, mock_schedule):
+        publisher._delayed_store = MagicMock(spec=Outbox)
+
+        publisher.publish(topic="order-cancelled", data={"id": 1}, delay=10)
+
+        publisher._delayed_store.append.assert_not_called()
+        mock_schedule.assert_called_once()
+
+    def test_stores_delayed_messages_in_the_outbox(self, publisher, mock_schedule):
+        publisher._outbox = MagicMock(spec=Outbox)
+        deliver_at = datetime(2030, 1, 1, tzinfo=timezone.utc)
+
+        publisher.publish(
+            topic="order-cancelled", data={"id": 1}, deliver_at=deliver_at
+        )
+
+        assert publisher._outbox.append.call_args.kwargs["deliver_at"] == (
+            deliver_at.timestamp()
+        )
+        mock_schedule.assert_not_called()
+
+    def test_delays_every_topic_of_a_fanout(self, publisher, mock_schedule):
+        futures = publisher.publish_fanout(
+            ["order-cancelled", "order-cancelled-analytics"], {"id": 1}, delay=900
+        )
+
+        assert set(futures) == {"order-cancelled", "order-cancelled-analytics"}
+        assert mock_schedule.call_count == 2
+        publisher._client.publish.assert_not_called()
+
+    def test_stop_drops_delayed_messages_held_in_memory(self, publisher, caplog):
+        future = publisher.publish(topic="order-cancelled", data={"id": 1}, delay=900)
+        assert publisher.delayed == 1
+
+        publisher.stop()
+
+        assert publisher.delayed == 0
+        assert "Dropped 1 delayed messages" in caplog.text
+        with pytest.raises(RuntimeError, match="order-cancelled"):
+            future.result(timeout=0)
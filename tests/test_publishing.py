@@ -1,26 +1,32 @@
+import os
 from types import SimpleNamespace
-from unittest.mock import ANY, MagicMock, patch
+from unittest.mock import ANY, MagicMock, call, patch
 
 import pytest
 
 from rele import Publisher, publishing
+from rele.client import FlushResult, WarmupResult
+from rele.config import Config
+from rele.outbox import Outbox
 from tests import settings
 
 
 @pytest.fixture
 def without_global_publisher():
     original_publisher = publishing._publisher
+    original_config = publishing._publisher_config
     publishing._publisher = None
+    publishing._publisher_config = None
     yield
     publishing._publisher = original_publisher
+    publishing._publisher_config = original_config
 
 
 class TestPublish:
     @patch("rele.publishing.Publisher", autospec=True)
     def test_instantiates_publisher_and_publishes_when_does_not_exist(
-        self, mock_publisher
+        self, mock_publisher, without_global_publisher
     ):
-        publishing._publisher = None
         with patch("rele.publishing.discover") as mock_discover:
             mock_discover.sub_modules.return_value = settings, []
 
@@ -31,8 +37,9 @@ class TestPublish:
                 "order-cancelled", {"foo": "bar"}, myattr="hello"
             )
 
-    def test_raises_error_when_publisher_does_not_exists_and_settings_not_found(self):
-        publishing._publisher = None
+    def test_raises_error_when_publisher_does_not_exists_and_settings_not_found(
+        self, without_global_publisher
+    ):
         message = {"foo": "bar"}
 
         with pytest.raises(ValueError):
@@ -61,6 +68,7 @@ class TestPublish:
         assert publishing._publisher is None
 
 
+@pytest.mark.usefixtures("without_global_publisher")
 class TestInitGlobalPublisher:
     @patch("rele.publishing.Publisher", autospec=True)
     def test_creates_global_publisher_when_published_called(
@@ -98,4 +106,276 @@ class TestInitGlobalPublisher:
             timeout=3.0,
             blocking=False,
             client_options={"api_endpoint": "custom-api.interconnect.example.com"},
+            outbox=None,
+            retry_policy=None,
+            claim_check=None,
+            compressor=None,
+            channel_options=None,
+            grpc_compression=None,
+            rate_limit=None,
+            delayed_store=None,
+            delayed_store_threshold=60.0,
+        )
+
+    @patch("rele.publishing.Publisher", autospec=True)
+    def test_creates_publisher_with_outbox_when_outbox_path_is_set(
+        self, mock_publisher, config, tmp_path
+    ):
+        publishing._publisher = None
+        config.outbox_path = str(tmp_path / "outbox.db")
+        publishing.init_global_publisher(config)
+
+        outbox = mock_publisher.call_args.kwargs["outbox"]
+        assert isinstance(outbox, Outbox)
+        assert outbox.path == config.outbox_path
+        assert outbox.batch_size == 500
+
+
+@pytest.mark.usefixtures("without_global_publisher")
+class TestProjectPublishers:
+    @pytest.fixture
+    def project_config(self):
+        return Config(
+            {
+                "GC_PROJECT_ID": "rele-es",
+                "GC_CREDENTIALS_PATH": "tests/dummy-pub-sub-credentials.json",
+                "PUBLISHER_PROJECTS": {
+                    "rele-pt": {"CLIENT_OPTIONS": {"api_endpoint": "pubsub.pt"}},
+                    "rele-br": {"CLIENT_OPTIONS": {"api_endpoint": "pubsub.pt"}},
+                },
+            }
+        )
+
+    @pytest.fixture
+    def mock_publisher_class(self):
+        with patch("rele.publishing.Publisher", autospec=True) as mock:
+            mock.side_effect = lambda **kwargs: MagicMock(spec=Publisher)
+            yield mock
+        publishing._project_publishers.clear()
+
+    def test_uses_the_global_publisher_for_projects_without_overrides(
+        self, project_config, mock_publisher_class
+    ):
+        publisher = publishing.init_global_publisher(project_config)
+
+        assert publishing.get_publisher("rele-fr") is publisher
+        assert publishing.get_publisher() is publisher
+
+    def test_shares_a_publisher_between_projects_with_the_same_options(
+        self, project_config, mock_publisher_class
+    ):
+        publisher = publishing.init_global_publisher(project_config)
+
+        pt_publisher = publishing.get_publisher("rele-pt")
+
+        assert pt_publisher is not publisher
+        assert publishing.get_publisher("rele-br") is pt_publisher
+        assert mock_publisher_class.call_count == 2
+        assert mock_publisher_class.call_args.kwargs["client_options"] == {
+            "api_endpoint": "pubsub.pt"
+        }
+
+    def test_publishes_with_the_publisher_of_the_project(
+        self, project_config, mock_publisher_class
+    ):
+        publishing.init_global_publisher(project_config)
+
+        publishing.publish(topic="order-cancelled", data={}, project="rele-pt")
+
+        publishing.get_publisher("rele-pt").publish.assert_called_once_with(
+            "order-cancelled", {}, project="rele-pt"
+        )
+
+    def test_raises_when_a_project_shares_the_outbox(
+        self, mock_publisher_class, tmp_path
+    ):
+        publishing.init_global_publisher(
+            Config(
+                {
+                    "GC_CREDENTIALS_PATH": "tests/dummy-pub-sub-credentials.json",
+                    "OUTBOX_PATH": str(tmp_path / "outbox.db"),
+                    "PUBLISHER_PROJECTS": {"rele-pt": {"CLIENT_OPTIONS": {}}},
+                }
+            )
         )
+
+        with pytest.raises(ValueError):
+            publishing.get_publisher("rele-pt")
+
+
+class TestForkSafety:
+    @pytest.fixture
+    def mock_publisher(self, without_global_publisher):
+        publishing._publisher = MagicMock(spec=Publisher)
+        return publishing._publisher
+
+    def test_forgets_the_inherited_publishers_after_forking(self, mock_publisher):
+        publishing._project_publishers[(None, "rele-pt")] = MagicMock(spec=Publisher)
+
+        publishing._after_fork_in_child()
+
+        assert publishing._publisher is None
+        assert publishing._project_publishers == {}
+        mock_publisher.stop.assert_not_called()
+
+    @patch("rele.publishing.Publisher", autospec=True)
+    def test_rebuilds_the_publisher_from_the_config_after_forking(
+        self, mock_publisher_class, without_global_publisher, config
+    ):
+        publishing.init_global_publisher(config)
+        publishing._after_fork_in_child()
+
+        publishing.publish(topic="order-cancelled", data={"foo": "bar"})
+
+        assert mock_publisher_class.call_count == 2
+        mock_publisher_class.return_value.publish.assert_called_once_with(
+            "order-cancelled", {"foo": "bar"}
+        )
+
+    @pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork")
+    def test_forked_child_does_not_inherit_the_publisher(self, mock_publisher):
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.write(write_fd, b"0" if publishing._publisher is None else b"1")
+            os._exit(0)
+
+        os.waitpid(pid, 0)
+        assert os.read(read_fd, 1) == b"0"
+        assert publishing._publisher is mock_publisher
+        mock_publisher.stop.assert_not_called()
+
+
+@pytest.mark.usefixtures("without_global_publisher")
+class TestPublishFanout:
+    def test_publishes_with_the_global_publisher(self):
+        publishing._publisher = MagicMock(spec=Publisher)
+
+        publishing.publish_fanout(["topic-a", "topic-b"], {"foo": "bar"}, lang="es")
+
+        publishing._publisher.publish_fanout.assert_called_once_with(
+            ["topic-a", "topic-b"], {"foo": "bar"}, lang="es"
+        )
+
+    def test_records_a_message_per_topic_while_buffering(self):
+        publishing._publisher = MagicMock(spec=Publisher)
+        token = publishing.start_buffer()
+
+        publishing.publish_fanout(["topic-a", "topic-b"], {"foo": "bar"})
+
+        assert publishing.stop_buffer(token) == [
+            ("topic-a", {"foo": "bar"}, {}),
+            ("topic-b", {"foo": "bar"}, {}),
+        ]
+        publishing._publisher.publish_fanout.assert_not_called()
+
+
+@pytest.mark.usefixtures("without_global_publisher")
+class TestWarmup:
+    def test_warms_up_the_global_publisher(self):
+        publishing._publisher = MagicMock(spec=Publisher)
+        publishing._publisher.warmup.return_value = WarmupResult(0.0, 0.2, 0.3)
+
+        result = publishing.warmup(timeout=5.0)
+
+        publishing._publisher.warmup.assert_called_once_with(timeout=5.0)
+        assert result.credentials_seconds == 0.2
+        assert result.channel_seconds == 0.3
+        assert result.setup_seconds >= 0.0
+
+    @patch("rele.publishing.Publisher", autospec=True)
+    def test_sets_up_rele_from_the_discovered_settings(self, mock_publisher):
+        mock_publisher.return_value.warmup.return_value = WarmupResult(0.0, 0.0, 0.0)
+        with patch("rele.publishing.discover") as mock_discover:
+            mock_discover.sub_modules.return_value = settings, []
+
+            publishing.warmup()
+
+        mock_publisher.assert_called_once()
+        mock_publisher.return_value.warmup.assert_called_once()
+
+
+@pytest.mark.usefixtures("without_global_publisher")
+class TestFlush:
+    def test_returns_an_empty_summary_without_publisher(self):
+        assert publishing.flush() == FlushResult(published=0, failed=0, pending=0)
+
+    def test_flushes_the_global_publisher(self):
+        publishing._publisher = MagicMock(spec=Publisher)
+        publishing._publisher.flush.return_value = FlushResult(2, 0, 0)
+
+        result = publishing.flush(timeout=5.0)
+
+        assert result == FlushResult(2, 0, 0)
+        publishing._publisher.flush.assert_called_once_with(
+            timeout=pytest.approx(5.0, abs=0.1)
+        )
+
+    def test_waits_for_buffered_messages_before_flushing(self):
+        publishing._publisher = MagicMock(spec=Publisher)
+        token = publishing.start_buffer()
+        publishing.publish(topic="order-cancelled", data={"id": 1})
+        publishing.flush_buffer(token)
+
+        publishing.flush()
+
+        publishing._publisher.publish.assert_called_once_with(
+            "order-cancelled", {"id": 1}, blocking=False
+        )
+
+
+class TestPublishBuffer:
+    @pytest.fixture
+    def mock_publisher(self):
+        original_publisher = publishing._publisher
+        publishing._publisher = MagicMock(spec=Publisher)
+        yield publishing._publisher
+        publishing._publisher = original_publisher
+
+    def test_publish_only_records_messages_while_buffering(self, mock_publisher):
+        token = publishing.start_buffer()
+        publishing.publish(topic="order-cancelled", data={"foo": "bar"})
+
+        mock_publisher.publish.assert_not_called()
+        assert publishing.stop_buffer(token) == [
+            ("order-cancelled", {"foo": "bar"}, {})
+        ]
+
+    def test_publishes_directly_once_buffer_is_stopped(self, mock_publisher):
+        token = publishing.start_buffer()
+        publishing.stop_buffer(token)
+
+        publishing.publish(topic="order-cancelled", data={"foo": "bar"})
+
+        mock_publisher.publish.assert_called_once_with(
+            "order-cancelled", {"foo": "bar"}
+        )
+
+    def test_flush_publishes_in_background_grouped_by_topic(self, mock_publisher):
+        token = publishing.start_buffer()
+        publishing.publish(topic="topic-b", data={"id": 1})
+        publishing.publish(topic="topic-a", data={"id": 2}, lang="es")
+        publishing.publish(topic="topic-b", data={"id": 3}, blocking=True)
+
+        publishing.flush_buffer(token).result(timeout=1)
+
+        assert mock_publisher.publish.call_args_list == [
+            call("topic-a", {"id": 2}, lang="es", blocking=False),
+            call("topic-b", {"id": 1}, blocking=False),
+            call("topic-b", {"id": 3}, blocking=False),
+        ]
+
+    def test_flush_returns_none_when_nothing_was_buffered(self, mock_publisher):
+        token = publishing.start_buffer()
+
+        assert publishing.flush_buffer(token) is None
+
+    def test_keeps_publishing_the_rest_when_a_message_fails(self, mock_publisher):
+        mock_publisher.publish.side_effect = [ValueError(), None]
+        token = publishing.start_buffer()
+        publishing.publish(topic="topic-a", data={"id": 1})
+        publishing.publish(topic="topic-a", data={"id": 2})
+
+        publishing.flush_buffer(token).result(timeout=1)
+
+        assert mock_publisher.publish.call_count == 2
@@ -0,0 +1,112 @@
+from unittest.mock import patch
+
+import pytest
+
+from rele.rate_limit import PublishRateLimit, RateLimit, RateLimitError
+
+
+@pytest.fixture
+def clock():
+    with patch("rele.rate_limit.time.monotonic") as mock:
+        mock.return_value = 100.0
+        yield mock
+
+
+class TestRateLimit:
+    def test_requires_a_rate(self):
+        with pytest.raises(ValueError, match="must be set"):
+            RateLimit()
+
+    @pytest.mark.parametrize(
+        "kwargs",
+        [
+            {"messages_per_second": 0},
+            {"bytes_per_second": -1},
+            {"messages_per_second": 1, "burst": 0},
+        ],
+    )
+    def test_raises_on_wrong_parameters(self, kwargs):
+        with pytest.raises(ValueError):
+            RateLimit(**kwargs)
+
+
+class TestPublishRateLimit:
+    def test_lets_a_burst_through_and_then_delays(self, clock):
+        rate_limit = PublishRateLimit(
+            topics={"order-created": RateLimit(messages_per_second=2)}
+        )
+
+        assert rate_limit.acquire("order-created", 10) == 0.0
+        assert rate_limit.acquire("order-created", 10) == 0.0
+        assert rate_limit.acquire("order-created", 10) == 0.5
+        assert rate_limit.acquire("order-created", 10) == 1.0
+
+    def test_refills_over_time(self, clock):
+        rate_limit = PublishRateLimit(
+            topics={"order-created": RateLimit(messages_per_second=1)}
+        )
+        rate_limit.acquire("order-created", 10)
+
+        clock.return_value = 101.0
+
+        assert rate_limit.acquire("order-created", 10) == 0.0
+
+    def test_limits_bytes(self, clock):
+        rate_limit = PublishRateLimit(total=RateLimit(bytes_per_second=100))
+
+        assert rate_limit.acquire("order-created", 80) == 0.0
+        assert rate_limit.acquire("order-cancelled", 80) == pytest.approx(0.6)
+
+    def test_does_not_limit_other_topics(self, clock):
+        rate_limit = PublishRateLimit(
+            topics={"order-created": RateLimit(messages_per_second=1)}
+        )
+        rate_limit.acquire("order-created", 10)
+
+        assert rate_limit.acquire("order-cancelled", 10) == 0.0
+
+    def test_applies_the_topic_and_the_total_limits(self, clock):
+        rate_limit = PublishRateLimit(
+            topics={"order-created": RateLimit(messages_per_second=10)},
+            total=RateLimit(messages_per_second=1),
+        )
+        rate_limit.acquire("order-cancelled", 10)
+
+        assert rate_limit.acquire("order-created", 10) == 1.0
+
+    def test_rejects_without_consuming(self, clock):
+        rate_limit = PublishRateLimit(
+            topics={"order-created": RateLimit(messages_per_second=1)},
+            mode="reject",
+        )
+        rate_limit.acquire("order-created", 10)
+
+        with pytest.raises(RateLimitError) as exc_info:
+            rate_limit.acquire("order-created", 10)
+
+        assert exc_info.value.topic == "order-created"
+        assert exc_info.value.retry_after == 1.0
+        clock.return_value = 101.0
+        assert rate_limit.acquire("order-created", 10) == 0.0
+
+    def test_lets_a_message_over_the_capacity_through_when_rejecting(self, clock):
+        rate_limit = PublishRateLimit(
+            total=RateLimit(bytes_per_second=100), mode="reject"
+        )
+
+        assert rate_limit.acquire("order-created", 500) == 0.0
+        with pytest.raises(RateLimitError):
+            rate_limit.acquire("order-created", 1)
+
+    def test_raises_when_the_wait_is_longer_than_max_wait(self, clock):
+        rate_limit = PublishRateLimit(
+            total=RateLimit(messages_per_second=1), max_wait=0.5
+        )
+        rate_limit.acquire("order-created", 10)
+
+        with pytest.raises(RateLimitError):
+            rate_limit.acquire("order-created", 10)
+
+    def test_raises_on_unsupported_mode(self):
+        with pytest.raises(ValueError, match="Unsupported rate limit mode"):
+            PublishRateLimit(mode="drop")
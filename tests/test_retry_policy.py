@@ -1,6 +1,7 @@
 import pytest
+from google.api_core import exceptions
 
-from rele.retry_policy import RetryPolicy
+from rele.retry_policy import PublishRetryPolicy, RetryPolicy, RetryTopics
 
 
 class TestRetryPolicy:
@@ -17,3 +18,78 @@ class TestRetryPolicy:
     ):
         with pytest.raises(ValueError):
             RetryPolicy(minimum_backoff, maximum_backoff)
+
+
+class TestPublishRetryPolicy:
+    @pytest.mark.parametrize(
+        "kwargs",
+        [
+            {"max_attempts": 0},
+            {"initial_backoff": -1},
+            {"initial_backoff": 10, "maximum_backoff": 1},
+            {"multiplier": 0.5},
+        ],
+    )
+    def test_value_error_is_raised_instantiating_with_wrong_values(self, kwargs):
+        with pytest.raises(ValueError):
+            PublishRetryPolicy(**kwargs)
+
+    @pytest.mark.parametrize(
+        "exception, retryable",
+        [
+            (exceptions.ServiceUnavailable("unavailable"), True),
+            (exceptions.DeadlineExceeded("deadline"), True),
+            (exceptions.ResourceExhausted("quota"), True),
+            (exceptions.NotFound("topic"), False),
+            (TimeoutError(), False),
+        ],
+    )
+    def test_retries_transient_errors_only(self, exception, retryable):
+        assert PublishRetryPolicy().should_retry(exception, attempt=1) is retryable
+
+    def test_does_not_retry_after_the_last_attempt(self):
+        retry_policy = PublishRetryPolicy(max_attempts=3)
+        exception = exceptions.ServiceUnavailable("unavailable")
+
+        assert retry_policy.should_retry(exception, attempt=2)
+        assert not retry_policy.should_retry(exception, attempt=3)
+
+    def test_backoff_grows_exponentially_up_to_the_maximum(self):
+        retry_policy = PublishRetryPolicy(
+            initial_backoff=1, maximum_backoff=5, multiplier=2, jitter=False
+        )
+
+        assert [retry_policy.backoff(attempt) for attempt in range(1, 5)] == [
+            1,
+            2,
+            4,
+            5,
+        ]
+
+    def test_backoff_with_jitter_is_never_above_the_backoff(self):
+        retry_policy = PublishRetryPolicy(initial_backoff=1, multiplier=2)
+
+        assert all(0 <= retry_policy.backoff(3) <= 4 for _ in range(20))
+
+
+class TestRetryTopics:
+    @pytest.mark.parametrize("delays", [(), (0, 60), (10, 1.5), (10, 10)])
+    def test_value_error_is_raised_instantiating_with_wrong_values(self, delays):
+        with pytest.raises(ValueError):
+            RetryTopics(delays)
+
+    def test_names_a_topic_per_delay(self):
+        retry_topics = RetryTopics(delays=(10, 60))
+
+        assert retry_topics.topic("rele-order-created", 0) == (
+            "rele-order-created-retry-10s"
+        )
+        assert retry_topics.topic("rele-order-created", 1) == (
+            "rele-order-created-retry-60s"
+        )
+
+    def test_subscription_backoff_is_capped_at_ten_minutes(self):
+        retry_topics = RetryTopics(delays=(30, 3600))
+
+        assert retry_topics.subscription_retry_policy(0) == RetryPolicy(30, 30)
+        assert retry_topics.subscription_retry_policy(1) == RetryPolicy(600, 600)
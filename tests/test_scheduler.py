@@ -0,0 +1,133 @@
+import threading
+import time
+from concurrent import futures
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from rele.scheduler import KeyAffinityScheduler
+
+
+def message(key=None):
+    return SimpleNamespace(key=key)
+
+
+@pytest.fixture
+def executor():
+    executor = futures.ThreadPoolExecutor(max_workers=4)
+    yield executor
+    executor.shutdown(wait=True)
+
+
+@pytest.fixture
+def scheduler(executor):
+    return KeyAffinityScheduler(executor=executor, key_func=lambda m: m.key)
+
+
+class TestKeyAffinityScheduler:
+    def test_processes_messages_with_the_same_key_one_at_a_time_and_in_order(
+        self, scheduler
+    ):
+        processed = []
+        running = []
+        done = threading.Event()
+
+        def callback(msg):
+            running.append(msg)
+            time.sleep(0.01)
+            assert running == [msg]
+            running.remove(msg)
+            processed.append(msg.index)
+            if len(processed) == 5:
+                done.set()
+
+        for index in range(5):
+            msg = message("order-1")
+            msg.index = index
+            scheduler.schedule(callback, msg)
+
+        assert done.wait(timeout=2)
+        assert processed == [0, 1, 2, 3, 4]
+
+    def test_runs_different_keys_in_parallel(self, scheduler):
+        barrier = threading.Barrier(2, timeout=2)
+        results = []
+
+        def callback(msg):
+            barrier.wait()
+            results.append(msg.key)
+
+        scheduler.schedule(callback, message("order-1"))
+        scheduler.schedule(callback, message("order-2"))
+
+        scheduler.shutdown(await_msg_callbacks=True)
+        assert sorted(results) == ["order-1", "order-2"]
+
+    def test_runs_messages_without_key_in_parallel(self, scheduler):
+        barrier = threading.Barrier(2, timeout=2)
+        results = []
+
+        def callback(msg):
+            barrier.wait()
+            results.append(msg.key)
+
+        scheduler.schedule(callback, message())
+        scheduler.schedule(callback, message())
+
+        scheduler.shutdown(await_msg_callbacks=True)
+        assert results == [None, None]
+
+    def test_keeps_processing_a_key_after_a_callback_fails(self, scheduler):
+        processed = threading.Event()
+
+        def failing_callback(msg):
+            raise ValueError("boom")
+
+        scheduler.schedule(failing_callback, message("order-1"))
+        scheduler.schedule(lambda msg: processed.set(), message("order-1"))
+
+        assert processed.wait(timeout=2)
+
+    def test_nacks_messages_when_the_key_queue_is_full(self, executor):
+        scheduler = KeyAffinityScheduler(
+            executor=executor, key_func=lambda m: m.key, max_pending_per_key=1
+        )
+        release = threading.Event()
+        processed = []
+        overflow = MagicMock(key="order-1")
+
+        scheduler.schedule(lambda msg: release.wait(timeout=2), message("order-1"))
+        scheduler.schedule(processed.append, message("order-1"))
+        scheduler.schedule(processed.append, overflow)
+
+        overflow.nack.assert_called_once()
+        release.set()
+        scheduler.shutdown(await_msg_callbacks=True)
+        assert overflow not in processed
+
+    def test_does_not_nack_other_keys_when_a_key_queue_is_full(self, executor):
+        scheduler = KeyAffinityScheduler(
+            executor=executor, key_func=lambda m: m.key, max_pending_per_key=1
+        )
+        release = threading.Event()
+        other = MagicMock(key="order-2")
+
+        scheduler.schedule(lambda msg: release.wait(timeout=2), message("order-1"))
+        scheduler.schedule(lambda msg: None, message("order-1"))
+        scheduler.schedule(lambda msg: None, other)
+
+        other.nack.assert_not_called()
+        release.set()
+
+    def test_shutdown_returns_the_queued_messages(self, scheduler):
+        release = threading.Event()
+        queued = message("order-1")
+
+        scheduler.schedule(lambda msg: release.wait(timeout=2), message("order-1"))
+        scheduler.schedule(lambda msg: None, queued)
+
+        dropped = scheduler.shutdown(await_msg_callbacks=False)
+        release.set()
+
+        assert dropped == [queued]
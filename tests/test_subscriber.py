@@ -9,11 +9,11 @@ from google.cloud import pubsub_v1
 from google.cloud.pubsub_v1 import PublisherClient, SubscriberClient
 from google.cloud.pubsub_v1.types import FieldMask
 from google.protobuf import duration_pb2
-from google.pubsub_v1 import MessageStoragePolicy
+from google.pubsub_v1 import DeadLetterPolicy, MessageStoragePolicy
 
 import rele.client
 from rele import Subscriber
-from rele.retry_policy import RetryPolicy
+from rele.retry_policy import RetryPolicy, RetryTopics
 from rele.subscription import Subscription
 
 
@@ -53,7 +53,7 @@ class TestSubscriber:
             60,
         )
 
-    @patch("rele.client.pubsub_v1.SubscriberClient", autospec=True)
+    @patch("rele.client.subscriber_client", autospec=True)
     def test_creates_subscriber_client_with_client_options(
         self, mock_subscriber_client, config
     ):
@@ -63,11 +63,15 @@ class TestSubscriber:
             message_storage_policy=config.gc_storage_region,
             client_options={"api_endpoint": "custom-api.interconnect.example.com"},
             default_ack_deadline=60,
+            channel_options={"grpc.keepalive_time_ms": 20000},
+            grpc_compression="gzip",
         )
 
         mock_subscriber_client.assert_called_with(
-            credentials=ANY,
+            config.credentials,
             client_options={"api_endpoint": "custom-api.interconnect.example.com"},
+            channel_options={"grpc.keepalive_time_ms": 20000},
+            compression="gzip",
         )
 
     @patch("rele.client.pubsub_v1.SubscriberClient", autospec=True)
@@ -125,10 +129,10 @@ class TestSubscriber:
         assert client_module.USE_EMULATOR is True
 
         with (
-            patch(
-                "rele.client.pubsub_v1.SubscriberClient", autospec=True
+            patch.object(
+                client_module, "subscriber_client", autospec=True
             ) as mock_subscriber_client,
-            patch("rele.client.pubsub_v1.PublisherClient") as mock_publisher_client,
+            patch.object(client_module, "publisher_client") as mock_publisher_client,
         ):
             mock_subscriber_client.return_value.create_subscription.side_effect = [
                 exceptions.NotFound("Subscription topic does not exist"),
@@ -148,7 +152,12 @@ class TestSubscriber:
                 Subscription(None, topic="rele-test-topic")
             )
 
-        mock_publisher_client.assert_called_once_with(credentials=None)
+        mock_publisher_client.assert_called_once_with(
+            None,
+            client_options=config.client_options,
+            channel_options=None,
+            compression=None,
+        )
 
     @patch.object(SubscriberClient, "create_subscription")
     @patch.object(SubscriberClient, "update_subscription")
@@ -460,6 +469,181 @@ class TestSubscriber:
 
         client_update_subscription.assert_not_called()
 
+    @patch.object(SubscriberClient, "create_subscription")
+    def test_creates_the_retry_subscriptions_when_retry_topics_provided(
+        self, client_create_subscription, project_id, subscriber
+    ):
+        subscriber.update_or_create_subscription(
+            Subscription(
+                None,
+                topic="test-topic",
+                prefix="rele",
+                retry_topics=RetryTopics(delays=(10, 60)),
+            )
+        )
+
+        requests = [
+            call.kwargs["request"] for call in client_create_subscription.call_args_list
+        ]
+        assert [request["name"] for request in requests] == [
+            f"projects/{project_id}/subscriptions/rele-test-topic",
+            f"projects/{project_id}/subscriptions/rele-test-topic-retry-10s",
+            f"projects/{project_id}/subscriptions/rele-test-topic-retry-60s",
+        ]
+        assert requests[2]["topic"] == (
+            f"projects/{project_id}/topics/rele-test-topic-retry-60s"
+        )
+        assert requests[2]["retry_policy"] == pubsub_v1.types.RetryPolicy(
+            minimum_backoff=duration_pb2.Duration(seconds=60),
+            maximum_backoff=duration_pb2.Duration(seconds=60),
+        )
+
+
+class TestSubscriberExactlyOnce:
+    @patch.object(SubscriberClient, "create_subscription")
+    def test_creates_subscription_with_exactly_once_delivery(
+        self, client_create_subscription, subscriber
+    ):
+        subscriber.update_or_create_subscription(
+            Subscription(None, topic="test-topic", exactly_once=True)
+        )
+
+        request = client_create_subscription.call_args.kwargs["request"]
+        assert request["enable_exactly_once_delivery"] is True
+
+    @patch.object(
+        SubscriberClient,
+        "create_subscription",
+        side_effect=exceptions.AlreadyExists("Subscription already exists"),
+    )
+    @patch.object(SubscriberClient, "update_subscription")
+    def test_enables_exactly_once_delivery_on_existing_subscription(
+        self, client_update_subscription, client_create_subscription, subscriber
+    ):
+        subscriber.update_or_create_subscription(
+            Subscription(None, topic="test-topic", exactly_once=True)
+        )
+
+        request = client_update_subscription.call_args.kwargs["request"]
+        assert request["update_mask"] == FieldMask(
+            paths=["enable_exactly_once_delivery"]
+        )
+        assert request["subscription"].enable_exactly_once_delivery is True
+
+
+class TestSubscriberDeadLetter:
+    @pytest.fixture(autouse=True)
+    def mock_create_topic(self):
+        with patch.object(PublisherClient, "create_topic") as mock:
+            yield mock
+
+    @pytest.fixture
+    def subscriber_with_dead_letter_topic(self, config):
+        return Subscriber(
+            config.gc_project_id,
+            config.credentials,
+            None,
+            config.client_options,
+            60,
+            default_dead_letter_topic="rele-dead-letter",
+        )
+
+    @patch.object(SubscriberClient, "create_subscription")
+    def test_creates_subscription_with_dead_letter_policy(
+        self, client_create_subscription, mock_create_topic, project_id, subscriber
+    ):
+        subscriber.update_or_create_subscription(
+            Subscription(
+                None,
+                topic="test-topic",
+                dead_letter_topic="test-topic-dead-letter",
+                max_delivery_attempts=10,
+            )
+        )
+
+        dead_letter_path = f"projects/{project_id}/topics/test-topic-dead-letter"
+        mock_create_topic.assert_called_once_with(
+            request={"name": dead_letter_path, "message_storage_policy": ANY}
+        )
+        dead_letter_subscription, subscription = [
+            call.kwargs["request"] for call in client_create_subscription.call_args_list
+        ]
+        assert dead_letter_subscription == {
+            "name": f"projects/{project_id}/subscriptions/test-topic-dead-letter",
+            "topic": dead_letter_path,
+            "ack_deadline_seconds": 60,
+        }
+        assert subscription["dead_letter_policy"] == DeadLetterPolicy(
+            dead_letter_topic=dead_letter_path, max_delivery_attempts=10
+        )
+
+    @patch.object(SubscriberClient, "create_subscription")
+    def test_applies_the_default_dead_letter_topic_once(
+        self,
+        client_create_subscription,
+        mock_create_topic,
+        project_id,
+        subscriber_with_dead_letter_topic,
+    ):
+        for topic in ("test-topic", "other-topic"):
+            subscriber_with_dead_letter_topic.update_or_create_subscription(
+                Subscription(None, topic=topic)
+            )
+
+        mock_create_topic.assert_called_once()
+        subscription = client_create_subscription.call_args.kwargs["request"]
+        assert subscription["dead_letter_policy"] == DeadLetterPolicy(
+            dead_letter_topic=f"projects/{project_id}/topics/rele-dead-letter",
+            max_delivery_attempts=5,
+        )
+
+    @patch.object(SubscriberClient, "create_subscription")
+    def test_only_dead_letters_from_the_last_retry_subscription(
+        self, client_create_subscription, subscriber_with_dead_letter_topic
+    ):
+        subscription = Subscription(
+            None, topic="test-topic", retry_topics=RetryTopics(delays=(60, 3600))
+        )
+
+        for retry in subscription.retry_subscriptions:
+            subscriber_with_dead_letter_topic.update_or_create_subscription(retry)
+
+        first, last = [
+            call.kwargs["request"] for call in client_create_subscription.call_args_list
+        ][-2:]
+        assert first.get("dead_letter_policy") is None
+        assert last["dead_letter_policy"].max_delivery_attempts == 8
+
+    @patch.object(
+        SubscriberClient,
+        "create_subscription",
+        side_effect=exceptions.AlreadyExists("Subscription already exists"),
+    )
+    @patch.object(SubscriberClient, "update_subscription")
+    def test_updates_existing_subscription_with_dead_letter_policy(
+        self,
+        client_update_subscription,
+        client_create_subscription,
+        mock_create_topic,
+        subscriber,
+    ):
+        mock_create_topic.side_effect = exceptions.AlreadyExists("Topic exists")
+
+        subscriber.update_or_create_subscription(
+            Subscription(
+                None,
+                topic="test-topic",
+                retry_policy=RetryPolicy(10, 50),
+                dead_letter_topic="test-topic-dead-letter",
+            )
+        )
+
+        request = client_update_subscription.call_args.kwargs["request"]
+        assert request["update_mask"] == FieldMask(
+            paths=["retry_policy", "dead_letter_policy"]
+        )
+        assert request["subscription"].dead_letter_policy.max_delivery_attempts == 5
+
 
 class TestSubscriberConsume:
     @pytest.fixture
@@ -1,15 +1,24 @@
+import gzip
 import logging
 import queue
 import time
-from unittest.mock import MagicMock, patch
+from datetime import datetime, timedelta, timezone
+from unittest.mock import ANY, MagicMock, patch
 
 import pytest
 from google.cloud import pubsub_v1
+from google.cloud.pubsub_v1.subscriber.exceptions import (
+    AcknowledgeError,
+    AcknowledgeStatus,
+)
 from google.protobuf import timestamp_pb2
 
 from rele import Callback, Subscription, sub
+from rele.claim_check import CLAIM_CHECK_ATTRIBUTE, ClaimCheck
+from rele.compression import COMPRESSION_ATTRIBUTE
+from rele.dedup import Deduplicator
 from rele.middleware import register_middleware
-from rele.retry_policy import RetryPolicy
+from rele.retry_policy import RetryPolicy, RetryTopics
 from tests import subs as subs_module
 
 logger = logging.getLogger(__name__)
@@ -240,6 +249,7 @@ class TestCallback:
                     "lang": "es",
                     "published_at": str(published_at),
                 },
+                "delivery_attempt": 1,
             },
         }
 
@@ -278,6 +288,7 @@ class TestCallback:
                     "lang": "es",
                     "published_at": str(published_at),
                 },
+                "delivery_attempt": 1,
             },
         }
 
@@ -311,6 +322,7 @@ class TestCallback:
                     "lang": "es",
                     "published_at": str(published_at),
                 },
+                "delivery_attempt": 1,
             },
         }
         assert failed_log.subscription_message == str(message_wrapper)
@@ -338,10 +350,112 @@ class TestCallback:
                 "subscription": "rele-some-cool-topic",
                 "duration_seconds": pytest.approx(0.5, abs=0.5),
                 "attributes": {},
+                "delivery_attempt": 1,
             },
         }
         assert failed_log.subscription_message == str(message_wrapper_invalid_json)
 
+    def test_fetches_offloaded_payload_from_the_claim_check(self, publish_time):
+        rele_message = pubsub_v1.types.PubsubMessage(
+            data=b"",
+            attributes={"lang": "es", CLAIM_CHECK_ATTRIBUTE: "some-cool-topic/abc"},
+            message_id="1",
+            publish_time=publish_time,
+        )
+        message = pubsub_v1.subscriber.message.Message(
+            rele_message._pb,
+            "ack-id",
+            delivery_attempt=1,
+            request_queue=queue.Queue(),
+        )
+        message.ack = MagicMock(autospec=True)
+        store = MagicMock()
+        store.get.return_value = b'{"id": 123}'
+
+        callback = Callback(sub_stub, claim_check=ClaimCheck(store))
+        res = callback(message)
+
+        assert res == 123
+        store.get.assert_called_once_with("some-cool-topic/abc")
+        message.ack.assert_called_once()
+
+    def test_does_not_ack_message_when_claim_check_fetch_fails(
+        self, message_wrapper, caplog
+    ):
+        message_wrapper.attributes[CLAIM_CHECK_ATTRIBUTE] = "some-cool-topic/abc"
+        store = MagicMock()
+        store.get.side_effect = FileNotFoundError()
+
+        callback = Callback(sub_stub, claim_check=ClaimCheck(store))
+        res = callback(message_wrapper)
+
+        assert res is None
+        message_wrapper.ack.assert_not_called()
+        assert caplog.records[-1].message == (
+            "Exception raised while processing "
+            "message for rele-some-cool-topic - "
+            "sub_stub: FileNotFoundError"
+        )
+
+    def test_does_not_ack_offloaded_message_without_claim_check(self, publish_time):
+        rele_message = pubsub_v1.types.PubsubMessage(
+            data=b"",
+            attributes={"lang": "es", CLAIM_CHECK_ATTRIBUTE: "some-cool-topic/abc"},
+            message_id="1",
+            publish_time=publish_time,
+        )
+        message = pubsub_v1.subscriber.message.Message(
+            rele_message._pb,
+            "ack-id",
+            delivery_attempt=1,
+            request_queue=queue.Queue(),
+        )
+        message.ack = MagicMock(autospec=True)
+        handler = MagicMock(__name__="handler")
+
+        with patch("rele.subscription.run_middleware_hook") as mock_hook:
+            res = Callback(Subscription(handler, "some-cool-topic"))(message)
+
+        assert res is None
+        handler.assert_not_called()
+        message.ack.assert_not_called()
+        [failure] = [
+            call.args
+            for call in mock_hook.call_args_list
+            if call.args[0] == "post_process_message_failure"
+        ]
+        assert "CLAIM_CHECK" in str(failure[2])
+
+    def test_decompresses_compressed_payloads(self, publish_time):
+        rele_message = pubsub_v1.types.PubsubMessage(
+            data=gzip.compress(b'{"id": 123}'),
+            attributes={"lang": "es", COMPRESSION_ATTRIBUTE: "gzip"},
+            message_id="1",
+            publish_time=publish_time,
+        )
+        message = pubsub_v1.subscriber.message.Message(
+            rele_message._pb,
+            "ack-id",
+            delivery_attempt=1,
+            request_queue=queue.Queue(),
+        )
+        message.ack = MagicMock(autospec=True)
+
+        res = Callback(sub_stub)(message)
+
+        assert res == 123
+        message.ack.assert_called_once()
+
+    def test_passes_the_delivery_attempt_to_the_sub(self, message_wrapper):
+        received = {}
+
+        def handler(data, **kwargs):
+            received.update(kwargs)
+
+        Callback(Subscription(handler, "topic"))(message_wrapper)
+
+        assert received["delivery_attempt"] == 1
+
     def test_published_time_as_message_attribute(self, message_wrapper, caplog):
         callback = Callback(sub_published_time_type)
         callback(message_wrapper)
@@ -349,6 +463,17 @@ class TestCallback:
         success_log = caplog.records[-2]
         assert success_log.message == "<class 'float'>"
 
+    def test_observes_the_lag_of_received_messages(self, message_wrapper):
+        callback = Callback(sub_stub)
+        before = callback.lag.stats()
+
+        callback(message_wrapper)
+
+        after = callback.lag.stats()
+        for name in ("end_to_end", "pubsub", "queue_time"):
+            observations = getattr(after, name).observations
+            assert observations == getattr(before, name).observations + 1
+
     def test_old_django_connections_closed_when_middleware_is_used(
         self, mock_close_old_connections, message_wrapper, config
     ):
@@ -422,3 +547,471 @@ class TestDecorator:
         )(lambda data, **kwargs: None)
 
         assert subscription.retry_policy == RetryPolicy(1, 10)
+
+    def test_dead_letter_topic_is_applied_when_specified(self):
+        subscription = sub(
+            topic="topic",
+            dead_letter_topic="topic-dead-letter",
+            max_delivery_attempts=10,
+        )(lambda data, **kwargs: None)
+
+        assert subscription.dead_letter_topic == "topic-dead-letter"
+        assert subscription.max_delivery_attempts == 10
+
+    @pytest.mark.parametrize("max_delivery_attempts", [4, 101])
+    def test_raises_error_when_max_delivery_attempts_is_out_of_range(
+        self, max_delivery_attempts
+    ):
+        with pytest.raises(ValueError, match="between 5 and 100"):
+            sub(topic="topic", max_delivery_attempts=max_delivery_attempts)(
+                lambda data, **kwargs: None
+            )
+
+    def test_exactly_once_is_disabled_by_default(self):
+        subscription = sub(topic="topic")(lambda data, **kwargs: None)
+
+        assert subscription.exactly_once is False
+
+    def test_exactly_once_is_applied_when_specified(self):
+        subscription = sub(topic="topic", exactly_once=True)(
+            lambda data, **kwargs: None
+        )
+
+        assert subscription.exactly_once is True
+
+    def test_serialize_by_is_applied_when_specified(self):
+        subscription = sub(topic="topic", prefix="rele", serialize_by="order_id")(
+            lambda data, **kwargs: None
+        )
+
+        assert subscription.serialize_by == "order_id"
+
+
+class TestLaneKey:
+    @pytest.fixture
+    def message(self):
+        return MagicMock(attributes={"order_id": "42"}, ordering_key="")
+
+    def test_uses_the_attribute_when_serialize_by_is_an_attribute_name(self, message):
+        subscription = Subscription(
+            lambda data, **kwargs: None, "topic", serialize_by="order_id"
+        )
+
+        assert subscription.lane_key(message) == "42"
+
+    def test_uses_the_function_when_serialize_by_is_callable(self, message):
+        subscription = Subscription(
+            lambda data, **kwargs: None,
+            "topic",
+            serialize_by=lambda attrs: f"order-{attrs['order_id']}",
+        )
+
+        assert subscription.lane_key(message) == "order-42"
+
+    def test_falls_back_to_the_ordering_key_when_attribute_is_missing(self, message):
+        message.ordering_key = "customer-1"
+        subscription = Subscription(
+            lambda data, **kwargs: None, "topic", serialize_by="customer_id"
+        )
+
+        assert subscription.lane_key(message) == "customer-1"
+
+    def test_returns_none_when_there_is_no_key(self, message):
+        subscription = Subscription(
+            lambda data, **kwargs: None, "topic", serialize_by="customer_id"
+        )
+
+        assert subscription.lane_key(message) is None
+
+
+def failing_handler(data, **kwargs):
+    raise ValueError("Boom")
+
+
+class TestRetryTopics:
+    @pytest.fixture
+    def subscription(self):
+        return Subscription(
+            failing_handler,
+            "order-created",
+            prefix="rele",
+            retry_topics=RetryTopics(delays=(10, 60)),
+        )
+
+    @pytest.fixture
+    def mock_publisher(self):
+        with patch("rele.publishing.get_publisher") as mock:
+            yield mock.return_value
+
+    @pytest.fixture
+    def message(self):
+        return MagicMock(data=b'{"id": 123}', attributes={"lang": "es"})
+
+    def test_builds_a_retry_subscription_per_delay(self, subscription):
+        retry_subscriptions = subscription.retry_subscriptions
+
+        assert [retry.name for retry in retry_subscriptions] == [
+            "rele-order-created-retry-10s",
+            "rele-order-created-retry-60s",
+        ]
+        assert retry_subscriptions[1].retry_policy == RetryPolicy(60, 60)
+        assert retry_subscriptions[1].retry_of is subscription
+        assert retry_subscriptions[1].retry_subscriptions == []
+
+    def test_only_dead_letters_on_the_last_retry_topic(self, subscription):
+        first, last = subscription.retry_subscriptions
+
+        assert subscription.dead_letter_attempts(5) == 5
+        assert first.dead_letter_attempts(5) is None
+        assert last.dead_letter_attempts(5) == 5
+
+    @pytest.mark.parametrize(
+        "delay, max_delivery_attempts, expected",
+        [(3600, None, 8), (3600, 10, 10), (86400, None, 100)],
+    )
+    def test_waits_for_long_delays_before_dead_lettering(
+        self, delay, max_delivery_attempts, expected
+    ):
+        subscription = Subscription(
+            failing_handler,
+            "order-created",
+            retry_topics=RetryTopics(delays=(delay,)),
+            max_delivery_attempts=max_delivery_attempts,
+        )
+
+        (retry,) = subscription.retry_subscriptions
+
+        assert retry.dead_letter_attempts(5) == expected
+
+    def test_has_no_retry_subscriptions_by_default(self):
+        assert Subscription(failing_handler, "order-created").retry_subscriptions == []
+
+    @patch("rele.subscription.time.time", return_value=1000.0)
+    def test_moves_failed_message_to_the_first_retry_topic(
+        self, _, subscription, mock_publisher, message
+    ):
+        Callback(subscription)(message)
+
+        mock_publisher.republish.assert_called_once_with(
+            "rele-order-created-retry-10s",
+            b'{"id": 123}',
+            {"lang": "es", "rele_retry_attempt": "1", "rele_retry_due": "1010.0"},
+        )
+        message.ack.assert_called_once()
+
+    def test_moves_failed_retry_to_the_next_retry_topic(
+        self, subscription, mock_publisher, message
+    ):
+        message.attributes = {"rele_retry_attempt": "1", "rele_retry_due": "0"}
+
+        Callback(subscription.retry_subscriptions[0])(message)
+
+        topic, _, attrs = mock_publisher.republish.call_args.args
+        assert topic == "rele-order-created-retry-60s"
+        assert attrs["rele_retry_attempt"] == "2"
+        message.ack.assert_called_once()
+
+    def test_does_not_ack_when_there_are_no_retries_left(
+        self, subscription, mock_publisher, message
+    ):
+        message.attributes = {"rele_retry_attempt": "2", "rele_retry_due": "0"}
+
+        Callback(subscription.retry_subscriptions[1])(message)
+
+        mock_publisher.republish.assert_not_called()
+        message.ack.assert_not_called()
+
+    def test_does_not_ack_when_the_message_cannot_be_moved(
+        self, subscription, mock_publisher, message, caplog
+    ):
+        mock_publisher.republish.side_effect = TimeoutError()
+
+        Callback(subscription)(message)
+
+        message.ack.assert_not_called()
+        assert "Could not move the failed message" in caplog.text
+
+    def test_nacks_retries_received_before_their_delay(self, subscription, message):
+        handler = MagicMock()
+        subscription._func = handler
+        message.attributes = {
+            "rele_retry_attempt": "1",
+            "rele_retry_due": str(time.time() + 60),
+        }
+
+        Callback(subscription.retry_subscriptions[0])(message)
+
+        message.nack.assert_called_once()
+        handler.assert_not_called()
+
+
+class TestExactlyOnce:
+    @pytest.fixture
+    def subscription(self):
+        return Subscription(
+            lambda data, **kwargs: data["id"], "order-created", exactly_once=True
+        )
+
+    @pytest.fixture
+    def message(self):
+        message = MagicMock(data=b'{"id": 123}', attributes={})
+        message.ack_with_response.return_value.result.return_value = None
+        return message
+
+    @pytest.fixture
+    def mock_hook(self):
+        with patch("rele.subscription.run_middleware_hook") as mock:
+            yield mock
+
+    def hooks(self, mock_hook):
+        return [call.args[0] for call in mock_hook.call_args_list]
+
+    def test_waits_for_the_ack_to_be_confirmed(self, subscription, message, mock_hook):
+        res = Callback(subscription)(message)
+
+        assert res == 123
+        message.ack_with_response.return_value.result.assert_called_once_with()
+        message.ack.assert_not_called()
+        assert "post_process_message_success" in self.hooks(mock_hook)
+
+    def test_runs_the_ack_failure_hook_when_the_ack_is_refused(
+        self, subscription, message, mock_hook
+    ):
+        error = AcknowledgeError(AcknowledgeStatus.INVALID_ACK_ID, "expired")
+        message.ack_with_response.return_value.result.side_effect = error
+
+        Callback(subscription)(message)
+
+        mock_hook.assert_any_call(
+            "post_process_message_ack_failure", subscription, error, message
+        )
+        assert "post_process_message_success" not in self.hooks(mock_hook)
+
+
+class TestDeduplication:
+    @pytest.fixture
+    def handler(self):
+        return MagicMock(return_value="done", __name__="handler")
+
+    @pytest.fixture
+    def deduplicator(self):
+        return Deduplicator()
+
+    @pytest.fixture
+    def mock_hook(self):
+        with patch("rele.subscription.run_middleware_hook") as mock:
+            yield mock
+
+    def message(self, message_id="1", **attributes):
+        return MagicMock(
+            data=b'{"id": 123}',
+            attributes=attributes,
+            message_id=message_id,
+            delivery_attempt=None,
+        )
+
+    def test_skips_redelivered_messages(self, handler, deduplicator, mock_hook):
+        callback = Callback(
+            Subscription(handler, "topic", deduplicate=True), deduplicator=deduplicator
+        )
+        callback(self.message())
+        duplicate = self.message()
+
+        res = callback(duplicate)
+
+        assert res is None
+        handler.assert_called_once()
+        duplicate.ack.assert_called_once()
+        mock_hook.assert_any_call(
+            "post_process_message_skipped", ANY, "duplicate", duplicate
+        )
+
+    def test_keys_on_the_idempotency_attribute(self, handler, deduplicator):
+        callback = Callback(
+            Subscription(handler, "topic", deduplicate="order_id"),
+            deduplicator=deduplicator,
+        )
+
+        callback(self.message("1", order_id="7"))
+        callback(self.message("2", order_id="7"))
+        callback(self.message("3", order_id="8"))
+
+        assert handler.call_count == 2
+
+    def test_processes_again_messages_that_failed(self, handler, deduplicator):
+        handler.side_effect = [ValueError("Boom"), "done"]
+        callback = Callback(
+            Subscription(handler, "topic", deduplicate=True), deduplicator=deduplicator
+        )
+        callback(self.message())
+
+        assert callback(self.message()) == "done"
+
+    def test_nacks_redeliveries_of_messages_being_processed(
+        self, handler, deduplicator
+    ):
+        callback = Callback(
+            Subscription(handler, "topic", deduplicate=True), deduplicator=deduplicator
+        )
+        deduplicator.check("topic/1")
+        redelivery = self.message()
+
+        callback(redelivery)
+
+        redelivery.nack.assert_called_once()
+        handler.assert_not_called()
+
+    def test_does_not_deduplicate_by_default(self, handler, deduplicator):
+        callback = Callback(Subscription(handler, "topic"), deduplicator=deduplicator)
+
+        callback(self.message())
+        callback(self.message())
+
+        assert handler.call_count == 2
+
+
+class TestCoalescing:
+    @pytest.fixture
+    def handler(self):
+        return MagicMock(return_value="done", __name__="handler")
+
+    @pytest.fixture
+    def mock_hook(self):
+        with patch("rele.subscription.run_middleware_hook") as mock:
+            yield mock
+
+    @pytest.fixture
+    def schedule(self):
+        with patch("rele.coalesce.DelayQueue.schedule") as mock:
+            yield mock
+
+    def message(self, published_at, **attributes):
+        return MagicMock(
+            data=b'{"id": 123}',
+            attributes={"published_at": str(published_at), **attributes},
+            delivery_attempt=None,
+        )
+
+    def test_processes_only_the_latest_message_of_a_key(
+        self, handler, mock_hook, schedule
+    ):
+        callback = Callback(Subscription(handler, "topic", coalesce_by="product_id"))
+        older = self.message(1.0, product_id="7")
+        latest = self.message(2.0, product_id="7")
+
+        callback(older)
+        callback(latest)
+        _, flush = schedule.call_args.args
+        flush()
+
+        handler.assert_called_once()
+        assert handler.call_args.kwargs["published_at"] == 2.0
+        older.ack.assert_called_once()
+        latest.ack.assert_called_once()
+        mock_hook.assert_any_call(
+            "post_process_message_skipped", ANY, "coalesced", older
+        )
+        assert callback.coalescer.stats().coalesced == 1
+
+    def test_processes_messages_without_the_key_at_once(self, handler, schedule):
+        callback = Callback(Subscription(handler, "topic", coalesce_by="product_id"))
+
+        assert callback(self.message(1.0)) == "done"
+        schedule.assert_not_called()
+
+    def test_does_not_coalesce_by_default(self, handler):
+        callback = Callback(Subscription(handler, "topic"))
+
+        assert callback.coalescer is None
+        assert callback(self.message(1.0, product_id="7")) == "done"
+
+    def test_raises_error_when_window_is_not_positive(self, handler):
+        with pytest.raises(ValueError, match="window"):
+            Subscription(handler, "topic", coalesce_by="product_id", window=0)
+
+    def test_raises_error_when_combined_with_serialize_by(self, handler):
+        with pytest.raises(ValueError, match="serialize_by"):
+            Subscription(
+                handler, "topic", coalesce_by="product_id", serialize_by="product_id"
+            )
+
+
+class TestStaleMessages:
+    @pytest.fixture
+    def handler(self):
+        return MagicMock(return_value="done", __name__="handler")
+
+    @pytest.fixture
+    def mock_hook(self):
+        with patch("rele.subscription.run_middleware_hook") as mock:
+            yield mock
+
+    def message(self, age):
+        return MagicMock(
+            data=b'{"id": 123}',
+            attributes={"published_at": str(time.time() - age)},
+            delivery_attempt=None,
+        )
+
+    def test_acks_messages_older_than_max_age(self, handler, mock_hook):
+        callback = Callback(Subscription(handler, "topic", max_age=60))
+        message = self.message(age=120)
+
+        res = callback(message)
+
+        assert res is None
+        handler.assert_not_called()
+        message.ack.assert_called_once()
+        mock_hook.assert_called_once_with(
+            "post_process_message_skipped", ANY, "stale", message
+        )
+        assert callback.stale_messages == 1
+
+    def test_processes_messages_younger_than_max_age(self, handler):
+        callback = Callback(Subscription(handler, "topic", max_age=60))
+
+        assert callback(self.message(age=1)) == "done"
+        assert callback.stale_messages == 0
+
+    def test_falls_back_to_the_pubsub_publish_time(self, handler):
+        callback = Callback(Subscription(handler, "topic", max_age=60))
+        message = MagicMock(
+            data=b'{"id": 123}',
+            attributes={},
+            publish_time=datetime.now(timezone.utc) - timedelta(minutes=2),
+            delivery_attempt=None,
+        )
+
+        callback(message)
+
+        handler.assert_not_called()
+
+    @pytest.mark.parametrize(
+        "minutes, skipped", [(2, True), (0, False)], ids=["stale", "fresh"]
+    )
+    def test_falls_back_to_the_publish_time_of_foreign_timestamps(
+        self, handler, mock_hook, minutes, skipped
+    ):
+        callback = Callback(Subscription(handler, "topic", max_age=60))
+        message = MagicMock(
+            data=b'{"id": 123}',
+            attributes={"published_at": "2024-01-01T00:00:00Z"},
+            publish_time=datetime.now(timezone.utc) - timedelta(minutes=minutes),
+            delivery_attempt=None,
+        )
+
+        callback(message)
+
+        assert callback.stale_messages == int(skipped)
+        hooks = [call.args[0] for call in mock_hook.call_args_list]
+        assert ("post_process_message_skipped" in hooks) is skipped
+        assert ("post_process_message_failure" in hooks) is not skipped
+
+    def test_does_not_shed_by_default(self, handler):
+        callback = Callback(Subscription(handler, "topic"))
+
+        assert callback(self.message(age=86400)) == "done"
+
+    def test_raises_error_when_max_age_is_not_positive(self, handler):
+        with pytest.raises(ValueError, match="max_age"):
+            Subscription(handler, "topic", max_age=0)
@@ -12,7 +12,8 @@ from google.cloud.pubsub_v1.subscriber.scheduler import ThreadScheduler
 
 from rele import Subscriber, Worker, sub
 from rele.middleware import register_middleware
-from rele.retry_policy import RetryPolicy
+from rele.retry_policy import RetryPolicy, RetryTopics
+from rele.scheduler import KeyAffinityScheduler
 from rele.subscription import Callback
 from rele.worker import NotConnectionError, check_internet_connection, create_and_run
 
@@ -118,6 +119,59 @@ class TestWorker:
         scheduler = mock_consume.call_args_list[0][1]["scheduler"]
         assert scheduler._executor._max_workers == 3
 
+    def test_start_uses_a_key_affinity_scheduler_when_subscription_is_serialized(
+        self, mock_consume, config
+    ):
+        @sub(topic="some-ordered-topic", prefix="rele", serialize_by="order_id")
+        def serialized_sub_stub(data, **kwargs):
+            pass
+
+        worker = Worker(
+            (serialized_sub_stub,),
+            config.client_options,
+            config.gc_project_id,
+            config.credentials,
+            threads_per_subscription=3,
+            max_pending_per_key=5,
+        )
+        worker.start()
+
+        scheduler = mock_consume.call_args_list[0][1]["scheduler"]
+        assert isinstance(scheduler, KeyAffinityScheduler)
+        assert scheduler._executor._max_workers == 3
+        assert scheduler._max_pending_per_key == 5
+
+    def test_start_consumes_the_retry_subscriptions_with_their_own_executor(
+        self, mock_consume, config
+    ):
+        @sub(
+            topic="some-retried-topic",
+            prefix="rele",
+            retry_topics=RetryTopics(delays=(10, 60)),
+        )
+        def retried_sub_stub(data, **kwargs):
+            pass
+
+        worker = Worker(
+            (retried_sub_stub,),
+            config.client_options,
+            config.gc_project_id,
+            config.credentials,
+        )
+        worker.start()
+
+        assert [
+            call.kwargs["subscription_name"] for call in mock_consume.call_args_list
+        ] == [
+            "rele-some-retried-topic",
+            "rele-some-retried-topic-retry-10s",
+            "rele-some-retried-topic-retry-60s",
+        ]
+        executors = {
+            call.kwargs["scheduler"]._executor for call in mock_consume.call_args_list
+        }
+        assert len(executors) == 3
+
     @patch.object(Worker, "_wait_forever")
     def test_run_sets_up_and_creates_subscriptions_when_called(
         self, mock_wait_forever, mock_consume, mock_create_subscription, worker
@@ -156,12 +210,16 @@ class TestWorker:
         self, mock_wait_forever, mock_consume, mock_create_subscription, worker
     ):
         worker.run_forever()
+        subscriber_client = worker._subscriber._client
 
-        with pytest.raises(SystemExit) as exc_info:
+        with (
+            patch("rele.client.release_client") as mock_release_client,
+            pytest.raises(SystemExit) as exc_info,
+        ):
             worker.stop()
 
         assert worker._futures[sub_stub]._state == FINISHED
-        assert worker._subscriber._client._closed is True
+        mock_release_client.assert_called_once_with(subscriber_client)
         # The exit code is what a supervisor or k8s reads to decide whether the
         # shutdown was clean. Asserted here rather than in a test of its own
         # because this fixture setup is the slowest in the suite (~1s).
@@ -378,6 +436,14 @@ class TestCreateAndRun:
             60,
             2,
             RetryPolicy(5, 30),
+            max_pending_per_key=100,
+            claim_check=None,
+            compressor=None,
+            channel_options=None,
+            grpc_compression=None,
+            default_dead_letter_topic=None,
+            default_max_delivery_attempts=None,
+            deduplicator=None,
         )
         mock_worker.return_value.run_forever.assert_called_once_with()
 
@@ -402,4 +468,8 @@ class TestCreateAndRun:
             {"api_endpoint": "custom-api.interconnect.example.com"},
             60,
             None,
+            channel_options=None,
+            grpc_compression=None,
+            default_dead_letter_topic=None,
+            default_max_delivery_attempts=None,
         )